@@ -0,0 +1,181 @@
+# Compares building synthetic package modules from generated source with the
+# structured builder on packages with hundreds of test modules each. Run from
+# the repository root with the package importable:
+#
+#     PYTHONPATH=. python benchmarks/bench_importer.py
+#
+# or as "python setup.py bench -m importer" to track the timings.
+
+import os
+import re
+import sys
+import imp
+import time
+import shutil
+import inspect
+import tempfile
+import unittest
+
+from distcovery.path import Package, walk
+from distcovery.importer import UniqueNames, Importer
+
+_PACKAGES = 10
+_MODULES = 300
+_CASES = 3
+_HELPERS = 20
+_REPEAT = 5
+
+_MODULE_NAME_PREFIX = 'TestModule'
+_IMPORT_MODULE_LINE = 'import %%s as %s%%d\n' % _MODULE_NAME_PREFIX
+_MODULE_NAME_PATTERN = re.compile('%s\\d+$' % _MODULE_NAME_PREFIX)
+_CASE_NAME_TEMPLATE = 'TestCase%d'
+
+_tree = {}
+
+def _enumerate_testmodules(global_section):
+    for name, item in global_section.items():
+        if isinstance(item, type(sys)) and _MODULE_NAME_PATTERN.match(name):
+            yield item
+
+def _enumerate_testcases(global_section):
+    index = 0
+    for module in _enumerate_testmodules(global_section):
+        for item in module.__dict__.values():
+            if inspect.isclass(item) and issubclass(item, unittest.TestCase):
+                index += 1
+                yield _CASE_NAME_TEMPLATE % index, item
+
+class LegacyImporter(object):
+    def __init__(self, package):
+        self.unique_names = UniqueNames()
+
+        self.aliases = {}
+        self.sources = {}
+
+        self.build_module(None, package)
+
+    def build_module(self, alias, package):
+        name = self.unique_names.new(package.str_name())
+
+        self.aliases[alias] = name
+        self.sources[name] = ''
+
+        counter = 0
+        for alias, importable in package.content.items():
+            if isinstance(importable, Package):
+                self.build_module(alias, importable)
+            else:
+                counter += 1
+                self.sources[name] += _IMPORT_MODULE_LINE % \
+                                      (importable.str_name(), counter)
+
+    def load_module(self, fullname):
+        module = imp.new_module(fullname)
+        module.__file__ = '<test package>'
+        module.__path__ = []
+        module.__loader__ = self
+        module.__package__ = fullname
+
+        sys.modules[fullname] = module
+        exec(self.sources[fullname], module.__dict__)
+        module.__dict__.update(list(_enumerate_testcases(module.__dict__)))
+
+        return module
+
+def build_tree(root):
+    source = ['import unittest\n']
+    for helper in range(_HELPERS):
+        source.append('HELPER%d = %d\n' % (helper, helper))
+
+    for case in range(_CASES):
+        source.append('class Test%d(unittest.TestCase):\n' % case)
+        source.append('    def test_case(self):\n')
+        source.append('        pass\n')
+
+    source = ''.join(source)
+
+    tests = os.path.join(root, 'bench_tests')
+    os.mkdir(tests)
+    open(os.path.join(tests, '__init__.py'), 'w').close()
+
+    for package in range(_PACKAGES):
+        package = os.path.join(tests, 'test_package%d' % package)
+        os.mkdir(package)
+        open(os.path.join(package, '__init__.py'), 'w').close()
+
+        for module in range(_MODULES):
+            name = os.path.join(package, 'test_module%d.py' % module)
+            with open(name, 'w') as stream:
+                stream.write(source)
+
+def load_all(importer_class, package):
+    importer = importer_class(package)
+
+    start = time.time()
+    for name in importer.aliases.values():
+        importer.load_module(name)
+
+    elapsed = time.time() - start
+
+    for name in importer.aliases.values():
+        del sys.modules[name]
+
+    return elapsed, len(importer.aliases)
+
+def setUpModule():
+    _tree['current'] = os.getcwd()
+    _tree['root'] = root = tempfile.mkdtemp()
+    build_tree(root)
+    os.chdir(root)
+    sys.path.insert(0, root)
+
+    _tree['package'] = package = walk('bench_tests')
+    for importable in package.content.values():
+        if not isinstance(importable, Package):
+            __import__(importable.str_name())
+
+def tearDownModule():
+    root = _tree.pop('root')
+    if root in sys.path:
+        sys.path.remove(root)
+
+    for name in list(sys.modules):
+        if name == 'bench_tests' or name.startswith('bench_tests.'):
+            del sys.modules[name]
+
+    del _tree['package']
+    os.chdir(_tree.pop('current'))
+    shutil.rmtree(root)
+
+def bench_legacy():
+    load_all(LegacyImporter, _tree['package'])
+
+def bench_builder():
+    load_all(Importer, _tree['package'])
+
+def measure(importer_class, package):
+    best = None
+    for attempt in range(_REPEAT):
+        elapsed, count = load_all(importer_class, package)
+        if best is None or elapsed < best:
+            best = elapsed
+
+    return best, count
+
+def main():
+    setUpModule()
+    try:
+        sys.stdout.write('Test modules: %d in %d packages, %d test cases ' \
+                         'each\n\n' % (_PACKAGES*_MODULES, _PACKAGES, _CASES))
+        sys.stdout.write('%-10s %10s %10s\n' % ('importer', 'modules',
+                                                'best, s'))
+
+        for name, importer_class in (('legacy', LegacyImporter),
+                                     ('builder', Importer)):
+            best, count = measure(importer_class, _tree['package'])
+            sys.stdout.write('%-10s %10d %10.4f\n' % (name, count, best))
+    finally:
+        tearDownModule()
+
+if __name__ == '__main__':
+    main()
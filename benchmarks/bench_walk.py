@@ -0,0 +1,178 @@
+# Compares test discovery on a synthetic tree of about 50k entries. Run from
+# the repository root with the package importable:
+#
+#     PYTHONPATH=. python benchmarks/bench_walk.py
+#
+# for counts of system calls or as "python setup.py bench -m walk" to track
+# the timings.
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+import distcovery.path
+from distcovery.path import _TEST_PACKAGE_PATTERN, _TEST_MODULE_PATTERN, \
+                            Importable, Package, walk
+
+_PACKAGES = 50
+_SUBPACKAGES = 10
+_MODULES = 60
+_OTHER_FILES = 40
+_REPEAT = 15
+
+_tree = {}
+
+def build_tree(root):
+    entries = 0
+    for package in range(_PACKAGES):
+        package = os.path.join(root, 'test_package%d' % package)
+        os.mkdir(package)
+        open(os.path.join(package, '__init__.py'), 'w').close()
+        entries += 2
+
+        for subpackage in range(_SUBPACKAGES):
+            subpackage = os.path.join(package, 'test_sub%d' % subpackage)
+            os.mkdir(subpackage)
+            open(os.path.join(subpackage, '__init__.py'), 'w').close()
+            entries += 2
+
+            for module in range(_MODULES):
+                name = 'test_module%d.py' % module
+                open(os.path.join(subpackage, name), 'w').close()
+
+            for other in range(_OTHER_FILES):
+                name = 'data%d.txt' % other
+                open(os.path.join(subpackage, name), 'w').close()
+
+            entries += _MODULES + _OTHER_FILES
+
+    return entries
+
+class LegacyPackage(Package):
+    def walk(self, scanner=None):
+        for name in os.listdir(self.path):
+            path = os.path.join(self.path, name)
+            child = None
+
+            match = _TEST_PACKAGE_PATTERN.match(name)
+            if match:
+                if os.path.isdir(path) and \
+                   os.path.isfile(os.path.join(path, '__init__.py')):
+                    child = LegacyPackage(self.base, path, match, self)
+                    for child_alias, child_iterable in child.walk():
+                        self.content[child_alias] = child_iterable
+                        yield child_alias, child_iterable
+
+                    self.packages.append(child)
+            else:
+                match = _TEST_MODULE_PATTERN.match(name)
+                if match and os.path.isfile(path):
+                    child = Importable(self.base, path, match, self)
+                    self.modules.append(child)
+
+            if child:
+                child_alias = child.str_alias()
+
+                self.content[child_alias] = child
+                yield child_alias, child
+
+def legacy_walk(path):
+    package = LegacyPackage(tuple(), path)
+    return len(dict(package.walk()))
+
+def scandir_walk(path):
+    return len(walk(path).content)
+
+def listdir_walk(path):
+    scandir = distcovery.path._scandir
+    distcovery.path._scandir = None
+    try:
+        return len(walk(path).content)
+    finally:
+        distcovery.path._scandir = scandir
+
+class SyscallCounter(object):
+    def __init__(self):
+        self.calls = {'stat': 0, 'listdir': 0, 'scandir': 0}
+
+    def wrap(self, name, function):
+        def counting(*args, **kwargs):
+            self.calls[name] += 1
+            return function(*args, **kwargs)
+
+        return counting
+
+    def __enter__(self):
+        self.__stat = os.stat
+        self.__listdir = os.listdir
+        self.__scandir = distcovery.path._scandir
+
+        os.stat = self.wrap('stat', os.stat)
+        os.listdir = self.wrap('listdir', os.listdir)
+        if self.__scandir is not None:
+            distcovery.path._scandir = self.wrap('scandir', self.__scandir)
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        distcovery.path._scandir = self.__scandir
+        os.listdir = self.__listdir
+        os.stat = self.__stat
+
+def setUpModule():
+    _tree['current'] = os.getcwd()
+    _tree['root'] = tempfile.mkdtemp()
+    _tree['entries'] = build_tree(_tree['root'])
+    os.chdir(_tree['root'])
+
+def tearDownModule():
+    os.chdir(_tree.pop('current'))
+    shutil.rmtree(_tree.pop('root'))
+
+def bench_legacy():
+    legacy_walk('.')
+
+def bench_listdir():
+    listdir_walk('.')
+
+def bench_scandir():
+    scandir_walk('.')
+
+def measure(function, path):
+    with SyscallCounter() as counter:
+        found = function(path)
+
+    best = None
+    for attempt in range(_REPEAT):
+        start = time.time()
+        function(path)
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+
+    return found, counter.calls, best
+
+def main():
+    setUpModule()
+    try:
+        sys.stdout.write('Synthetic tree: %d entries\n\n' % _tree['entries'])
+        sys.stdout.write('%-10s %8s %8s %8s %8s %10s\n' % \
+                         ('method', 'found', 'stat', 'listdir', 'scandir',
+                          'best, s'))
+
+        methods = [('legacy', legacy_walk), ('listdir', listdir_walk)]
+        if distcovery.path._scandir is not None:
+            methods.append(('scandir', scandir_walk))
+
+        for name, function in methods:
+            found, calls, best = measure(function, '.')
+            sys.stdout.write('%-10s %8d %8d %8d %8d %10.4f\n' % \
+                             (name, found, calls['stat'], calls['listdir'],
+                              calls['scandir'], best))
+    finally:
+        tearDownModule()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+import os
+import subprocess
+
+from distcovery.exceptions import ChangedFilesException
+
+def _read_lines(data):
+    return set(line.strip() for line in data.splitlines() if line.strip())
+
+def changed_files(since):
+    if os.path.isfile(since):
+        with open(since) as stream:
+            return _read_lines(stream.read())
+
+    try:
+        process = subprocess.Popen(['git', 'diff', '--name-only', since],
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE)
+        output, error = process.communicate()
+    except OSError as error:
+        raise ChangedFilesException(since, str(error))
+
+    if process.returncode:
+        raise ChangedFilesException(since, error.strip())
+
+    return _read_lines(output)
+
+def _suffixes(paths):
+    suffixes = set()
+    for path in paths:
+        parts = path.replace(os.sep, '/').split('/')
+        for index in range(len(parts)):
+            suffixes.add('/'.join(parts[index:]))
+
+    return suffixes
+
+def relative_path(path, bases):
+    path = os.path.abspath(path)
+    for base in bases:
+        if not base:
+            continue
+
+        base = os.path.join(os.path.abspath(base), '')
+        if path.startswith(base):
+            path = path[len(base):]
+            break
+
+    return path.replace(os.sep, '/')
+
+class Dependencies(object):
+    def __init__(self, files=None):
+        self.files = dict(files) if files else {}
+        self.changed = False
+
+    def update(self, alias, files):
+        files = sorted(set(files))
+        if self.files.get(alias) != files:
+            self.files[alias] = files
+            self.changed = True
+
+    def affected(self, aliases, changed):
+        suffixes = _suffixes(changed)
+
+        selected = []
+        for alias in aliases:
+            files = self.files.get(alias)
+            if files is None or not suffixes.isdisjoint(files):
+                selected.append(alias)
+
+        return selected
@@ -0,0 +1,260 @@
+import os
+import sys
+import inspect
+import timeit
+
+from distutils import log
+from distutils.cmd import Command
+
+from distcovery.exceptions import NoBenchmarkModulesException, \
+                                  UnknownModulesException, \
+                                  InvalidOptionValue, \
+                                  BenchmarksRegressedException
+from distcovery.path import walk, Package
+from distcovery.cache import Cache
+
+_DEFAULT_ROOT = 'benchmarks'
+_DEFAULT_PREFIX = 'bench_'
+_DEFAULT_CACHE_DIR = '.distcovery'
+_DEFAULT_WARMUP = 1
+_DEFAULT_REPEAT = 5
+_DEFAULT_MIN_TIME = 0.1
+_DEFAULT_THRESHOLD = 10.0
+_BASELINE_CACHE_NAME = 'baseline'
+
+_SET_UP_MODULE = 'setUpModule'
+_TEAR_DOWN_MODULE = 'tearDownModule'
+
+_TIME_UNITS = ((1.0, 's'), (1e-3, 'ms'), (1e-6, 'us'), (1e-9, 'ns'))
+_REPORT_LINE = '%10s %10s %14s %8s  %s'
+
+def percentile(values, fraction):
+    values = sorted(values)
+    position = (len(values) - 1)*fraction
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower])*(position - lower)
+
+def summarize(samples):
+    median = percentile(samples, 0.5)
+    return {'median': median,
+            'iqr': percentile(samples, 0.75) - percentile(samples, 0.25),
+            'ops': 1.0/median if median > 0.0 else None}
+
+def time_calls(function, number, timer=timeit.default_timer):
+    start = timer()
+    for index in xrange(number):
+        function()
+
+    return timer() - start
+
+def calibrate(function, min_time, timer=timeit.default_timer):
+    number = 1
+    while time_calls(function, number, timer) < min_time:
+        number *= 10
+
+    return number
+
+def measure(function, warmup, repeat, min_time, timer=timeit.default_timer):
+    number = calibrate(function, min_time, timer)
+    for index in range(warmup):
+        time_calls(function, number, timer)
+
+    samples = [time_calls(function, number, timer)/number \
+               for index in range(repeat)]
+
+    result = summarize(samples)
+    result['number'] = number
+    return result
+
+def format_time(seconds):
+    for scale, unit in _TIME_UNITS:
+        if seconds >= scale:
+            break
+
+    return '%.3f%s' % (seconds/scale, unit)
+
+def regressed(result, baseline, threshold):
+    return result['median'] > baseline['median']*(1.0 + threshold/100.0)
+
+class Bench(Command):
+    description = 'run benchmarks for the package'
+
+    user_options = [('module=', 'm', 'set of benchmark modules to run ' \
+                                     '(several modules can be listed ' \
+                                     'using comma)'),
+                    ('root=', None, 'directory with benchmark modules ' \
+                                    '(default: %s)' % _DEFAULT_ROOT),
+                    ('prefix=', None, 'name prefix of benchmark modules, ' \
+                                      'packages and functions ' \
+                                      '(default: %s)' % _DEFAULT_PREFIX),
+                    ('warmup=', None, 'number of untimed samples before ' \
+                                      'measurement (default: %d)' % \
+                                      _DEFAULT_WARMUP),
+                    ('repeat=', None, 'number of timed samples ' \
+                                      '(default: %d)' % _DEFAULT_REPEAT),
+                    ('min-time=', None, 'minimal duration of a sample in ' \
+                                        'seconds (default: %g)' % \
+                                        _DEFAULT_MIN_TIME),
+                    ('threshold=', None, 'percentage by which median time ' \
+                                         'may exceed the baseline ' \
+                                         '(default: %g)' % \
+                                         _DEFAULT_THRESHOLD),
+                    ('cache-dir=', None, 'directory to keep the baseline ' \
+                                         '(default: %s)' % \
+                                         _DEFAULT_CACHE_DIR),
+                    ('save-baseline', None, 'replace the baseline with ' \
+                                            'results of the run')]
+
+    boolean_options = ['save-baseline']
+
+    def initialize_options(self):
+        self.module = None
+        self.root = None
+        self.prefix = None
+        self.warmup = None
+        self.repeat = None
+        self.min_time = None
+        self.threshold = None
+        self.cache_dir = None
+        self.save_baseline = None
+
+    def ensure_number(self, option, convert, minimum, expected):
+        value = getattr(self, option)
+        try:
+            number = convert(value)
+        except (TypeError, ValueError):
+            number = None
+
+        if number is None or number < minimum:
+            raise InvalidOptionValue(option, value, expected)
+
+        setattr(self, option, number)
+
+    def finalize_options(self):
+        if self.root is None:
+            self.root = _DEFAULT_ROOT
+
+        if self.prefix is None:
+            self.prefix = _DEFAULT_PREFIX
+
+        if self.cache_dir is None:
+            self.cache_dir = _DEFAULT_CACHE_DIR
+
+        if self.warmup is None:
+            self.warmup = _DEFAULT_WARMUP
+
+        if self.repeat is None:
+            self.repeat = _DEFAULT_REPEAT
+
+        if self.min_time is None:
+            self.min_time = _DEFAULT_MIN_TIME
+
+        if self.threshold is None:
+            self.threshold = _DEFAULT_THRESHOLD
+
+        self.ensure_number('warmup', int, 0, 'non-negative integer')
+        self.ensure_number('repeat', int, 1, 'positive integer')
+        self.ensure_number('min_time', float, 0.0, 'non-negative number')
+        self.ensure_number('threshold', float, 0.0, 'non-negative number')
+
+    def collect_benchmarks(self):
+        package = walk(self.root, prefix=self.prefix)
+        if not package.content:
+            raise NoBenchmarkModulesException(self.root, self.prefix)
+
+        return package
+
+    def select_modules(self, package):
+        if not self.module:
+            aliases = package.content.keys()
+        else:
+            aliases = [alias.strip() for alias in self.module.split(',')]
+            unknown = [alias for alias in aliases \
+                       if alias not in package.content]
+            if unknown:
+                raise UnknownModulesException(unknown)
+
+        modules = set()
+        for alias in aliases:
+            importable = package.content[alias]
+            if isinstance(importable, Package):
+                modules.update(child for child, item \
+                               in importable.content.iteritems() \
+                               if not isinstance(item, Package))
+            else:
+                modules.add(alias)
+
+        return sorted((alias, package.content[alias]) for alias in modules)
+
+    def find_benchmarks(self, module):
+        return sorted((name, item) \
+                      for name, item in module.__dict__.iteritems() \
+                      if name.startswith(self.prefix) and \
+                         inspect.isfunction(item) and \
+                         item.__module__ == module.__name__)
+
+    def run_module(self, alias, importable):
+        name = importable.join_sequence(importable.name)
+        __import__(name)
+        module = sys.modules[name]
+
+        set_up = getattr(module, _SET_UP_MODULE, None)
+        if set_up is not None:
+            set_up()
+
+        try:
+            for name, function in self.find_benchmarks(module):
+                yield '%s:%s' % (alias, name), \
+                      measure(function, self.warmup, self.repeat,
+                              self.min_time)
+        finally:
+            tear_down = getattr(module, _TEAR_DOWN_MODULE, None)
+            if tear_down is not None:
+                tear_down()
+
+    def report(self, key, result, baseline):
+        if baseline is None:
+            change = 'new'
+        else:
+            change = '%+.1f%%' % \
+                     ((result['median']/baseline['median'] - 1.0)*100.0)
+
+        ops = '%.1f' % result['ops'] if result['ops'] else '-'
+        log.info(_REPORT_LINE, format_time(result['median']),
+                 format_time(result['iqr']), ops, change, key)
+
+    def run(self):
+        package = self.collect_benchmarks()
+        selection = self.select_modules(package)
+
+        cache = Cache(self.cache_dir)
+        baseline = cache.load(_BASELINE_CACHE_NAME, {})
+
+        changed = False
+        regressions = []
+
+        log.info(_REPORT_LINE, 'median', 'IQR', 'ops/sec', 'change',
+                 'benchmark')
+        root = os.path.abspath(self.root)
+        sys.path.insert(0, root)
+        try:
+            for alias, importable in selection:
+                for key, result in self.run_module(alias, importable):
+                    previous = baseline.get(key)
+                    self.report(key, result, previous)
+
+                    if previous is None or self.save_baseline:
+                        baseline[key] = result
+                        changed = True
+                    elif regressed(result, previous, self.threshold):
+                        regressions.append(key)
+        finally:
+            if sys.path[0] == root:
+                del sys.path[0]
+
+        if changed:
+            cache.save(_BASELINE_CACHE_NAME, baseline)
+
+        if regressions:
+            raise BenchmarksRegressedException(regressions)
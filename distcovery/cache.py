@@ -0,0 +1,31 @@
+import os
+import errno
+import json
+
+class Cache(object):
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def load(self, name, default=None):
+        try:
+            with open(self.path(name)) as stream:
+                return json.load(stream)
+        except (IOError, ValueError):
+            return default
+
+    def save(self, name, value):
+        try:
+            os.makedirs(self.directory)
+        except OSError as error:
+            if error.errno != errno.EEXIST:
+                raise
+
+        path = self.path(name)
+        temporary = '%s.%d' % (path, os.getpid())
+        with open(temporary, 'w') as stream:
+            json.dump(value, stream)
+
+        os.rename(temporary, path)
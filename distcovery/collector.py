@@ -0,0 +1,102 @@
+import os
+import ast
+import unittest
+
+_TEST_METHOD_PREFIX = unittest.TestLoader.testMethodPrefix
+_TEST_CASE_SUFFIX = 'TestCase'
+_DEFAULT_METHOD = 'runTest'
+
+def _base_name(node):
+    if isinstance(node, ast.Name):
+        return node.id
+
+    if isinstance(node, ast.Attribute):
+        return node.attr
+
+    return None
+
+def _methods(node):
+    return set(item.name for item in node.body \
+               if isinstance(item, ast.FunctionDef))
+
+def _lineage(classes, name, visited):
+    visited.add(name)
+    bases, methods = classes[name]
+
+    is_case = False
+    methods = set(methods)
+    for base in bases:
+        if base in classes and base not in visited:
+            base_case, base_methods = _lineage(classes, base, visited)
+            is_case = is_case or base_case
+            methods.update(base_methods)
+        elif base and base.endswith(_TEST_CASE_SUFFIX):
+            is_case = True
+
+    return is_case, methods
+
+def parse_tests(path):
+    with open(path) as stream:
+        tree = ast.parse(stream.read(), path)
+
+    classes = {}
+    order = []
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef):
+            classes[node.name] = ([_base_name(base) for base in node.bases],
+                                  _methods(node))
+            order.append(node.name)
+
+    tests = []
+    for name in order:
+        is_case, methods = _lineage(classes, name, set())
+        if not is_case:
+            continue
+
+        names = sorted(method for method in methods \
+                       if method.startswith(_TEST_METHOD_PREFIX))
+        if not names and _DEFAULT_METHOD in methods:
+            names = [_DEFAULT_METHOD]
+
+        if names:
+            tests.append([name, names])
+
+    return tests
+
+class Collector(object):
+    def __init__(self, files=None):
+        self.files = files if files else {}
+        self.changed = False
+
+    def tests(self, path):
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return []
+
+        record = self.files.get(path)
+        if not record or record[0] != mtime:
+            try:
+                tests = parse_tests(path)
+            except (IOError, SyntaxError):
+                tests = []
+
+            record = [mtime, tests]
+            self.files[path] = record
+            self.changed = True
+
+        return record[1]
+
+    def contains(self, path, case, method=None):
+        for name, methods in self.tests(path):
+            if name == case:
+                return not method or method in methods
+
+        return False
+
+    def prune(self, paths):
+        paths = set(paths)
+        for path in list(self.files):
+            if path not in paths:
+                del self.files[path]
+                self.changed = True
@@ -3,6 +3,7 @@ import os
 import sys
 
 from distutils import log
+from multiprocessing.util import Finalize
 
 class _DummyCoverage(object):
     def __init__(self, *args, **kwargs):
@@ -17,11 +18,25 @@ class _DummyCoverage(object):
     def report(self, *args, **kwargs):
         pass
 
+    def erase(self, *args, **kwargs):
+        pass
+
+    def save(self, *args, **kwargs):
+        pass
+
+    def combine(self, *args, **kwargs):
+        pass
+
 _NO_COVERAGE_PACKAGE_WARNING = 'Couldn\'t import coverage with error "%s". ' \
                                'Skipping coverage calculations...'
+_NO_JSON_REPORT_WARNING = 'Installed coverage can\'t write JSON reports. ' \
+                          'Skipping JSON report...'
+_NO_CONTEXTS_WARNING = 'Installed coverage doesn\'t support contexts. ' \
+                       'Restarting coverage for every test module...'
 
 class Coverage(object):
-    def __init__(self, disabled, path, distribution):
+    def __init__(self, disabled, path, distribution, parallel=False,
+                 include=None, session=False, optional_session=False):
         if disabled:
             coverage = _DummyCoverage
         else:
@@ -32,10 +47,39 @@ class Coverage(object):
                 coverage = _DummyCoverage
 
         self.__path = path
+        self.__parallel = parallel
+        self.__include = include
 
         self.__available = coverage is not _DummyCoverage
-        source = list(self.__get_source(distribution))
-        self.__coverage = coverage(source=source)
+        self.__combined = False
+        self.__factory = coverage
+        self.__source = list(self.__get_source(distribution))
+        self.__coverage = self.__create()
+
+        # Optional session is used when contexts are supported, only explicit
+        # one warns when they aren't
+        self.session = (session or optional_session) and \
+                       hasattr(self.__coverage, 'switch_context')
+        if session and self.__available and not self.session:
+            log.warn(_NO_CONTEXTS_WARNING)
+
+        if self.__parallel:
+            self.__coverage.erase()
+
+    def __create(self, suffix=True):
+        if self.__include is not None:
+            options = {'include': self.__include}
+        else:
+            options = {'source': self.__source}
+
+        if self.__parallel and suffix:
+            options['data_suffix'] = True
+
+        return self.__factory(**options)
+
+    @property
+    def available(self):
+        return self.__available
 
     def __get_source(self, distribution):
         if not self.__available:
@@ -64,9 +108,118 @@ class Coverage(object):
 
         self.__coverage.stop()
 
-    def report(self):
+    def start_worker(self):
+        # Forked worker inherits running tracer of the parent process
+        self.__coverage.stop()
+
+        self.__coverage = self.__create()
+        self.__coverage.start()
+
+        return Finalize(None, self.stop_worker, exitpriority=16)
+
+    def stop_worker(self):
+        self.__coverage.stop()
+        self.__coverage.save()
+
+    def pause(self):
+        self.__coverage.stop()
+
+    def resume(self):
+        self.__coverage.start()
+
+    def switch_context(self, name):
+        if self.session:
+            self.__coverage.switch_context(name)
+
+    def context_files(self):
+        if not self.session:
+            return None
+
+        data = self.__coverage.get_data()
+
+        files = {}
+        for path in data.measured_files():
+            for contexts in data.contexts_by_lineno(path).itervalues():
+                for context in contexts:
+                    files.setdefault(context, set()).add(path)
+
+        return files
+
+    def context_lines(self):
+        if not self.session:
+            return None
+
+        data = self.__coverage.get_data()
+
+        lines = {}
+        for path in data.measured_files():
+            for line, contexts in data.contexts_by_lineno(path).iteritems():
+                for context in contexts:
+                    lines.setdefault(context, {}).setdefault(path, []). \
+                        append(line)
+
+        for files in lines.itervalues():
+            for path_lines in files.itervalues():
+                path_lines.sort()
+
+        return lines
+
+    def add_lines(self, lines):
+        if self.__available and lines:
+            self.__coverage.get_data().add_lines(lines)
+
+    def split(self):
+        # Put aside data measured so far and go on with a fresh tracer
+        if not self.__available:
+            return None
+
+        self.__coverage.stop()
+        self.__coverage.save()
+        if hasattr(self.__coverage, 'get_data'):
+            files = self.__coverage.get_data().measured_files()
+        else:
+            files = self.__coverage.data.measured_files()
+
+        self.__coverage = self.__create()
+        self.__coverage.start()
+        return files
+
+    def combine(self):
+        if self.__parallel and not self.__combined:
+            self.__coverage.save()
+
+            # Combined data goes to the default data file as with "coverage
+            # combine", instead of the file of the parent process
+            self.__coverage = self.__create(suffix=False)
+            self.__coverage.erase()
+            self.__coverage.combine()
+            self.__coverage.save()
+            self.__combined = True
+
+    def report(self, xml_file=None, json_file=None, html_directory=None):
         if self.__available:
             log.info('\nCoverage report:')
 
-        self.__coverage.report()
+        self.combine()
+
+        total = self.__coverage.report()
+        if not self.__available:
+            return None
+
+        if xml_file:
+            self.__coverage.xml_report(outfile=xml_file)
+
+        if json_file:
+            json_report = getattr(self.__coverage, 'json_report', None)
+            if json_report:
+                json_report(outfile=json_file)
+            else:
+                log.warn(_NO_JSON_REPORT_WARNING)
+
+        if html_directory:
+            # Coverage keeps hashes of reported files in the directory and
+            # skips files which source and data haven't changed
+            self.__coverage.html_report(directory=html_directory)
+
+        return total
 
@@ -0,0 +1,164 @@
+import os
+import sys
+import json
+import socket
+import traceback
+
+_STATUS_MARKER = '\0distcovery-status:'
+_BUFFER_SIZE = 4096
+
+def _source_path(path):
+    if path.endswith('.pyc') or path.endswith('.pyo'):
+        return path[:-1]
+
+    return path
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+def _is_submodule(name, packages):
+    for package in packages:
+        if name == package or name.startswith(package + '.'):
+            return True
+
+    return False
+
+def preload(names):
+    for name in names:
+        __import__(name)
+
+    modules = {}
+    for name, module in sys.modules.items():
+        path = getattr(module, '__file__', None)
+        if path and _is_submodule(name, names):
+            path = _source_path(path)
+            modules[name] = (path, _mtime(path))
+
+    return modules
+
+def _read_line(connection):
+    data = ''
+    while not data.endswith('\n'):
+        chunk = connection.recv(_BUFFER_SIZE)
+        if not chunk:
+            break
+
+        data += chunk
+
+    return data
+
+class Server(object):
+    def __init__(self, path, handler, preloaded=None, reimport=False):
+        self.path = path
+        self.handler = handler
+        self.preloaded = preloaded if preloaded else {}
+        self.reimport = reimport
+
+    def purge(self):
+        for name in self.preloaded:
+            sys.modules.pop(name, None)
+
+    def purge_stale(self):
+        for path, mtime in self.preloaded.itervalues():
+            if _mtime(path) != mtime:
+                break
+        else:
+            return False
+
+        self.purge()
+        return True
+
+    def serve_forever(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            listener.bind(self.path)
+            listener.listen(1)
+
+            while True:
+                connection, address = listener.accept()
+                try:
+                    self.handle(connection)
+                finally:
+                    connection.close()
+        finally:
+            listener.close()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+    def handle(self, connection):
+        line = _read_line(connection)
+        if not line:
+            return
+
+        request = json.loads(line)
+
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+        pid = os.fork()
+        if not pid:
+            self.run_child(connection, request)
+
+        pid, status = os.waitpid(pid, 0)
+        if os.WIFEXITED(status):
+            status = os.WEXITSTATUS(status)
+        else:
+            status = 1
+
+        connection.sendall('%s%d\n' % (_STATUS_MARKER, status))
+
+    def run_child(self, connection, request):
+        status = 1
+        try:
+            os.dup2(connection.fileno(), sys.stdout.fileno())
+            os.dup2(connection.fileno(), sys.stderr.fileno())
+
+            if self.reimport:
+                self.purge()
+            else:
+                self.purge_stale()
+
+            status = self.handler(request)
+        except:
+            traceback.print_exc()
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(status)
+
+def send_request(path, request, stream=None):
+    if stream is None:
+        stream = sys.stdout
+
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(path)
+        connection.sendall(json.dumps(request) + '\n')
+
+        data = ''
+        while True:
+            chunk = connection.recv(_BUFFER_SIZE)
+            if not chunk:
+                break
+
+            data += chunk
+            if _STATUS_MARKER not in data:
+                # Hold back a tail which may be a beginning of the marker
+                position = len(data) - len(_STATUS_MARKER)
+                if position > 0:
+                    stream.write(data[:position])
+                    data = data[position:]
+    finally:
+        connection.close()
+
+    output, marker, status = data.partition(_STATUS_MARKER)
+    stream.write(output)
+    stream.flush()
+
+    return int(status) if marker else 1
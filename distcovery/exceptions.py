@@ -1,8 +1,19 @@
+from distutils.errors import DistutilsError
+
 class DistcoveryException(Exception):
     def __init__(self, **kwargs):
         super(DistcoveryException, self). \
             __init__(self.template % kwargs)
 
+    @staticmethod
+    def stringify_list(items):
+        last = '"%s"' % items[-1]
+
+        if len(items) > 1:
+            return '"%s" and %s' % ('", "'.join(items[:-1]), last), 's'
+
+        return last, ''
+
 class NoMoreAttempts(DistcoveryException):
     template = 'Coudn\'t create unique name with %(length)d ' \
                'digit%(length_suffix)s in %(limit)d attemt%(limit_suffix)s.'
@@ -41,12 +52,59 @@ class UnknownModulesException(DistcoveryException):
         super(UnknownModulesException, self). \
             __init__(modules=modules, suffix=suffix)
 
-    @staticmethod
-    def stringify_list(items):
-        last = '"%s"' % items[-1]
+class InvalidOptionValue(DistcoveryException):
+    template = 'Invalid value "%(value)s" for option "%(option)s". ' \
+               'Expected %(expected)s.'
 
-        if len(items) > 1:
-            return '"%s" and %s' % ('", "'.join(items[:-1]), last), 's'
+    def __init__(self, option, value, expected):
+        super(InvalidOptionValue, self). \
+            __init__(option=option, value=value, expected=expected)
 
-        return last, ''
+class TestsFailedException(DistcoveryException, DistutilsError):
+    template = 'Tests failed (failures=%(failures)d, errors=%(errors)d).'
+
+    def __init__(self, failures, errors):
+        super(TestsFailedException, self). \
+            __init__(failures=failures, errors=errors)
+
+class RemoteTestsFailedException(DistcoveryException, DistutilsError):
+    template = 'Tests run by server "%(path)s" failed with status %(status)d.'
+
+    def __init__(self, path, status):
+        super(RemoteTestsFailedException, self). \
+            __init__(path=path, status=status)
+
+class UnknownTestsException(UnknownModulesException):
+    template = 'Unknown test%(suffix)s: %(modules)s.'
+
+class ChangedFilesException(DistcoveryException):
+    template = 'Couldn\'t get files changed since "%(since)s": %(error)s.'
+
+    def __init__(self, since, error):
+        super(ChangedFilesException, self). \
+            __init__(since=since, error=error)
+
+class CoverageThresholdException(DistcoveryException):
+    template = 'Total coverage %(total).2f%% is below the required ' \
+               '%(threshold).2f%%.'
+
+    def __init__(self, total, threshold):
+        super(CoverageThresholdException, self). \
+            __init__(total=total, threshold=threshold)
+
+class NoBenchmarkModulesException(DistcoveryException):
+    template = 'Couldn\'t find any benchmark module. Make sure that path ' \
+               '"%(path)s" contains any valid python module named ' \
+               '"%(prefix)s*.py" or package "%(prefix)s*".'
+
+    def __init__(self, path, prefix):
+        super(NoBenchmarkModulesException, self). \
+            __init__(path=path, prefix=prefix)
+
+class BenchmarksRegressedException(DistcoveryException):
+    template = 'Regressed benchmark%(suffix)s: %(benchmarks)s.'
 
+    def __init__(self, benchmarks):
+        benchmarks, suffix = self.stringify_list(benchmarks)
+        super(BenchmarksRegressedException, self). \
+            __init__(benchmarks=benchmarks, suffix=suffix)
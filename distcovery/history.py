@@ -0,0 +1,77 @@
+import sys
+import time
+
+_SHORTEST = 'shortest'
+_LONGEST = 'longest'
+
+ORDERS = (_SHORTEST, _LONGEST)
+
+class History(object):
+    def __init__(self, durations=None):
+        self.durations = dict(durations) if durations else {}
+        self.changed = False
+
+    def estimate(self, alias):
+        if alias in self.durations:
+            return self.durations[alias]
+
+        if self.durations:
+            return sum(self.durations.itervalues())/len(self.durations)
+
+        return 0.0
+
+    def update(self, durations):
+        for alias, duration in durations.iteritems():
+            if self.durations.get(alias) != duration:
+                self.durations[alias] = duration
+                self.changed = True
+
+    def order(self, aliases, order):
+        if order == _LONGEST:
+            key = lambda alias: (-self.estimate(alias), alias)
+        else:
+            key = lambda alias: (self.estimate(alias), alias)
+
+        return sorted(aliases, key=key)
+
+    def partition(self, aliases, count):
+        if self.durations:
+            weight = self.estimate
+        else:
+            weight = lambda alias: 1.0
+
+        loads = [0.0]*count
+        shards = [[] for index in range(count)]
+        key = lambda alias: (-weight(alias), alias)
+        for alias in sorted(aliases, key=key):
+            index = loads.index(min(loads))
+            shards[index].append(alias)
+            loads[index] += weight(alias)
+
+        return shards
+
+def _format_time(seconds):
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    return '%d:%02d' % (minutes, seconds)
+
+class Progress(object):
+    def __init__(self, estimates, jobs=1, stream=None):
+        self.remaining = dict(estimates)
+        self.total = len(self.remaining)
+        self.done = 0
+        self.jobs = jobs
+        self.stream = stream if stream else sys.stderr
+        self.start = time.time()
+
+    def eta(self):
+        return sum(self.remaining.itervalues())/self.jobs
+
+    def update(self, name):
+        self.remaining.pop(name, None)
+        self.done += 1
+
+        self.stream.write('[%d/%d] %s done, elapsed %s, ETA %s\n' % \
+                          (self.done, self.total, name,
+                           _format_time(time.time() - self.start),
+                           _format_time(self.eta())))
+        self.stream.flush()
@@ -1,35 +1,112 @@
-import random
 import sys
+import hashlib
 import imp
-import re
 import inspect
+import traceback
 import unittest
 
 from distcovery.exceptions import NoMoreAttempts
 from distcovery.path import Package
-
-_MODULE_NAME_PREFIX = 'TestModule'
-_IMPORT_MODULE_LINE = 'import %%s as %s%%d\n' % _MODULE_NAME_PREFIX
-_MODULE_NAME_REGEX = '%s\\d+$' % _MODULE_NAME_PREFIX
-_MODULE_NAME_PATTERN = re.compile(_MODULE_NAME_REGEX)
+from distcovery.timing import import_module
 
 _CASE_NAME_PREFIX = 'TestCase'
 _CASE_NAME_TEMPLATE = '%s%%d' % _CASE_NAME_PREFIX
 
-def _enumerate_testmodules(global_section):
-    for name, item in global_section.iteritems():
-        if isinstance(item, type(sys)) and _MODULE_NAME_PATTERN.match(name):
+def _enumerate_testcases(module):
+    for item in module.__dict__.itervalues():
+        if inspect.isclass(item) and issubclass(item, unittest.TestCase):
             yield item
 
-def _enumerate_testcases(global_section):
-    index = 0
-    for module in _enumerate_testmodules(global_section):
-        for item in module.__dict__.itervalues():
-            if inspect.isclass(item) and issubclass(item, unittest.TestCase):
-                index += 1
-                yield _CASE_NAME_TEMPLATE % index, item
+def find_testcases(module, name):
+    item = getattr(module, name, None)
+    if inspect.isclass(item) and issubclass(item, unittest.TestCase):
+        return [name]
+
+    names = []
+    for key, item in module.__dict__.iteritems():
+        if inspect.isclass(item) and issubclass(item, unittest.TestCase) and \
+           item.__name__ == name:
+            names.append(key)
+
+    return sorted(names)
+
+class _ImportFailure(unittest.TestCase):
+    def __init__(self, name, trace):
+        super(_ImportFailure, self).__init__()
+
+        self.name = name
+        self.trace = trace
+
+    def runTest(self):
+        raise ImportError('Failed to import test module %s:\n%s' % \
+                          (self.name, self.trace))
+
+    def id(self):
+        return self.name
+
+    def __str__(self):
+        return 'runTest (%s)' % self.name
+
+class LazyModuleSuite(unittest.TestSuite):
+    def __init__(self, name, loader=None, timings=None):
+        super(LazyModuleSuite, self).__init__()
+
+        self.name = name
+        self.loader = loader if loader else unittest.defaultTestLoader
+        self.timings = timings
+        self.loaded = False
+
+    def load(self):
+        if self.loaded:
+            return
+
+        self.loaded = True
+        try:
+            module = import_module(self.name, self.timings)
+            tests = self.loader.loadTestsFromModule(module)
+        except:
+            tests = [_ImportFailure(self.name, traceback.format_exc())]
+
+        self.addTests(tests)
+
+    def __iter__(self):
+        self.load()
+        return super(LazyModuleSuite, self).__iter__()
 
-class RandomUniqueNames(object):
+    def countTestCases(self):
+        self.load()
+        return super(LazyModuleSuite, self).countTestCases()
+
+    def run(self, result, *args, **kwargs):
+        self.load()
+        try:
+            return super(LazyModuleSuite, self).run(result, *args, **kwargs)
+        finally:
+            # Drop finished tests to let their module go out of memory
+            self._tests = []
+
+def load_tests_from_names(names, loader=None):
+    if loader is None:
+        loader = unittest.defaultTestLoader
+
+    suite = unittest.TestSuite()
+    for name in names:
+        try:
+            suite.addTest(loader.loadTestsFromName(name))
+        except:
+            suite.addTest(_ImportFailure(name, traceback.format_exc()))
+
+    return suite
+
+def _lazy_load_tests(names, timings=None):
+    def load_tests(loader, tests, pattern):
+        tests.addTests(LazyModuleSuite(name, loader, timings) \
+                       for name in names)
+        return tests
+
+    return load_tests
+
+class UniqueNames(object):
     def __init__(self, limit=10, length=15):
         self.__limit = int(limit) if limit > 1 else 1
         self.__length = int(length) if length > 1 else 1
@@ -37,48 +114,52 @@ class RandomUniqueNames(object):
         self.__format = 'X_%%0%dd' % self.__length
         self.__names = set()
 
-    def random_name(self):
-        return self.__format % int(random.random()*self.__factor)
+    def hashed_name(self, key, attempt=0):
+        digest = hashlib.sha1('%d:%s' % (attempt, key)).hexdigest()
+        return self.__format % (int(digest, 16) % self.__factor)
 
-    def new(self):
-        limit = self.__limit
-        name = self.random_name()
-        while name in self.__names:
-            limit -= 1
-            if limit <= 0:
-                raise NoMoreAttempts(self.__limit, self.__length)
+    def new(self, key):
+        for attempt in range(self.__limit):
+            name = self.hashed_name(key, attempt)
+            if name not in self.__names:
+                self.__names.add(name)
+                return name
 
-            name = self.random_name()
-
-        self.__names.add(name)
-        return name
+        raise NoMoreAttempts(self.__limit, self.__length)
 
 class Importer(object):
-    def __init__(self, package):
-        self.random_unique_names = RandomUniqueNames()
+    def __init__(self, package, lazy=False, timings=None):
+        self.unique_names = UniqueNames()
+        self.lazy = lazy
+        self.timings = timings
 
         self.aliases = {}
-        self.sources = {}
+        self.children = {}
+        self.testcases = {}
 
         self.build_module(None, package)
 
     def build_module(self, alias, package):
-        name = self.random_unique_names.new()
+        name = self.unique_names.new(package.str_name())
 
         self.aliases[alias] = name
-        self.sources[name] = ''
+        self.children[name] = sorted(importable.str_name() \
+                                     for importable in \
+                                         package.content.itervalues() \
+                                     if not isinstance(importable, Package))
+
+        for child in package.packages:
+            self.build_module(child.str_alias(), child)
 
-        counter = 0
-        for alias, importable in package.content.iteritems():
-            if isinstance(importable, Package):
-                self.build_module(alias, importable)
-            else:
-                counter += 1
-                self.sources[name] += _IMPORT_MODULE_LINE % \
-                                      (importable.str_name(), counter)
+    def get_testcases(self, name):
+        if name not in self.testcases:
+            module = import_module(name, self.timings)
+            self.testcases[name] = list(_enumerate_testcases(module))
+
+        return self.testcases[name]
 
     def find_module(self, fullname, path=None):
-        if fullname in self.sources:
+        if fullname in self.children:
             return self
 
     def load_module(self, fullname):
@@ -91,16 +172,22 @@ class Importer(object):
         module.__loader__ = self
         module.__package__ = fullname
 
-        code = self.sources[fullname]
+        children = self.children[fullname]
 
         sys.modules[fullname] = module
+        if self.lazy:
+            module.load_tests = _lazy_load_tests(children, self.timings)
+            return module
+
         try:
-            exec(code, module.__dict__)
+            index = 0
+            for name in children:
+                for testcase in self.get_testcases(name):
+                    index += 1
+                    setattr(module, _CASE_NAME_TEMPLATE % index, testcase)
         except:
             del sys.modules[fullname]
             raise
 
-        module.__dict__.update(list(_enumerate_testcases(module.__dict__)))
-
         return module
 
@@ -0,0 +1,146 @@
+import os
+import sys
+import time
+import signal
+import traceback
+import unittest
+import multiprocessing
+
+from StringIO import StringIO
+
+from distcovery.result import ModuleResult, Summary
+from distcovery.timing import Timer, Timings, TimingResult
+from distcovery.rerun import ExcludingLoader
+from distcovery.writers import ResultRecorder, make_record
+from distcovery.profiling import Profiler
+
+_finalizer = None
+_tracer = None
+
+def run_module(name, verbosity, timed=False, exclude=None, failfast=False,
+               recorded=False):
+    stream = StringIO()
+    module_result = ModuleResult(name)
+    if timed:
+        module_result.timings = Timings()
+
+    if exclude:
+        loader = ExcludingLoader(exclude)
+    else:
+        loader = unittest.defaultTestLoader
+
+    timer = Timer()
+    try:
+        with timer:
+            suite = loader.loadTestsFromName(name)
+    except:
+        trace = traceback.format_exc()
+        module_result.add_error(name, trace, name)
+        if recorded:
+            module_result.records.append(make_record(name, 'error',
+                                                     timer.wall, trace))
+    else:
+        writer = unittest.runner._WritelnDecorator(stream)
+        if timed:
+            module_result.timings.add_module(name, timer)
+            result = TimingResult(module_result.timings, writer, True,
+                                  verbosity)
+        else:
+            result = unittest.TextTestResult(writer, True, verbosity)
+
+        result.failfast = failfast
+        if recorded:
+            ResultRecorder(module_result.records.append).attach(result)
+
+        suite(result)
+        module_result.update(result)
+
+    module_result.output = stream.getvalue()
+    return module_result
+
+def _run_traced(arguments, measured):
+    if _tracer is None:
+        return run_module(*arguments)
+
+    if measured:
+        _tracer.switch_context(arguments[0])
+        return run_module(*arguments)
+
+    _tracer.pause()
+    try:
+        return run_module(*arguments)
+    finally:
+        _tracer.resume()
+
+def _run_module(arguments):
+    arguments, measured, profile = arguments[:-2], arguments[-2], \
+                                   arguments[-1]
+    if profile is None:
+        return _run_traced(arguments, measured)
+
+    profiler = Profiler().start()
+    try:
+        return _run_traced(arguments, measured)
+    finally:
+        profiler.stop(profile)
+
+def _terminate_worker(signum, frame):
+    # Pool.terminate kills workers with SIGTERM which skips finalizers
+    if _finalizer:
+        _finalizer()
+
+    os._exit(1)
+
+def _initialize_worker(initializer, tracer=None):
+    global _finalizer, _tracer
+
+    _tracer = tracer
+    signal.signal(signal.SIGTERM, _terminate_worker)
+    if initializer:
+        _finalizer = initializer()
+
+def run_modules(names, jobs, verbosity, stream=None, initializer=None,
+                timed=False, progress=None, exclude=None, max_failures=None,
+                write=None, tracer=None, measured=None, isolate=False,
+                profiles=None):
+    if stream is None:
+        stream = sys.stderr
+
+    summary = Summary()
+    start = time.time()
+
+    # Isolated worker runs a single module and exits returning its memory,
+    # the pool forks a fresh one from the parent for the next module
+    pool = multiprocessing.Pool(jobs, _initialize_worker,
+                                (initializer, tracer), 1 if isolate else None)
+    try:
+        tasks = [(name, verbosity, timed, exclude, max_failures == 1,
+                  write is not None, measured is None or name in measured,
+                  profiles.get(name) if profiles else None) \
+                 for name in names]
+        for module_result in pool.imap_unordered(_run_module, tasks):
+            stream.write(module_result.output)
+            if write:
+                for record in module_result.records:
+                    write(record)
+
+            summary.add(module_result)
+            if progress:
+                progress(module_result.name)
+
+            if summary.reached(max_failures):
+                summary.stopped = True
+                break
+    except:
+        pool.terminate()
+        raise
+    else:
+        if summary.stopped:
+            pool.terminate()
+        else:
+            pool.close()
+    finally:
+        pool.join()
+
+    summary.print_report(stream, time.time() - start)
+    return summary
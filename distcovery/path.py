@@ -12,13 +12,116 @@ _TEST_ALIAS = 2
 
 _TEST_PACKAGE_PATTERN = re.compile('%s$' % _TEST_PACKAGE_REGEX)
 _TEST_MODULE_PATTERN = re.compile('%s$' % _TEST_MODULE_REGEX)
+_TEST_PATTERNS = (_TEST_PACKAGE_PATTERN, _TEST_MODULE_PATTERN)
 
-def _is_package(path):
-    return os.path.isdir(path) and \
-           os.path.isfile(os.path.join(path, '__init__.py'))
+try:
+    from os import scandir as _scandir
+except ImportError:
+    try:
+        from scandir import scandir as _scandir
+    except ImportError:
+        _scandir = None
 
-def _is_module(path):
-    return os.path.isfile(path)
+class _Entry(object):
+    __slots__ = ('path', 'name')
+
+    def __init__(self, path, name):
+        self.path = path
+        self.name = name
+
+    def is_dir(self):
+        return os.path.isdir(self.path)
+
+    def is_file(self):
+        return os.path.isfile(self.path)
+
+def _listdir(path):
+    if _scandir is None:
+        # Plain concatenation is much cheaper than os.path.join for every name
+        prefix = path + os.sep
+        return [_Entry(prefix + name, name) for name in os.listdir(path)]
+
+    return _scandir(path)
+
+def patterns(prefix):
+    if prefix == _TEST_UNIT_PREFIX:
+        return _TEST_PATTERNS
+
+    regex = '(%s%s)' % (re.escape(prefix), _PYTHON_TOKEN_REGEX)
+    return re.compile('%s$' % regex), re.compile('%s\\.py$' % regex)
+
+def _scan(path, patterns=_TEST_PATTERNS):
+    package_pattern, module_pattern = patterns
+    is_package = False
+
+    modules = []
+    directories = []
+    for entry in _listdir(path):
+        name = entry.name
+        if name == '__init__.py':
+            # Listing is enough, checking the type would cost a stat per
+            # directory without scandir
+            is_package = True
+        elif package_pattern.match(name):
+            if entry.is_dir():
+                directories.append(name)
+        elif module_pattern.match(name):
+            # Without scandir a module is taken from its name as a package
+            # is, a stat for every module would cost more than the whole
+            # listing
+            if _scandir is None or entry.is_file():
+                modules.append(name)
+
+    return is_package, modules, directories
+
+class Scanner(object):
+    def __init__(self, patterns=_TEST_PATTERNS):
+        self.patterns = patterns
+        self.visited = {}
+
+    def read(self, path):
+        return [None] + list(_scan(path, self.patterns))
+
+    def scan(self, path):
+        if path not in self.visited:
+            self.visited[path] = self.read(path)
+
+        return self.visited[path]
+
+    def entries(self, path):
+        mtime, is_package, modules, directories = self.scan(path)
+        package_pattern, module_pattern = self.patterns
+
+        for name in directories:
+            child = os.path.join(path, name)
+            if self.scan(child)[1]:
+                yield child, package_pattern.match(name), True
+
+        for name in modules:
+            yield os.path.join(path, name), module_pattern.match(name), False
+
+class Index(Scanner):
+    def __init__(self, directories=None):
+        super(Index, self).__init__()
+
+        self.directories = directories if directories else {}
+        self.changed = False
+
+    def read(self, path):
+        mtime = os.path.getmtime(path)
+        record = self.directories.get(path)
+        if not record or record[0] != mtime:
+            record = [mtime] + list(_scan(path, self.patterns))
+            self.changed = True
+
+        return record
+
+    def commit(self):
+        if set(self.visited) != set(self.directories):
+            self.changed = True
+
+        self.directories = self.visited
+        self.visited = {}
 
 class Importable(object):
     def __init__(self, base, path, match=None, parent=None):
@@ -50,34 +153,26 @@ class Package(Importable):
         self.packages = []
         self.content = {}
 
-    def listdir(self):
-        for name in os.listdir(self.path):
-            yield os.path.join(self.path, name), name
-
-    def walk(self):
-        for path, name in self.listdir():
-            child = None
+    def walk(self, scanner=None):
+        if scanner is None:
+            scanner = Scanner()
 
-            match = _TEST_PACKAGE_PATTERN.match(name)
-            if match:
-                if _is_package(path):
-                    child = Package(self.base, path, match, self)
-                    for child_alias, child_iterable in child.walk():
-                        self.content[child_alias] = child_iterable
-                        yield child_alias, child_iterable
+        for path, match, is_package in scanner.entries(self.path):
+            if is_package:
+                child = Package(self.base, path, match, self)
+                for child_alias, child_iterable in child.walk(scanner):
+                    self.content[child_alias] = child_iterable
+                    yield child_alias, child_iterable
 
-                    self.packages.append(child)
+                self.packages.append(child)
             else:
-                match = _TEST_MODULE_PATTERN.match(name)
-                if match and _is_module(path):
-                    child = Importable(self.base, path, match, self)
-                    self.modules.append(child)
+                child = Importable(self.base, path, match, self)
+                self.modules.append(child)
 
-            if child:
-                child_alias = child.str_alias()
+            child_alias = child.str_alias()
 
-                self.content[child_alias] = child
-                yield child_alias, child
+            self.content[child_alias] = child
+            yield child_alias, child
 
     def enumerate(self, level=1):
         for module in self.modules:
@@ -101,8 +196,16 @@ def _split_path(path, root):
 
     return tail
 
-def walk(path):
+def walk(path, index=None, prefix=_TEST_UNIT_PREFIX):
+    # Records of the index are scanned for test modules only
+    if index is not None and prefix != _TEST_UNIT_PREFIX:
+        raise ValueError('Index can\'t be used with prefix "%s"' % prefix)
+
     package = Package(_split_path(os.path.abspath(path), os.getcwd()), path)
-    content = dict(package.walk())
+    content = dict(package.walk(index if index is not None \
+                                      else Scanner(patterns(prefix))))
+    if index is not None:
+        index.commit()
+
     return package
 
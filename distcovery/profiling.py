@@ -0,0 +1,49 @@
+import os
+import re
+import errno
+import pstats
+import cProfile
+
+from StringIO import StringIO
+
+_PROFILE_SUFFIX = '.prof'
+_AGGREGATE_NAME = '__aggregate__'
+_UNSAFE_PATTERN = re.compile('[^\\w.-]')
+
+def profile_path(directory, label):
+    return os.path.join(directory,
+                        _UNSAFE_PATTERN.sub('_', label) + _PROFILE_SUFFIX)
+
+def make_directory(directory):
+    try:
+        os.makedirs(directory)
+    except OSError as error:
+        if error.errno != errno.EEXIST:
+            raise
+
+class Profiler(object):
+    def __init__(self):
+        self.__profile = cProfile.Profile()
+
+    def start(self):
+        self.__profile.enable()
+        return self
+
+    def stop(self, path):
+        self.__profile.disable()
+        self.__profile.dump_stats(path)
+
+def aggregate(paths, directory):
+    paths = [path for path in paths if os.path.exists(path)]
+    if not paths:
+        return None
+
+    stats = pstats.Stats(*paths)
+    stats.dump_stats(profile_path(directory, _AGGREGATE_NAME))
+    return stats
+
+def format_report(stats, count):
+    stream = StringIO()
+    stats.stream = stream
+    stats.sort_stats('cumulative').print_stats(count)
+    return stream.getvalue()
@@ -0,0 +1,26 @@
+import unittest
+
+class FailedTests(object):
+    def __init__(self, names=None):
+        self.names = sorted(set(names)) if names else []
+        self.changed = False
+
+    def update(self, ran, failed):
+        names = (set(self.names) - set(ran)) | set(failed)
+        if names != set(self.names):
+            self.names = sorted(names)
+            self.changed = True
+
+class ExcludingLoader(unittest.TestLoader):
+    def __init__(self, names):
+        super(ExcludingLoader, self).__init__()
+        self.excluded = frozenset(names)
+
+    def getTestCaseNames(self, testCaseClass):
+        case = '%s.%s' % (testCaseClass.__module__, testCaseClass.__name__)
+        if testCaseClass.__module__ in self.excluded or case in self.excluded:
+            return []
+
+        names = super(ExcludingLoader, self).getTestCaseNames(testCaseClass)
+        prefix = case + '.'
+        return [name for name in names if prefix + name not in self.excluded]
@@ -0,0 +1,131 @@
+import re
+import unittest
+
+from distcovery.timing import Timings
+
+_SEPARATOR1 = unittest.TextTestResult.separator1
+_SEPARATOR2 = unittest.TextTestResult.separator2
+_FIXTURE_PATTERN = re.compile('^\\w+ \\((.+)\\)$')
+
+def failed_name(test):
+    if isinstance(test, unittest.TestCase):
+        return test.id()
+
+    # Errors of module and class fixtures are reported for _ErrorHolder
+    # described like "setUpClass (module.Class)"
+    match = _FIXTURE_PATTERN.match(test.id())
+    return match.group(1) if match else None
+
+class ModuleResult(object):
+    def __init__(self, name, output=''):
+        self.name = name
+        self.output = output
+        self.timings = None
+        self.failed_names = []
+        self.records = []
+
+        self.tests_run = 0
+        self.failures = []
+        self.errors = []
+        self.skipped = 0
+        self.expected_failures = 0
+        self.unexpected_successes = 0
+
+    def update(self, result):
+        self.tests_run += result.testsRun
+        self.failures.extend((result.getDescription(test), trace) \
+                             for test, trace in result.failures)
+        self.errors.extend((result.getDescription(test), trace) \
+                           for test, trace in result.errors)
+        self.skipped += len(result.skipped)
+        self.expected_failures += len(result.expectedFailures)
+        self.unexpected_successes += len(result.unexpectedSuccesses)
+
+        for test, trace in result.failures + result.errors:
+            name = failed_name(test)
+            if name:
+                self.failed_names.append(name)
+
+    def add_error(self, description, trace, name=None):
+        self.errors.append((description, trace))
+        if name:
+            self.failed_names.append(name)
+
+class Summary(object):
+    def __init__(self):
+        self.tests_run = 0
+        self.failures = []
+        self.errors = []
+        self.skipped = 0
+        self.expected_failures = 0
+        self.unexpected_successes = 0
+        self.timings = Timings()
+        self.failed_names = []
+        self.failed_modules = []
+        self.stopped = False
+
+    def add(self, module_result):
+        self.tests_run += module_result.tests_run
+        self.failures.extend(module_result.failures)
+        self.errors.extend(module_result.errors)
+        self.skipped += module_result.skipped
+        self.expected_failures += module_result.expected_failures
+        self.unexpected_successes += module_result.unexpected_successes
+        self.failed_names.extend(module_result.failed_names)
+        if module_result.name and \
+           (module_result.failures or module_result.errors):
+            self.failed_modules.append(module_result.name)
+
+        if module_result.timings:
+            self.timings.update(module_result.timings)
+
+    def was_successful(self):
+        return not self.failures and not self.errors
+
+    def reached(self, max_failures):
+        return bool(max_failures) and \
+               len(self.failures) + len(self.errors) >= max_failures
+
+    def print_errors(self, stream):
+        for flavour, items in (('ERROR', self.errors),
+                               ('FAIL', self.failures)):
+            for description, trace in items:
+                stream.write('%s\n' % _SEPARATOR1)
+                stream.write('%s: %s\n' % (flavour, description))
+                stream.write('%s\n' % _SEPARATOR2)
+                stream.write('%s\n' % trace)
+
+    def print_report(self, stream, time_taken):
+        stream.write('\n')
+        self.print_errors(stream)
+
+        stream.write('%s\n' % _SEPARATOR2)
+        stream.write('Ran %d test%s in %.3fs\n\n' % \
+                     (self.tests_run, 's' if self.tests_run != 1 else '',
+                      time_taken))
+
+        infos = []
+        if self.was_successful():
+            stream.write('OK')
+        else:
+            stream.write('FAILED')
+            if self.failures:
+                infos.append('failures=%d' % len(self.failures))
+
+            if self.errors:
+                infos.append('errors=%d' % len(self.errors))
+
+        if self.skipped:
+            infos.append('skipped=%d' % self.skipped)
+
+        if self.expected_failures:
+            infos.append('expected failures=%d' % self.expected_failures)
+
+        if self.unexpected_successes:
+            infos.append('unexpected successes=%d' % \
+                         self.unexpected_successes)
+
+        if infos:
+            stream.write(' (%s)' % ', '.join(infos))
+
+        stream.write('\n')
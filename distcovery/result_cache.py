@@ -0,0 +1,116 @@
+import os
+import sys
+import time
+import hashlib
+
+from distcovery.scope import imported_names, module_files
+
+try:
+    import pkg_resources as _pkg_resources
+except ImportError:
+    _pkg_resources = None
+
+DEFAULT_SIZE = 1000
+
+def environment():
+    items = [sys.version, sys.platform]
+    if _pkg_resources is not None:
+        items.extend(sorted('%s==%s' % (distribution.project_name,
+                                        distribution.version) \
+                            for distribution in _pkg_resources.working_set))
+
+    return '\n'.join(items)
+
+def _package(path, base):
+    directory = os.path.dirname(os.path.relpath(path, base))
+    return '.'.join(part for part in directory.split(os.sep) \
+                    if part and part != os.curdir)
+
+class Sources(object):
+    def __init__(self, bases):
+        self.bases = bases
+        self.__imports = {}
+        self.__digests = {}
+
+    def digest(self, path):
+        if path not in self.__digests:
+            try:
+                with open(path, 'rb') as stream:
+                    digest = hashlib.sha1(stream.read()).hexdigest()
+            except IOError:
+                digest = None
+
+            self.__digests[path] = digest
+
+        return self.__digests[path]
+
+    def imports(self, path, index=0):
+        if (path, index) not in self.__imports:
+            package = _package(path, self.bases[index][0])
+            try:
+                names = set(imported_names(path, package))
+            except (IOError, SyntaxError):
+                names = set()
+
+            if package:
+                # Python 2 resolves plain imports inside a package relatively
+                names.update(['%s.%s' % (package, name) for name in names])
+
+            self.__imports[(path, index)] = \
+                set((os.path.normpath(found), found_index) \
+                    for found_index, (root, roots) in enumerate(self.bases) \
+                    for found in module_files(names, root, roots))
+
+        return self.__imports[(path, index)]
+
+    def closure(self, paths, index=None):
+        visited = set()
+        pending = [(os.path.normpath(path), 0) for path in paths]
+        while pending:
+            item = pending.pop()
+            if item not in visited:
+                visited.add(item)
+                pending.extend(self.imports(*item))
+
+        return sorted(set(path for path, found_index in visited \
+                          if index is None or found_index == index))
+
+    def key(self, paths, *extra):
+        digest = hashlib.sha1()
+        for item in extra:
+            digest.update('%s\n' % item)
+
+        for path in self.closure(paths):
+            digest.update('%s %s\n' % (os.path.relpath(path),
+                                       self.digest(path)))
+
+        return digest.hexdigest()
+
+class ResultCache(object):
+    def __init__(self, entries=None, size=DEFAULT_SIZE):
+        self.entries = dict(entries) if entries else {}
+        self.size = size
+        self.changed = False
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is not None:
+            entry['used'] = time.time()
+            self.changed = True
+
+        return entry
+
+    def add(self, key, lines):
+        self.entries[key] = {'lines': lines, 'used': time.time()}
+        self.changed = True
+        self.evict()
+
+    def evict(self):
+        excess = len(self.entries) - self.size
+        if excess > 0:
+            keys = sorted(self.entries,
+                          key=lambda key: self.entries[key]['used'])
+            for key in keys[:excess]:
+                del self.entries[key]
+
+            self.changed = True
@@ -0,0 +1,67 @@
+import functools
+import unittest
+
+from distcovery.timing import TimingResult
+from distcovery.writers import ResultRecorder
+
+def _limit_failures(result, max_failures):
+    stop_test = result.stopTest
+
+    def stopTest(test):
+        stop_test(test)
+        if len(result.failures) + len(result.errors) >= max_failures:
+            result.stop()
+
+    result.stopTest = stopTest
+
+class Step(unittest.TestSuite):
+    def __init__(self, tests=(), callback=None, setup=None):
+        super(Step, self).__init__(tests)
+        self.callback = callback
+        self.setup = setup
+
+    def run(self, result, *args, **kwargs):
+        if result.shouldStop:
+            return result
+
+        # Errors of module and class fixtures are reported for _ErrorHolder
+        # instead of a test, so the outcome is judged by the counts
+        problems = len(result.failures) + len(result.errors)
+        nested = getattr(result, '_testRunEntered', False)
+        try:
+            if self.setup:
+                self.setup()
+
+            super(Step, self).run(result, *args, **kwargs)
+            if nested:
+                # The top level suite defers class and module teardowns until
+                # a test needs other fixtures, but they belong to this step
+                self._tearDownPreviousClass(None, result)
+                self._handleModuleTearDown(result)
+                result._previousTestClass = None
+
+            return result
+        finally:
+            if self.callback:
+                self.callback(len(result.failures) + len(result.errors) > \
+                              problems)
+
+class Runner(unittest.TextTestRunner):
+    def __init__(self, timings=None, max_failures=None, write=None,
+                 **kwargs):
+        if timings is not None:
+            kwargs['resultclass'] = functools.partial(TimingResult, timings)
+
+        super(Runner, self).__init__(**kwargs)
+        self.max_failures = max_failures
+        self.write = write
+
+    def _makeResult(self):
+        result = super(Runner, self)._makeResult()
+        if self.max_failures:
+            _limit_failures(result, self.max_failures)
+
+        if self.write:
+            ResultRecorder(self.write).attach(result)
+
+        return result
@@ -0,0 +1,59 @@
+import os
+import ast
+import collections
+
+def package_roots(distribution):
+    roots = set()
+    if isinstance(distribution.py_modules, collections.Iterable):
+        roots.update(distribution.py_modules)
+
+    if isinstance(distribution.packages, collections.Iterable):
+        roots.update(package.split('.', 1)[0] \
+                     for package in distribution.packages)
+
+    return roots
+
+def _absolute_module(node, package):
+    if not node.level:
+        return node.module
+
+    parts = package.split('.') if package else []
+    if node.level > len(parts):
+        return None
+
+    prefix = '.'.join(parts[:len(parts) - node.level + 1])
+    return '%s.%s' % (prefix, node.module) if node.module else prefix
+
+def imported_names(path, package=None):
+    with open(path) as stream:
+        tree = ast.parse(stream.read(), path)
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                yield alias.name
+        elif isinstance(node, ast.ImportFrom):
+            module = _absolute_module(node, package)
+            if module:
+                yield module
+                for alias in node.names:
+                    yield '%s.%s' % (module, alias.name)
+
+def _candidates(name):
+    parts = name.split('.')
+    for index in range(1, len(parts) + 1):
+        yield os.path.join(*parts[:index]) + '.py'
+        yield os.path.join(*(parts[:index] + ['__init__.py']))
+
+def module_files(names, base, roots=None):
+    files = set()
+    for name in names:
+        if roots is not None and name.split('.', 1)[0] not in roots:
+            continue
+
+        for path in _candidates(name):
+            path = os.path.join(base, path)
+            if os.path.isfile(path):
+                files.add(path)
+
+    return sorted(files)
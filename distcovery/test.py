@@ -1,83 +1,1032 @@
 import unittest
+import os
 import sys
+import json
+import codecs
+import functools
+import collections
 
 from distutils import log
 from distutils.cmd import Command
 
 from distcovery.exceptions import NoTestModulesException, \
-                                  UnknownModulesException
-from distcovery.path import walk
+                                  UnknownModulesException, \
+                                  InvalidOptionValue, TestsFailedException, \
+                                  RemoteTestsFailedException, \
+                                  UnknownTestsException, \
+                                  CoverageThresholdException
+from distcovery.path import walk, Package, Index
+from distcovery.cache import Cache
 from distcovery.coverage_wrapper import Coverage
-from distcovery.importer import Importer
+from distcovery.importer import Importer, LazyModuleSuite, find_testcases, \
+                                load_tests_from_names
+from distcovery.result import ModuleResult, Summary
+from distcovery.parallel import run_modules
+from distcovery.daemon import preload, Server, send_request
+from distcovery.timing import Timings
+from distcovery.runner import Runner, Step
+from distcovery.history import ORDERS, History, Progress
+from distcovery.affected import Dependencies, changed_files, relative_path
+from distcovery.rerun import FailedTests, ExcludingLoader
+from distcovery.writers import JsonLinesWriter, JUnitXmlWriter
+from distcovery.scope import package_roots, module_files
+from distcovery.result_cache import DEFAULT_SIZE, Sources, ResultCache, \
+                                    environment
+from distcovery.collector import Collector
+from distcovery.profiling import Profiler, profile_path, make_directory, \
+                                 aggregate, format_report
+
+_DEFAULT_CACHE_DIR = '.distcovery'
+_INDEX_CACHE_NAME = 'index'
+_DURATIONS_CACHE_NAME = 'durations'
+_DEPENDENCIES_CACHE_NAME = 'dependencies'
+_FAILED_CACHE_NAME = 'failed'
+_RESULTS_CACHE_NAME = 'results'
+_TESTS_CACHE_NAME = 'tests'
+_DEFAULT_PROFILE_TOP = 20
+
+_NO_DEPENDENCIES_WARNING = 'Dependencies of test modules are recorded only ' \
+                           'when coverage is calculated. Running all ' \
+                           'test modules not recorded before...'
+_NO_CACHED_COVERAGE_WARNING = 'Cached results can\'t be used because ' \
+                              'installed coverage doesn\'t support ' \
+                              'contexts. Running all selected tests...'
 
 class Test(Command):
     description = 'run tests for the package'
 
     user_options = [('module=', 'm', 'set of test modules to run (several ' \
-                                     'modules can be listed using comma)'),
+                                     'modules can be listed using comma, ' \
+                                     'single tests can be selected as ' \
+                                     'module:TestCase[.test_method])'),
                     ('coverage-base=', None, 'base installation directory'),
-                    ('no-coverage', None, 'don\'t calculate test coverage')]
+                    ('no-coverage', None, 'don\'t calculate test coverage'),
+                    ('coverage-scope', None, 'measure coverage only of ' \
+                                             'package modules imported by ' \
+                                             'the selected test modules'),
+                    ('coverage-sample=', None, 'measure coverage only ' \
+                                               'while every N-th test ' \
+                                               'module runs'),
+                    ('coverage-session', None, 'keep one coverage tracer ' \
+                                               'for the whole run and ' \
+                                               'tell test modules apart ' \
+                                               'by coverage contexts'),
+                    ('coverage-xml=', None, 'write coverage report to the ' \
+                                            'XML file'),
+                    ('coverage-json=', None, 'write coverage report to the ' \
+                                             'JSON file'),
+                    ('coverage-html=', None, 'write coverage report to the ' \
+                                             'directory as HTML updating ' \
+                                             'only files which coverage ' \
+                                             'has changed'),
+                    ('fail-under=', None, 'fail if total coverage is below ' \
+                                          'the given percentage'),
+                    ('jobs=', 'j', 'number of worker processes to run test ' \
+                                   'modules in parallel'),
+                    ('cache-dir=', None, 'directory to keep data between ' \
+                                         'runs (default: .distcovery)'),
+                    ('no-cache', None, 'run test modules which passed ' \
+                                       'before with the same sources ' \
+                                       'anyway'),
+                    ('cache-size=', None, 'number of passed test module ' \
+                                          'results to keep in cache ' \
+                                          '(default: %d)' % DEFAULT_SIZE),
+                    ('serve=', None, 'keep a warm interpreter with the ' \
+                                     'package imported and run tests ' \
+                                     'requested on the given unix socket'),
+                    ('connect=', None, 'run tests by server listening on ' \
+                                       'the given unix socket'),
+                    ('isolate', None, 'run every test module in a fresh ' \
+                                      'process forked from a parent with ' \
+                                      'the package imported'),
+                    ('lazy', None, 'import test modules of a package only ' \
+                                   'when their tests are about to run'),
+                    ('durations=', None, 'print N slowest tests and test ' \
+                                         'module imports'),
+                    ('durations-file=', None, 'write wall and cpu time of ' \
+                                              'every test and test module ' \
+                                              'import to the JSON file'),
+                    ('order=', None, 'run test modules ordered by recorded ' \
+                                     'duration: "shortest" first for fast ' \
+                                     'feedback or "longest" first to pack ' \
+                                     'parallel jobs'),
+                    ('progress', None, 'print elapsed time and ETA of the ' \
+                                       'run after every test module'),
+                    ('shard=', None, 'run only INDEX-th of TOTAL shards of ' \
+                                     'test modules (as INDEX/TOTAL) ' \
+                                     'of equal size'),
+                    ('shard-durations=', None, 'balance shards by ' \
+                                               'durations of test modules ' \
+                                               'from the JSON file shared ' \
+                                               'by all shards'),
+                    ('changed-since=', None, 'run only test modules which ' \
+                                             'depend on files changed ' \
+                                             'since the git revision or ' \
+                                             'listed in the file'),
+                    ('last-failed', None, 'run only tests which failed in ' \
+                                          'the previous run'),
+                    ('failed-first', None, 'run tests which failed in the ' \
+                                           'previous run before the others'),
+                    ('fail-fast', None, 'stop the run on the first failed ' \
+                                        'test'),
+                    ('max-failures=', None, 'stop the run after N failed ' \
+                                            'tests'),
+                    ('json-results=', None, 'stream outcome of every test ' \
+                                            'to the file as JSON lines'),
+                    ('junit-xml=', None, 'stream outcome of every test to ' \
+                                         'the file as JUnit XML'),
+                    ('profile=', None, 'profile import and run of every ' \
+                                       'selected test module and write ' \
+                                       'pstats files to the directory'),
+                    ('profile-top=', None, 'print N functions with the ' \
+                                           'highest cumulative time in ' \
+                                           'the profile (default: %d)' % \
+                                           _DEFAULT_PROFILE_TOP)]
+
+    boolean_options = ['no-coverage', 'no-cache', 'coverage-scope',
+                       'coverage-session',
+                       'isolate', 'lazy', 'progress', 'last-failed',
+                       'failed-first', 'fail-fast']
 
-    boolean_options = ['no-coverage']
+    def get_cache(self):
+        if self.cache_dir:
+            return Cache(self.cache_dir)
 
     def collect_tests(self):
-        self.test_package = walk(self.test_root)
+        cache = self.get_cache()
+        if cache:
+            index = Index(cache.load(_INDEX_CACHE_NAME))
+            self.test_package = walk(self.test_root, index)
+            if index.changed:
+                cache.save(_INDEX_CACHE_NAME, index.directories)
+        else:
+            self.test_package = walk(self.test_root)
+
         if not self.test_package.content:
             raise NoTestModulesException(self.test_root)
 
+        self.collector = Collector(cache.load(_TESTS_CACHE_NAME) \
+                                   if cache else None)
+
+    def save_collector(self):
+        self.collector.prune(importable.path for importable in \
+                             self.test_package.content.itervalues() \
+                             if not isinstance(importable, Package))
+
+        cache = self.get_cache()
+        if cache and self.collector.changed:
+            cache.save(_TESTS_CACHE_NAME, self.collector.files)
+
     def register_importer(self):
-        self.importer = Importer(self.test_package)
+        self.importer = Importer(self.test_package, self.lazy, self.timings)
         sys.meta_path.append(self.importer)
 
     def print_test_package(self):
         log.info('Test suites:')
         for is_package, level, alias in self.test_package.enumerate(1):
             log.info('%s%s%s', level*'\t', alias, ':' if is_package else '')
+            if is_package:
+                continue
+
+            path = self.test_package.content[alias].path
+            for case, methods in self.collector.tests(path):
+                for method in methods:
+                    log.info('%s%s.%s', (level + 1)*'\t', case, method)
 
     def initialize_options(self):
         self.module = None
         self.coverage_base = None
         self.no_coverage = None
+        self.coverage_scope = None
+        self.coverage_sample = None
+        self.coverage_session = None
+        self.coverage_xml = None
+        self.coverage_json = None
+        self.coverage_html = None
+        self.fail_under = None
+        self.jobs = 1
+        self.cache_dir = None
+        self.no_cache = None
+        self.cache_size = None
+        self.serve = None
+        self.connect = None
+        self.isolate = None
+        self.lazy = None
+        self.durations = None
+        self.durations_file = None
+        self.order = None
+        self.progress = None
+        self.shard = None
+        self.shard_durations = None
+        self.changed_since = None
+        self.last_failed = None
+        self.failed_first = None
+        self.fail_fast = None
+        self.max_failures = None
+        self.json_results = None
+        self.junit_xml = None
+        self.profile = None
+        self.profile_top = None
+        self.profiler = None
+        self.profiles = []
+        self.timings = None
+        self.history = None
+        self.dependencies = None
+        self.pending_dependencies = []
+        self.failed = None
+        self.results = None
+        self.collector = None
+        self.result_keys = {}
+        self.cached = []
+        self.unmeasured = []
+        self.failed_modules = []
+        self.rerun = None
+        self.writers = []
         self.test_root = 'test'
 
+    def ensure_positive_integer(self, option):
+        value = getattr(self, option)
+        try:
+            number = int(value)
+        except (TypeError, ValueError):
+            number = 0
+
+        if number < 1:
+            raise InvalidOptionValue(option, value, 'positive integer')
+
+        setattr(self, option, number)
+
+    def ensure_percentage(self, option):
+        value = getattr(self, option)
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            number = -1.0
+
+        if not 0.0 <= number <= 100.0:
+            raise InvalidOptionValue(option, value, 'percentage from 0 to 100')
+
+        setattr(self, option, number)
+
+    def ensure_shard(self):
+        index, separator, total = str(self.shard).partition('/')
+        try:
+            index, total = int(index), int(total)
+        except ValueError:
+            index = total = 0
+
+        if not 1 <= index <= total:
+            raise InvalidOptionValue('shard', self.shard,
+                                     'INDEX/TOTAL with 1 <= INDEX <= TOTAL')
+
+        self.shard = (index, total)
+
     def finalize_options(self):
         self.set_undefined_options('install',
                                    ('install_purelib', 'coverage_base'))
+        self.ensure_positive_integer('jobs')
+        if self.coverage_sample is not None:
+            self.ensure_positive_integer('coverage_sample')
+
+        if self.fail_under is not None:
+            self.ensure_percentage('fail_under')
+
+        if self.cache_size is not None:
+            self.ensure_positive_integer('cache_size')
+
+        if self.profile_top is not None:
+            self.ensure_positive_integer('profile_top')
+
+        if self.durations is not None:
+            self.ensure_positive_integer('durations')
+
+        if self.order is not None and self.order not in ORDERS:
+            raise InvalidOptionValue('order', self.order,
+                                     ' or '.join('"%s"' % order \
+                                                 for order in ORDERS))
+
+        if self.shard is not None:
+            self.ensure_shard()
+
+        if self.max_failures is not None:
+            self.ensure_positive_integer('max_failures')
+        elif self.fail_fast:
+            self.max_failures = 1
+
+        if self.cache_dir is None:
+            self.cache_dir = _DEFAULT_CACHE_DIR
 
     def validate_modules(self, modules):
         modules = set(modules) - set(self.test_package.content.keys())
         if modules:
             raise UnknownModulesException(list(modules))
 
+    def parse_modules(self):
+        if not self.module:
+            return [(None, None)]
+
+        selection = []
+        for item in self.module.split(','):
+            alias, separator, test = item.strip().partition(':')
+            if not separator:
+                test = None
+            elif not alias:
+                alias = None
+
+            selection.append((alias, test))
+
+        self.validate_modules([alias for alias, test in selection \
+                               if alias is not None])
+        return selection
+
+    def order_modules(self, selection):
+        if not self.order:
+            return selection
+
+        tests = [(alias, test) for alias, test in selection if test]
+        modules = self.expand_modules([alias for alias, test in selection \
+                                       if not test])
+
+        history = self.history if self.history else History()
+        return tests + [(alias, None) \
+                        for alias in history.order(modules, self.order)]
+
+    def select_affected(self, selection):
+        if not self.changed_since:
+            return selection
+
+        changed = changed_files(self.changed_since)
+
+        tests = [(alias, test) for alias, test in selection if test]
+        modules = self.expand_modules([alias for alias, test in selection \
+                                       if not test])
+        affected = self.dependencies.affected(modules, changed)
+
+        log.info('Running %d of %d test modules affected by %d changed ' \
+                 'files', len(affected), len(modules), len(changed))
+        return tests + [(alias, None) for alias in affected]
+
+    def record_dependencies(self, alias, files):
+        importable = self.test_package.content[alias]
+        files = [relative_path(path, (self.coverage_base, '.')) \
+                 for path in list(files) + [importable.path]]
+        self.dependencies.update(alias, files)
+
+    def split_dependencies(self, alias, coverage):
+        files = coverage.split()
+        if files is not None:
+            self.record_dependencies(alias, files)
+
+    def collect_dependencies(self, coverage):
+        if not self.pending_dependencies:
+            return
+
+        contexts = coverage.context_files()
+        for alias in self.pending_dependencies:
+            self.record_dependencies(alias, sorted(contexts.get(alias, ())))
+
+        self.pending_dependencies = []
+
+    def shard_modules(self, selection):
+        if not self.shard:
+            return selection
+
+        index, total = self.shard
+
+        tests = [(alias, test) for alias, test in selection if test]
+        modules = self.expand_modules([alias for alias, test in selection \
+                                       if not test])
+        units = dict((self.label(alias, test), (alias, test)) \
+                     for alias, test in tests + [(alias, None) \
+                                                 for alias in modules])
+
+        # Every shard must split the same way, so durations recorded locally
+        # by each node can't be used
+        history = History(self.load_shard_durations())
+        shard = set(history.partition(units.keys(), total)[index - 1])
+
+        log.info('Running shard %d/%d: %d of %d test modules', index, total,
+                 len(shard), len(units))
+        return [units[label] for label in sorted(units) if label in shard]
+
+    def load_shard_durations(self):
+        if not self.shard_durations:
+            return None
+
+        try:
+            with open(self.shard_durations) as stream:
+                durations = json.load(stream)
+
+            # File written by --durations-file keeps timings of test modules
+            # and tests by their names
+            if isinstance(durations, dict) and \
+               isinstance(durations.get('modules'), dict):
+                timings = Timings()
+                timings.tests = dict(durations.get('tests', {}))
+                timings.modules = durations['modules']
+                durations = self.alias_durations(timings.module_durations())
+        except (IOError, ValueError, TypeError, KeyError, AttributeError):
+            durations = None
+
+        if not isinstance(durations, dict) or \
+           not all(isinstance(duration, (int, long, float)) \
+                   for duration in durations.itervalues()):
+            raise InvalidOptionValue('shard_durations', self.shard_durations,
+                                     'JSON file with durations of test ' \
+                                     'modules')
+
+        return durations
+
+    def estimate(self, alias):
+        if self.history is None:
+            return 0.0
+
+        return self.history.estimate(alias)
+
+    def create_progress(self, estimates):
+        if not self.progress or self.history is None or len(estimates) < 2:
+            return None
+
+        return Progress(estimates, self.jobs)
+
+    def label(self, alias, test):
+        if test:
+            return '%s:%s' % (alias or '', test)
+
+        return alias or self.test_root
+
     def map_module(self, module):
         if module in self.importer.aliases:
             return self.importer.aliases[module]
 
         return self.test_package.content[module].str_name()
 
+    def map_tests(self, alias, test):
+        # Modules of a package are imported one by one, importing the package
+        # itself would import all of them unless it is lazy
+        name = self.map_module(alias)
+        names = self.importer.children.get(name, [name])
+
+        case, separator, method = test.partition('.')
+        if len(names) > 1:
+            names = self.filter_modules(names, case, method)
+
+        tests = []
+        for name in names:
+            __import__(name)
+            module = sys.modules[name]
+
+            for item in find_testcases(module, case):
+                if not method:
+                    tests.append('%s.%s' % (name, item))
+                elif hasattr(getattr(module, item), method):
+                    tests.append('%s.%s.%s' % (name, item, method))
+
+        if not tests:
+            raise UnknownTestsException(['%s:%s' % (alias or '', test)])
+
+        return tests
+
+    def filter_modules(self, names, case, method):
+        paths = dict((importable.str_name(), importable.path) \
+                     for importable in self.test_package.content.itervalues())
+
+        # Import only modules defining the test case unless it is generated
+        found = [name for name in names \
+                 if self.collector.contains(paths[name], case, method)]
+        return found if found else names
+
+    def expand_modules(self, modules):
+        aliases = set()
+        for module in modules:
+            if module is None:
+                package = self.test_package
+            else:
+                package = self.test_package.content[module]
+                if not isinstance(package, Package):
+                    aliases.add(module)
+                    continue
+
+            for alias, importable in package.content.iteritems():
+                if not isinstance(importable, Package):
+                    aliases.add(alias)
+
+        return sorted(aliases)
+
+    def expand_selection(self, selection):
+        expanded = []
+        for alias, test in selection:
+            if test:
+                expanded.append((alias, test))
+            else:
+                expanded.extend((module, None) \
+                                for module in self.expand_modules([alias]))
+
+        return expanded
+
+    def scope_coverage(self, selection):
+        if not self.coverage_scope or self.no_coverage:
+            return None
+
+        aliases = [alias for alias, test in selection]
+        if self.rerun:
+            modules = dict((importable.str_name(), alias) \
+                           for alias, importable in \
+                               self.test_package.content.iteritems())
+            for name in self.rerun:
+                while name and name not in modules:
+                    name = name.rpartition('.')[0]
+
+                if name:
+                    aliases.append(modules[name])
+
+        paths = [self.test_package.content[alias].path \
+                 for alias in self.expand_modules(aliases)]
+
+        # Only modules found in the package base are measured, the first
+        # base holds the tests
+        files = self.sources().closure(paths, 1)
+        log.info('Measuring coverage of %d package modules imported by ' \
+                 'selected tests', len(files))
+        return files
+
+    def sample_coverage(self, units):
+        if self.coverage_sample in (None, 1) or self.no_coverage:
+            return None
+
+        measured = set(units[::self.coverage_sample])
+        log.info('Measuring coverage of %d of %d test modules', len(measured),
+                 len(units))
+        return measured
+
+    def start_step(self, alias, test, coverage, measured=True):
+        if measured:
+            coverage.switch_context(self.label(alias, test))
+        else:
+            coverage.pause()
+
+        if self.profile:
+            self.profiler = Profiler().start()
+
+    def finish_step(self, alias, test, coverage, progress, measured=True,
+                    failed=False):
+        if self.profiler is not None:
+            path = profile_path(self.profile, self.label(alias, test))
+            self.profiler.stop(path)
+            self.profiler = None
+            self.profiles.append(path)
+
+        if not measured:
+            coverage.resume()
+            if not test:
+                self.unmeasured.append(alias)
+        elif self.dependencies is not None and not test:
+            if coverage.session:
+                self.pending_dependencies.append(alias)
+            else:
+                self.split_dependencies(alias, coverage)
+
+        if failed and not test:
+            self.failed_modules.append(self.map_module(alias))
+
+        if progress:
+            progress.update(self.label(alias, test))
+
+    def build_suite(self, selection, coverage, progress, measured=None):
+        loader = ExcludingLoader(self.rerun) if self.rerun \
+                                             else unittest.defaultTestLoader
+
+        suite = unittest.TestSuite()
+        if self.rerun:
+            suite.addTest(load_tests_from_names(self.rerun))
+
+        for alias, test in selection:
+            if test:
+                tests = load_tests_from_names(self.map_tests(alias, test),
+                                              loader)
+            else:
+                name = self.map_module(alias)
+                timings = None if name in self.importer.children \
+                               else self.timings
+                tests = LazyModuleSuite(name, loader, timings)
+
+            is_measured = measured is None or \
+                          self.label(alias, test) in measured
+            suite.addTest(Step([tests],
+                               functools.partial(self.finish_step, alias, test,
+                                                 coverage, progress,
+                                                 is_measured),
+                               functools.partial(self.start_step, alias, test,
+                                                 coverage, is_measured)))
+
+        return suite
+
+    def run_serial(self, selection, coverage):
+        if self.coverage_sample or self.profile:
+            selection = self.expand_selection(selection)
+
+        measured = self.sample_coverage([self.label(alias, test) \
+                                         for alias, test in selection])
+        progress = self.create_progress(dict((self.label(alias, test),
+                                              0.0 if test else \
+                                                  self.estimate(alias)) \
+                                             for alias, test in selection))
+
+        runner = Runner(timings=self.timings, max_failures=self.max_failures,
+                        write=self.write_record if self.writers else None,
+                        verbosity=self.verbose)
+        with coverage:
+            result = runner.run(self.build_suite(selection, coverage,
+                                                 progress, measured))
+
+        module_result = ModuleResult(None)
+        module_result.update(result)
+
+        summary = Summary()
+        summary.add(module_result)
+        summary.failed_modules.extend(self.failed_modules)
+        summary.stopped = result.shouldStop and \
+                          summary.reached(self.max_failures)
+        return summary
+
+    def run_parallel(self, selection, coverage):
+        with coverage:
+            names = []
+            estimates = {}
+            labels = {}
+            if self.rerun:
+                for name in self.rerun:
+                    names.append(name)
+                    estimates[name] = 0.0
+                    labels[name] = name
+
+            for alias, test in selection:
+                if test:
+                    for name in self.map_tests(alias, test):
+                        names.append(name)
+                        estimates[name] = 0.0
+                        labels[name] = name
+
+            modules = [alias for alias, test in selection if not test]
+            if not self.order:
+                modules = self.expand_modules(modules)
+
+            for alias in modules:
+                name = self.map_module(alias)
+                names.append(name)
+                estimates[name] = self.estimate(alias)
+                labels[name] = alias
+
+            profiles = None
+            if self.profile:
+                profiles = dict((name, profile_path(self.profile, label)) \
+                                for name, label in labels.iteritems())
+                self.profiles.extend(profiles.itervalues())
+
+            if self.isolate:
+                preload(self.get_packages())
+
+            measured = self.sample_coverage(names)
+            if measured is not None:
+                self.unmeasured.extend(labels[name] for name in names \
+                                       if name not in measured)
+
+            progress = self.create_progress(estimates)
+            summary = run_modules(names, self.jobs, self.verbose,
+                                  initializer=coverage.start_worker,
+                                  timed=self.timings is not None,
+                                  progress=progress.update if progress \
+                                                           else None,
+                                  exclude=self.rerun,
+                                  max_failures=self.max_failures,
+                                  write=self.write_record if self.writers \
+                                                          else None,
+                                  tracer=coverage,
+                                  measured=measured,
+                                  isolate=self.isolate,
+                                  profiles=profiles)
+
+        if self.timings is not None:
+            self.timings.update(summary.timings)
+
+        return summary
+
+    def open_writers(self):
+        for path, writer in ((self.json_results, JsonLinesWriter),
+                             (self.junit_xml, JUnitXmlWriter)):
+            if path:
+                self.writers.append(writer(codecs.open(path, 'w', 'utf-8')))
+
+    def write_record(self, record):
+        for writer in self.writers:
+            writer.write(record)
+
+    def close_writers(self):
+        while self.writers:
+            self.writers.pop().close()
+
+    def report_timings(self):
+        if self.timings is None:
+            return
+
+        if self.durations:
+            for line in self.timings.format_report(self.durations):
+                log.info('%s', line)
+
+        if self.durations_file:
+            self.timings.dump(self.durations_file)
+
+    def start_profile(self):
+        self.profiles = []
+        if self.profile:
+            make_directory(self.profile)
+
+    def report_profile(self):
+        if not self.profile:
+            return
+
+        stats = aggregate(self.profiles, self.profile)
+        if stats is None:
+            return
+
+        log.info('\nProfile of %d test modules saved to "%s":',
+                 len(self.profiles), self.profile)
+        log.info('%s', format_report(stats, self.profile_top or \
+                                            _DEFAULT_PROFILE_TOP))
+
+    def load_history(self):
+        cache = self.get_cache()
+        if cache:
+            self.history = History(cache.load(_DURATIONS_CACHE_NAME))
+
+    def save_history(self, selection):
+        if self.history is None or self.rerun or self.shard or \
+           any(test for alias, test in selection):
+            return
+
+        self.history.update(self.alias_durations(
+                                self.timings.module_durations()))
+        if self.history.changed:
+            self.get_cache().save(_DURATIONS_CACHE_NAME,
+                                  self.history.durations)
+
+    def alias_durations(self, durations):
+        aliases = dict((importable.str_name(), alias) \
+                       for alias, importable in \
+                           self.test_package.content.iteritems())
+
+        return dict((aliases[name], duration) \
+                    for name, duration in durations.iteritems() \
+                    if name in aliases)
+
+    def load_dependencies(self):
+        cache = self.get_cache()
+        files = cache.load(_DEPENDENCIES_CACHE_NAME) if cache else None
+        self.dependencies = Dependencies(files)
+
+    def save_dependencies(self):
+        if self.dependencies is None or not self.dependencies.changed:
+            return
+
+        cache = self.get_cache()
+        if cache:
+            cache.save(_DEPENDENCIES_CACHE_NAME, self.dependencies.files)
+
+    def load_failed(self):
+        cache = self.get_cache()
+        if cache:
+            self.failed = FailedTests(cache.load(_FAILED_CACHE_NAME))
+
+    def select_failed(self, selection):
+        if not (self.last_failed or self.failed_first) or not self.failed:
+            return selection
+
+        if not self.failed.names:
+            log.info('No failed tests recorded. Running all selected tests...')
+            return selection
+
+        self.rerun = self.failed.names
+        log.info('Running %d tests failed in the previous run first...',
+                 len(self.rerun))
+        return [] if self.last_failed else selection
+
+    def save_failed(self, summary):
+        if self.failed is None or self.timings is None:
+            return
+
+        ran = set(self.timings.tests)
+        ran.update(self.timings.modules)
+        # Module of a test which has run doesn't fail to import anymore
+        ran.update(record['module'] \
+                   for record in self.timings.tests.itervalues() \
+                   if 'module' in record)
+        # Neither does the class fixture of its test case
+        ran.update(name.rpartition('.')[0] for name in self.timings.tests)
+
+        self.failed.update(ran, summary.failed_names)
+        if self.failed.changed:
+            self.get_cache().save(_FAILED_CACHE_NAME, self.failed.names)
+
+    def load_results(self):
+        self.result_keys = {}
+        self.cached = []
+        self.unmeasured = []
+
+        cache = self.get_cache()
+        if cache and not self.no_cache:
+            self.results = ResultCache(cache.load(_RESULTS_CACHE_NAME),
+                                       self.cache_size or DEFAULT_SIZE)
+
+    def sources(self):
+        bases = [(os.curdir, None)]
+        if self.coverage_base:
+            bases.append((self.coverage_base,
+                          package_roots(self.distribution)))
+
+        return Sources(bases)
+
+    def skip_cached(self, selection, coverage):
+        if self.results is None or self.rerun:
+            return selection
+
+        if coverage.available and not coverage.session:
+            log.debug(_NO_CACHED_COVERAGE_WARNING)
+            return selection
+
+        sources = self.sources()
+        # Scoped runs measure only part of the package, so their lines
+        # mustn't be reused by a full run
+        extra = (environment(), coverage.available, bool(self.coverage_scope))
+
+        remaining = []
+        for alias, test in self.expand_selection(selection):
+            if test:
+                remaining.append((alias, test))
+                continue
+
+            importable = self.test_package.content[alias]
+            key = sources.key(module_files([importable.str_name()],
+                                           os.curdir) + [importable.path],
+                              *extra)
+
+            entry = self.results.get(key)
+            if entry is None:
+                self.result_keys[alias] = key
+                remaining.append((alias, test))
+            else:
+                self.cached.append(entry)
+                if self.verbose > 1:
+                    log.info('%s ... cached', alias)
+
+        log.info('Skipping %d of %d test modules passed before with the ' \
+                 'same sources', len(self.cached),
+                 len(self.cached) + len(self.result_keys))
+        return remaining
+
+    def update_results(self, summary, coverage):
+        if self.results is None:
+            return
+
+        for entry in self.cached:
+            coverage.add_lines(entry['lines'])
+
+        if summary.stopped or not self.result_keys:
+            return
+
+        contexts = coverage.context_lines() or {}
+        for alias, key in self.result_keys.iteritems():
+            name = self.map_module(alias)
+            if name in summary.failed_modules or alias in self.unmeasured:
+                continue
+
+            self.results.add(key, contexts.get(alias) or \
+                                  contexts.get(name) or {})
+
+    def save_results(self):
+        if self.results is not None and self.results.changed:
+            self.get_cache().save(_RESULTS_CACHE_NAME, self.results.entries)
+
+    def get_packages(self):
+        names = set()
+        if isinstance(self.distribution.py_modules, collections.Iterable):
+            names.update(self.distribution.py_modules)
+
+        if isinstance(self.distribution.packages, collections.Iterable):
+            names.update(self.distribution.packages)
+
+        return sorted(names)
+
+    def handle_request(self, request):
+        self.module = request.get('module')
+        self.verbose = request.get('verbose', self.verbose)
+
+        try:
+            self.run_tests()
+        except (TestsFailedException, CoverageThresholdException) as error:
+            log.error(str(error))
+            return 1
+
+        return 0
+
+    def run_server(self):
+        sys.path.insert(0, self.coverage_base)
+        try:
+            preloaded = preload(self.get_packages())
+        finally:
+            if sys.path[0] == self.coverage_base:
+                del sys.path[0]
+
+        # Coverage starts in the child, so the package has to be imported
+        # there again to measure its global sections
+        server = Server(self.serve, self.handle_request, preloaded,
+                        not self.no_coverage)
+
+        log.info('Serving tests on "%s"...', self.serve)
+        server.serve_forever()
+
+    def run_client(self):
+        status = send_request(self.connect, {'module': self.module,
+                                             'verbose': self.verbose})
+        if status:
+            raise RemoteTestsFailedException(self.connect, status)
+
     def run(self):
+        if self.connect:
+            self.run_client()
+        elif self.serve:
+            self.run_server()
+        else:
+            self.run_tests()
+
+    def run_tests(self):
         self.collect_tests()
         if self.dry_run:
             self.print_test_package()
+            self.save_collector()
             return
 
+        self.load_history()
+        if self.durations or self.durations_file or self.history is not None:
+            self.timings = Timings()
+
+        if self.changed_since:
+            self.load_dependencies()
+            if self.no_coverage:
+                log.warn(_NO_DEPENDENCIES_WARNING)
+
+        self.load_failed()
+        self.load_results()
+
         self.register_importer()
+        selection = self.order_modules(self.shard_modules(
+                        self.select_affected(self.select_failed(
+                            self.parse_modules()))))
 
-        if self.module:
-            modules = [item.strip() for item in self.module.split(',')]
-            self.validate_modules(modules)
-        else:
-            modules = [None]
+        include = self.scope_coverage(selection)
+        coverage = Coverage(self.no_coverage or include == [],
+                            self.coverage_base, self.distribution,
+                            self.jobs > 1 or self.isolate or \
+                                self.dependencies is not None,
+                            include, self.coverage_session,
+                            self.results is not None)
+        selection = self.skip_cached(selection, coverage)
 
-        coverage = Coverage(self.no_coverage, self.coverage_base,
-                            self.distribution)
+        self.start_profile()
+        try:
+            self.open_writers()
+            if self.jobs > 1 or self.isolate:
+                summary = self.run_parallel(selection, coverage)
+            else:
+                summary = self.run_serial(selection, coverage)
+        finally:
+            self.close_writers()
 
-        for module in modules:
-            module = self.map_module(module)
+        self.collect_dependencies(coverage)
+
+        if summary.stopped:
+            log.warn('Stopped after %d failed tests. Ran %d tests.',
+                     len(summary.failures) + len(summary.errors),
+                     summary.tests_run)
+
+        coverage.combine()
+        self.update_results(summary, coverage)
+
+        total = coverage.report(self.coverage_xml, self.coverage_json,
+                                self.coverage_html)
+        self.report_timings()
+        self.report_profile()
+        if not summary.stopped:
+            self.save_history(selection)
 
-            with coverage:
-                unittest.main(module, argv=sys.argv[:1], exit=False,
-                              verbosity=self.verbose)
+        self.save_dependencies()
+        self.save_failed(summary)
+        self.save_results()
+        self.save_collector()
 
-        coverage.report()
+        if not summary.was_successful():
+            raise TestsFailedException(len(summary.failures),
+                                       len(summary.errors))
 
+        if self.fail_under is not None and total is not None and \
+           total < self.fail_under:
+            raise CoverageThresholdException(total, self.fail_under)
@@ -0,0 +1,145 @@
+import os
+import sys
+import time
+import json
+import unittest
+
+_TIMED_PHASES = ('setUp', 'tearDown')
+_NO_PHASE = {'wall': 0.0, 'cpu': 0.0}
+
+def _cpu_time():
+    times = os.times()
+    return times[0] + times[1]
+
+class Timer(object):
+    def __init__(self):
+        self.wall = 0.0
+        self.cpu = 0.0
+
+    def start(self):
+        self.__wall = time.time()
+        self.__cpu = _cpu_time()
+        return self
+
+    def stop(self):
+        self.wall += time.time() - self.__wall
+        self.cpu += _cpu_time() - self.__cpu
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+class Timings(object):
+    def __init__(self):
+        self.tests = {}
+        self.modules = {}
+
+    def add_module(self, name, timer):
+        self.modules[name] = {'wall': timer.wall, 'cpu': timer.cpu}
+
+    def add_test(self, name, timer, phases=None, module=None):
+        record = {'wall': timer.wall, 'cpu': timer.cpu}
+        if module:
+            record['module'] = module
+
+        if phases:
+            for phase, phase_timer in phases.iteritems():
+                record[phase] = {'wall': phase_timer.wall,
+                                 'cpu': phase_timer.cpu}
+
+        self.tests[name] = record
+
+    def update(self, other):
+        self.tests.update(other.tests)
+        self.modules.update(other.modules)
+
+    def module_durations(self):
+        durations = dict((name, record['wall']) \
+                         for name, record in self.modules.iteritems())
+        for record in self.tests.itervalues():
+            module = record.get('module')
+            if module:
+                durations[module] = durations.get(module, 0.0) + record['wall']
+
+        return durations
+
+    @staticmethod
+    def slowest(records, count):
+        return sorted(records.iteritems(),
+                      key=lambda item: item[1]['wall'], reverse=True)[:count]
+
+    def format_report(self, count):
+        yield '\nSlowest tests (wall, cpu, setUp wall, setUp cpu, ' \
+              'tearDown wall, tearDown cpu):'
+        for name, record in self.slowest(self.tests, count):
+            set_up = record.get('setUp', _NO_PHASE)
+            tear_down = record.get('tearDown', _NO_PHASE)
+            yield '%9.3fs %9.3fs %9.3fs %9.3fs %9.3fs %9.3fs  %s' % \
+                  (record['wall'], record['cpu'], set_up['wall'],
+                   set_up['cpu'], tear_down['wall'], tear_down['cpu'], name)
+
+        yield '\nSlowest test module imports (wall, cpu):'
+        for name, record in self.slowest(self.modules, count):
+            yield '%9.3fs %9.3fs  %s' % (record['wall'], record['cpu'], name)
+
+    def dump(self, path):
+        with open(path, 'w') as stream:
+            json.dump({'tests': self.tests, 'modules': self.modules}, stream,
+                      indent=1, sort_keys=True)
+
+def import_module(name, timings=None):
+    # Import of an already timed module costs nothing and would hide the
+    # time of its first import
+    if timings is None or name in timings.modules:
+        __import__(name)
+    else:
+        timer = Timer()
+        try:
+            with timer:
+                __import__(name)
+        finally:
+            timings.add_module(name, timer)
+
+    return sys.modules[name]
+
+class TimingResult(unittest.TextTestResult):
+    def __init__(self, timings, *args, **kwargs):
+        super(TimingResult, self).__init__(*args, **kwargs)
+
+        self.timings = timings
+        self.__timer = None
+        self.__phases = {}
+
+    def __time_phase(self, test, phase):
+        method = getattr(test, phase)
+        timer = self.__phases[phase] = Timer()
+
+        def timed(*args, **kwargs):
+            with timer:
+                return method(*args, **kwargs)
+
+        setattr(test, phase, timed)
+
+    def startTest(self, test):
+        super(TimingResult, self).startTest(test)
+
+        self.__phases = {}
+        if isinstance(test, unittest.TestCase):
+            for phase in _TIMED_PHASES:
+                self.__time_phase(test, phase)
+
+        self.__timer = Timer().start()
+
+    def stopTest(self, test):
+        self.__timer.stop()
+
+        for phase in self.__phases:
+            if phase in test.__dict__:
+                delattr(test, phase)
+
+        self.timings.add_test(test.id(), self.__timer, self.__phases,
+                              type(test).__module__)
+
+        super(TimingResult, self).stopTest(test)
@@ -0,0 +1,106 @@
+import re
+import json
+import time
+import functools
+
+from xml.sax.saxutils import escape, quoteattr
+
+_OUTCOMES = (('addSuccess', 'success', None),
+             ('addFailure', 'failure', 'failures'),
+             ('addError', 'error', 'errors'),
+             ('addSkip', 'skipped', 'skipped'),
+             ('addExpectedFailure', 'expected_failure', 'expectedFailures'),
+             ('addUnexpectedSuccess', 'unexpected_success', None))
+
+_JUNIT_ELEMENTS = {'failure': 'failure',
+                   'error': 'error',
+                   'skipped': 'skipped',
+                   'expected_failure': 'skipped'}
+
+_INVALID_XML_CHARACTERS = re.compile(u'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+def _text(value):
+    if isinstance(value, bytes):
+        value = value.decode('utf-8', 'replace')
+
+    return value
+
+def _xml_text(value):
+    return _INVALID_XML_CHARACTERS.sub(u'\ufffd', _text(value))
+
+def make_record(name, outcome, duration, message=None):
+    record = {'id': _text(name), 'outcome': outcome,
+              'time': round(duration, 6)}
+    if message:
+        record['message'] = _text(message)
+
+    return record
+
+class ResultRecorder(object):
+    def __init__(self, write):
+        self.write = write
+        self.test = None
+        self.start = 0.0
+
+    def attach(self, result):
+        self.wrap(result, 'startTest', self.started)
+        for method_name, outcome, attribute in _OUTCOMES:
+            self.wrap(result, method_name,
+                      functools.partial(self.recorded, result, outcome,
+                                        attribute))
+
+    def wrap(self, result, method_name, hook):
+        method = getattr(result, method_name)
+
+        def wrapped(test, *args, **kwargs):
+            method(test, *args, **kwargs)
+            hook(test)
+
+        setattr(result, method_name, wrapped)
+
+    def started(self, test):
+        self.test = test
+        self.start = time.time()
+
+    def recorded(self, result, outcome, attribute, test):
+        duration = time.time() - self.start if test is self.test else 0.0
+        message = getattr(result, attribute)[-1][1] if attribute else None
+        self.write(make_record(test.id(), outcome, duration, message))
+
+class JsonLinesWriter(object):
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, record):
+        self.stream.write(json.dumps(record, sort_keys=True) + '\n')
+        self.stream.flush()
+
+    def close(self):
+        self.stream.close()
+
+class JUnitXmlWriter(object):
+    def __init__(self, stream):
+        self.stream = stream
+        self.stream.write(u'<?xml version="1.0" encoding="utf-8"?>\n'
+                          u'<testsuite name="distcovery">\n')
+
+    def write(self, record):
+        classname, separator, name = record['id'].rpartition('.')
+        self.stream.write(u'<testcase classname=%s name=%s time="%.6f"' % \
+                          (quoteattr(_xml_text(classname)),
+                           quoteattr(_xml_text(name)), record['time']))
+
+        element = _JUNIT_ELEMENTS.get(record['outcome'])
+        if element:
+            self.stream.write(u'>\n<%s>%s</%s>\n</testcase>\n' % \
+                              (element,
+                               escape(_xml_text(record.get('message', u''))),
+                               element))
+        else:
+            self.stream.write(u'/>\n')
+
+        self.stream.flush()
+
+    def close(self):
+        self.stream.write(u'</testsuite>\n')
+        self.stream.close()
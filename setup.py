@@ -3,7 +3,7 @@ import sys
 
 from distutils.core import setup
 
-def get_test_command_class():
+def get_command_classes():
     ''' Import installed distcovery package instead of using it from its source
         location
     '''
@@ -15,13 +15,12 @@ def get_test_command_class():
 
     try:
         from distcovery.test import Test
+        from distcovery.bench import Bench
     except ImportError:
         from distutils import log
         from distutils.cmd import Command
 
-        class Test(Command):
-            description = 'run tests for the package when the package has ' \
-                          'been installed'
+        class NotInstalled(Command):
             user_options = []
 
             def initialize_options(self):
@@ -31,13 +30,23 @@ def get_test_command_class():
                 pass
 
             def run(self):
-                log.warn('Install the package to run tests')
+                log.warn('Install the package to run %s' % self.subject)
+
+        class Test(NotInstalled):
+            description = 'run tests for the package when the package has ' \
+                          'been installed'
+            subject = 'tests'
+
+        class Bench(NotInstalled):
+            description = 'run benchmarks for the package when the package ' \
+                          'has been installed'
+            subject = 'benchmarks'
 
     finally:
         if is_first_path_cwd:
             sys.path.insert(0, first_path)
 
-    return Test
+    return {'test': Test, 'bench': Bench}
 
 setup(name='Distcovery',
       version='0.0.1',
@@ -52,5 +61,5 @@ setup(name='Distcovery',
       packages=['distcovery'],
       license='MIT',
       platforms=('Linux', 'Darwin'),
-      cmdclass={'test': get_test_command_class()})
+      cmdclass=get_command_classes())
 
@@ -0,0 +1,107 @@
+import unittest
+import os
+import subprocess
+import tempfile
+
+# Reload module to run its global section under coverage supervision
+import distcovery.affected
+reload(distcovery.affected)
+
+from distcovery.exceptions import ChangedFilesException
+from distcovery.affected import changed_files, relative_path, Dependencies
+
+class _MockProcess(object):
+    def __init__(self, returncode, output, error):
+        self.returncode = returncode
+        self.output = output
+        self.error = error
+
+    def communicate(self):
+        return self.output, self.error
+
+class TestChangedFiles(unittest.TestCase):
+    def setUp(self):
+        super(TestChangedFiles, self).setUp()
+
+        self.__popen = subprocess.Popen
+        self.arguments = []
+
+    def tearDown(self):
+        subprocess.Popen = self.__popen
+
+        super(TestChangedFiles, self).tearDown()
+
+    def mock_popen(self, process):
+        def popen(*args, **kwargs):
+            self.arguments.append(args)
+            return process
+
+        subprocess.Popen = popen
+
+    def test_file_list(self):
+        handle, path = tempfile.mkstemp()
+        try:
+            os.write(handle, 'pkg/first.py\n\n  pkg/second.py  \n')
+            os.close(handle)
+
+            self.assertEqual(changed_files(path),
+                             set(['pkg/first.py', 'pkg/second.py']))
+        finally:
+            os.remove(path)
+
+    def test_git(self):
+        self.mock_popen(_MockProcess(0, 'pkg/first.py\ntest/test_first.py\n',
+                                     ''))
+
+        self.assertEqual(changed_files('HEAD~1'),
+                         set(['pkg/first.py', 'test/test_first.py']))
+        self.assertEqual(self.arguments,
+                         [(['git', 'diff', '--name-only', 'HEAD~1'],)])
+
+    def test_git_failed(self):
+        self.mock_popen(_MockProcess(128, '', 'bad revision\n'))
+
+        with self.assertRaises(ChangedFilesException) as ctx:
+            changed_files('xxx')
+
+        self.assertEqual(ctx.exception.message,
+                         ChangedFilesException.template % \
+                         {'since': 'xxx', 'error': 'bad revision'})
+
+class TestRelativePath(unittest.TestCase):
+    def test_relative_path(self):
+        base = os.path.abspath('build')
+        self.assertEqual(relative_path(os.path.join(base, 'pkg', 'first.py'),
+                                       (None, base, '.')),
+                         'pkg/first.py')
+        self.assertEqual(relative_path(os.path.join('test', 'test_first.py'),
+                                       (base, '.')),
+                         'test/test_first.py')
+
+class TestDependencies(unittest.TestCase):
+    def test_update(self):
+        dependencies = Dependencies({'first': ['pkg/first.py']})
+        dependencies.update('first', ['pkg/first.py', 'pkg/first.py'])
+        self.assertFalse(dependencies.changed)
+
+        dependencies.update('second', ['pkg/second.py', 'pkg/first.py'])
+        self.assertTrue(dependencies.changed)
+        self.assertEqual(dependencies.files,
+                         {'first': ['pkg/first.py'],
+                          'second': ['pkg/first.py', 'pkg/second.py']})
+
+    def test_affected(self):
+        dependencies = Dependencies({'first': ['pkg/first.py'],
+                                     'second': ['pkg/second.py',
+                                                'test/test_second.py']})
+        aliases = ['first', 'second', 'third']
+
+        self.assertEqual(dependencies.affected(aliases, ['src/pkg/first.py']),
+                         ['first', 'third'])
+        self.assertEqual(dependencies.affected(aliases,
+                                               ['test/test_second.py']),
+                         ['second', 'third'])
+        self.assertEqual(dependencies.affected(aliases, ['README']), ['third'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,276 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import StringIO
+from distutils import log
+from distutils.dist import Distribution
+
+# Reload module to run its global section under coverage supervision
+import distcovery.bench
+reload(distcovery.bench)
+
+from distcovery.exceptions import NoBenchmarkModulesException, \
+                                  UnknownModulesException, \
+                                  InvalidOptionValue, \
+                                  BenchmarksRegressedException
+from distcovery.cache import Cache
+from distcovery.bench import percentile, summarize, time_calls, calibrate, \
+                             measure, format_time, regressed, Bench
+
+_SAMPLE_SOURCE = 'calls = []\n' \
+                 'def setUpModule():\n' \
+                 '    calls.append("setUp")\n' \
+                 'def tearDownModule():\n' \
+                 '    calls.append("tearDown")\n' \
+                 'def bench_first():\n' \
+                 '    calls.append("first")\n' \
+                 'def bench_second():\n' \
+                 '    pass\n' \
+                 'def helper():\n' \
+                 '    pass\n'
+
+_INNER_SOURCE = 'from os.path import join as bench_imported\n' \
+                'def bench_inner():\n' \
+                '    pass\n'
+
+_SAMPLE_MODULES = ('bench_sample', 'bench_sub', 'bench_sub.bench_inner')
+
+class _Timer(object):
+    def __init__(self, step):
+        self.step = step
+        self.now = 0.0
+
+    def __call__(self):
+        self.now += self.step
+        return self.now
+
+class TestStatistics(unittest.TestCase):
+    def test_percentile(self):
+        self.assertEqual(percentile([3.0, 1.0, 2.0], 0.5), 2.0)
+        self.assertEqual(percentile([4.0, 1.0, 3.0, 2.0], 0.5), 2.5)
+        self.assertEqual(percentile([1.0, 2.0, 3.0, 4.0, 5.0], 0.25), 2.0)
+        self.assertEqual(percentile([7.0], 0.75), 7.0)
+
+    def test_summarize(self):
+        self.assertEqual(summarize([0.5, 0.25, 0.75, 1.0, 0.5]),
+                         {'median': 0.5, 'iqr': 0.25, 'ops': 2.0})
+        self.assertIsNone(summarize([0.0])['ops'])
+
+    def test_format_time(self):
+        self.assertEqual(format_time(1.5), '1.500s')
+        self.assertEqual(format_time(0.0025), '2.500ms')
+        self.assertEqual(format_time(3e-6), '3.000us')
+        self.assertEqual(format_time(0.0), '0.000ns')
+
+    def test_regressed(self):
+        baseline = {'median': 1.0}
+        self.assertFalse(regressed({'median': 1.05}, baseline, 10.0))
+        self.assertTrue(regressed({'median': 1.2}, baseline, 10.0))
+
+class TestMeasure(unittest.TestCase):
+    def test_time_calls(self):
+        calls = []
+        self.assertEqual(time_calls(lambda: calls.append(None), 3,
+                                    _Timer(1.0)), 1.0)
+        self.assertEqual(len(calls), 3)
+
+    def test_calibrate(self):
+        self.assertEqual(calibrate(lambda: None, 0.0, _Timer(1.0)), 1)
+
+        times = iter([0.0, 0.04, 1.0, 1.4])
+        self.assertEqual(calibrate(lambda: None, 0.1, lambda: next(times)),
+                         10)
+
+    def test_measure(self):
+        calls = []
+        result = measure(lambda: calls.append(None), 2, 3, 0.0, _Timer(1.0))
+        self.assertEqual(result, {'median': 1.0, 'iqr': 0.0, 'ops': 1.0,
+                                  'number': 1})
+        self.assertEqual(len(calls), 6)
+
+class TestBench(unittest.TestCase):
+    def setUp(self):
+        super(TestBench, self).setUp()
+
+        self.__threshold = log.set_threshold(log.INFO)
+
+        self.__stdout = sys.stdout
+        self.stdout = StringIO.StringIO()
+        sys.stdout = self.stdout
+
+        self.__measure = distcovery.bench.measure
+
+        self.__cwd = os.getcwd()
+        self.directory = tempfile.mkdtemp()
+        os.chdir(self.directory)
+
+        self.write(os.path.join('benchmarks', 'bench_sample.py'),
+                   _SAMPLE_SOURCE)
+        self.write(os.path.join('benchmarks', 'bench_sub', '__init__.py'), '')
+        self.write(os.path.join('benchmarks', 'bench_sub',
+                                'bench_inner.py'), _INNER_SOURCE)
+        self.write(os.path.join('benchmarks', 'helper.py'), '')
+
+    def tearDown(self):
+        for name in _SAMPLE_MODULES:
+            sys.modules.pop(name, None)
+
+        os.chdir(self.__cwd)
+        shutil.rmtree(self.directory)
+
+        distcovery.bench.measure = self.__measure
+
+        sys.stdout = self.__stdout
+        log.set_threshold(self.__threshold)
+
+        super(TestBench, self).tearDown()
+
+    def write(self, path, source):
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+
+        with open(path, 'w') as stream:
+            stream.write(source)
+
+    def create(self, **options):
+        bench = Bench(Distribution())
+        for name, value in options.iteritems():
+            setattr(bench, name, value)
+
+        bench.finalize_options()
+        return bench
+
+    def mock_measure(self, medians):
+        def measure(function, warmup, repeat, min_time):
+            function()
+            median = medians.get(function.__name__, 1.0)
+            return {'median': median, 'iqr': 0.0, 'ops': 1.0/median,
+                    'number': 1}
+
+        distcovery.bench.measure = measure
+
+    def test_finalize_options(self):
+        bench = self.create()
+        self.assertEqual(bench.root, 'benchmarks')
+        self.assertEqual(bench.prefix, 'bench_')
+        self.assertEqual(bench.warmup, 1)
+        self.assertEqual(bench.repeat, 5)
+        self.assertEqual(bench.threshold, 10.0)
+
+        bench = self.create(warmup='0', repeat='3', min_time='0.5',
+                            threshold='25')
+        self.assertEqual((bench.warmup, bench.repeat, bench.min_time,
+                          bench.threshold), (0, 3, 0.5, 25.0))
+
+        with self.assertRaises(InvalidOptionValue) as ctx:
+            self.create(repeat='0')
+
+        self.assertEqual(ctx.exception.message,
+                         InvalidOptionValue.template % \
+                         {'option': 'repeat', 'value': '0',
+                          'expected': 'positive integer'})
+
+        with self.assertRaises(InvalidOptionValue):
+            self.create(threshold='xxx')
+
+    def test_select_modules(self):
+        bench = self.create()
+        package = bench.collect_benchmarks()
+        self.assertEqual([alias for alias, importable \
+                          in bench.select_modules(package)],
+                         ['sample', 'sub.inner'])
+
+        bench = self.create(module='sub')
+        self.assertEqual([alias for alias, importable \
+                          in bench.select_modules(package)],
+                         ['sub.inner'])
+
+        bench = self.create(module='sample,unknown')
+        with self.assertRaises(UnknownModulesException):
+            bench.select_modules(package)
+
+    def test_collect_benchmarks_empty(self):
+        with self.assertRaises(NoBenchmarkModulesException):
+            self.create(prefix='perf_').collect_benchmarks()
+
+    def test_run(self):
+        bench = self.create(repeat='2', min_time='0')
+        bench.run()
+
+        self.assertEqual(sys.modules['bench_sample'].calls[0], 'setUp')
+        self.assertEqual(sys.modules['bench_sample'].calls[-1], 'tearDown')
+        self.assertNotIn(os.path.abspath('benchmarks'), sys.path)
+
+        baseline = Cache('.distcovery').load('baseline')
+        self.assertEqual(sorted(baseline),
+                         ['sample:bench_first', 'sample:bench_second',
+                          'sub.inner:bench_inner'])
+        self.assertEqual(self.stdout.getvalue().count(' new  '), 3)
+
+    def test_run_regressed(self):
+        self.mock_measure({})
+        self.create().run()
+
+        self.mock_measure({'bench_first': 1.05, 'bench_second': 1.5})
+        with self.assertRaises(BenchmarksRegressedException) as ctx:
+            self.create().run()
+
+        self.assertEqual(ctx.exception.message,
+                         'Regressed benchmark: "sample:bench_second".')
+        self.assertIn('+50.0%', self.stdout.getvalue())
+        self.assertEqual(Cache('.distcovery').load('baseline') \
+                             ['sample:bench_second']['median'], 1.0)
+
+    def test_run_save_baseline(self):
+        self.mock_measure({})
+        self.create().run()
+
+        self.mock_measure({'bench_second': 1.5})
+        self.create(save_baseline=True).run()
+
+        self.assertEqual(Cache('.distcovery').load('baseline') \
+                             ['sample:bench_second']['median'], 1.5)
+
+class TestRepositoryBenchmarks(unittest.TestCase):
+    def setUp(self):
+        super(TestRepositoryBenchmarks, self).setUp()
+
+        self.__cwd = os.getcwd()
+        os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+        self.root = os.path.abspath('benchmarks')
+        sys.path.insert(0, self.root)
+
+    def tearDown(self):
+        for name in ('bench_walk', 'bench_importer'):
+            sys.modules.pop(name, None)
+
+        sys.path.remove(self.root)
+        os.chdir(self.__cwd)
+
+        super(TestRepositoryBenchmarks, self).tearDown()
+
+    def test_find_benchmarks(self):
+        bench = Bench(Distribution())
+        bench.finalize_options()
+        selection = bench.select_modules(bench.collect_benchmarks())
+        self.assertEqual([alias for alias, importable in selection],
+                         ['importer', 'walk'])
+
+        found = []
+        for alias, importable in selection:
+            name = importable.join_sequence(importable.name)
+            __import__(name)
+            module = sys.modules[name]
+            found.extend('%s:%s' % (alias, name) \
+                         for name, function in bench.find_benchmarks(module))
+
+        self.assertEqual(found, ['importer:bench_builder',
+                                 'importer:bench_legacy',
+                                 'walk:bench_legacy', 'walk:bench_listdir',
+                                 'walk:bench_scandir'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+import os
+import shutil
+import tempfile
+
+# Reload module to run its global section under coverage supervision
+import distcovery.cache
+reload(distcovery.cache)
+
+from distcovery.cache import Cache
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        super(TestCache, self).setUp()
+
+        self.root = tempfile.mkdtemp()
+        self.directory = os.path.join(self.root, 'cache')
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+        super(TestCache, self).tearDown()
+
+    def test_creation(self):
+        cache = Cache(self.directory)
+        self.assertEqual(cache.directory, self.directory)
+
+    def test_path(self):
+        cache = Cache(self.directory)
+        self.assertEqual(cache.path('index'),
+                         os.path.join(self.directory, 'index'))
+
+    def test_load_missing(self):
+        cache = Cache(self.directory)
+        self.assertEqual(cache.load('index'), None)
+        self.assertEqual(cache.load('index', {}), {})
+
+    def test_load_corrupted(self):
+        os.makedirs(self.directory)
+        with open(os.path.join(self.directory, 'index'), 'w') as stream:
+            stream.write('{')
+
+        cache = Cache(self.directory)
+        self.assertEqual(cache.load('index', {}), {})
+
+    def test_save(self):
+        cache = Cache(self.directory)
+        cache.save('index', {'test': [1.5, True, ['test_first.py'], []]})
+        cache.save('index', {'test': [2.5, True, ['test_first.py'], []]})
+
+        self.assertEqual(os.listdir(self.directory), ['index'])
+        self.assertEqual(Cache(self.directory).load('index'),
+                         {'test': [2.5, True, ['test_first.py'], []]})
+
+if __name__ == '__main__':
+    unittest.main()
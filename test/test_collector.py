@@ -0,0 +1,96 @@
+import unittest
+import os
+import shutil
+import tempfile
+
+# Reload module to run its global section under coverage supervision
+import distcovery.collector
+reload(distcovery.collector)
+
+from distcovery.collector import parse_tests, Collector
+
+_SAMPLE_SOURCE = 'import unittest\n' \
+                 'class Mixin(object):\n' \
+                 '    def test_mixed(self):\n' \
+                 '        pass\n' \
+                 'class First(Mixin, unittest.TestCase):\n' \
+                 '    def test_second(self):\n' \
+                 '        pass\n' \
+                 '    def test_first(self):\n' \
+                 '        pass\n' \
+                 '    def helper(self):\n' \
+                 '        pass\n' \
+                 'class Second(First):\n' \
+                 '    def test_third(self):\n' \
+                 '        pass\n' \
+                 'class Third(BaseTestCase):\n' \
+                 '    def runTest(self):\n' \
+                 '        pass\n' \
+                 'class Empty(unittest.TestCase):\n' \
+                 '    pass\n' \
+                 'class NotTest(object):\n' \
+                 '    def test_nothing(self):\n' \
+                 '        pass\n'
+
+class TestCollector(unittest.TestCase):
+    def setUp(self):
+        super(TestCollector, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'test_sample.py')
+        self.write(_SAMPLE_SOURCE)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        super(TestCollector, self).tearDown()
+
+    def write(self, source, mtime=1.0):
+        with open(self.path, 'w') as stream:
+            stream.write(source)
+
+        os.utime(self.path, (mtime, mtime))
+
+    def test_parse_tests(self):
+        self.assertEqual(parse_tests(self.path),
+                         [['First', ['test_first', 'test_mixed',
+                                     'test_second']],
+                          ['Second', ['test_first', 'test_mixed',
+                                      'test_second', 'test_third']],
+                          ['Third', ['runTest']]])
+
+    def test_tests(self):
+        collector = Collector()
+        self.assertEqual(len(collector.tests(self.path)), 3)
+        self.assertTrue(collector.changed)
+
+        collector = Collector(collector.files)
+        self.write('')
+        self.assertEqual(len(collector.tests(self.path)), 3)
+        self.assertFalse(collector.changed)
+
+        self.write('', 2.0)
+        self.assertEqual(collector.tests(self.path), [])
+        self.assertTrue(collector.changed)
+
+    def test_tests_invalid(self):
+        self.write('class (')
+        self.assertEqual(Collector().tests(self.path), [])
+        self.assertEqual(Collector().tests(self.path + '.missing'), [])
+
+    def test_contains(self):
+        collector = Collector()
+        self.assertTrue(collector.contains(self.path, 'Second'))
+        self.assertTrue(collector.contains(self.path, 'Second', 'test_mixed'))
+        self.assertFalse(collector.contains(self.path, 'Third', 'test_mixed'))
+        self.assertFalse(collector.contains(self.path, 'NotTest'))
+
+    def test_prune(self):
+        collector = Collector({'missing.py': [1.0, []]})
+        collector.tests(self.path)
+        collector.changed = False
+
+        collector.prune([self.path])
+        self.assertEqual(list(collector.files), [self.path])
+        self.assertTrue(collector.changed)
+
+if __name__ == '__main__':
+    unittest.main()
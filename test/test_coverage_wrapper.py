@@ -11,7 +11,9 @@ import distcovery.coverage_wrapper
 reload(distcovery.coverage_wrapper)
 
 from distcovery.coverage_wrapper import _DummyCoverage, Coverage, \
-                                        _NO_COVERAGE_PACKAGE_WARNING
+                                        _NO_COVERAGE_PACKAGE_WARNING, \
+                                        _NO_JSON_REPORT_WARNING, \
+                                        _NO_CONTEXTS_WARNING
 
 class _MockDistribution(object):
     def __init__(self, py_modules=None, packages=None):
@@ -35,6 +37,18 @@ class Test_DummyCoverage(unittest.TestCase):
         coverage = _DummyCoverage()
         self.assertEqual(coverage.report(), None)
 
+    def test_erase(self):
+        coverage = _DummyCoverage()
+        self.assertEqual(coverage.erase(), None)
+
+    def test_save(self):
+        coverage = _DummyCoverage()
+        self.assertEqual(coverage.save(), None)
+
+    def test_combine(self):
+        coverage = _DummyCoverage()
+        self.assertEqual(coverage.combine(), None)
+
 class _MockCoverageModule(object):
     def __init__(self, coverage):
         self.coverage = coverage
@@ -44,6 +58,10 @@ class _MockCoverage(object):
         self.creations = []
         self.starts = 0
         self.stops = 0
+        self.erases = 0
+        self.saves = 0
+        self.combines = 0
+        self.reports = []
 
     def __call__(self, *args, **kwargs):
         self.creations.append((args, kwargs))
@@ -55,8 +73,53 @@ class _MockCoverage(object):
     def stop(self):
         self.stops += 1
 
+    def erase(self):
+        self.erases += 1
+
+    def save(self):
+        self.saves += 1
+
+    def combine(self):
+        self.combines += 1
+
     def report(self):
         print '\tThe report'
+        return 75.0
+
+    def xml_report(self, outfile):
+        self.reports.append(('xml', outfile))
+
+    def json_report(self, outfile):
+        self.reports.append(('json', outfile))
+
+    def html_report(self, directory):
+        self.reports.append(('html', directory))
+
+    def get_data(self):
+        return self
+
+    def measured_files(self):
+        return ['/test/xxx.py']
+
+    def add_lines(self, lines):
+        self.reports.append(('lines', lines))
+
+class _MockContextCoverage(_MockCoverage):
+    def __init__(self):
+        super(_MockContextCoverage, self).__init__()
+        self.contexts = []
+
+    def switch_context(self, name):
+        self.contexts.append(name)
+
+    def measured_files(self):
+        return ['/test/xxx.py', '/test/yyy.py']
+
+    def contexts_by_lineno(self, path):
+        if path == '/test/xxx.py':
+            return {1: ['first'], 2: ['first', 'second']}
+
+        return {1: ['second']}
 
 class TestCoverage(unittest.TestCase):
     def setUp(self):
@@ -125,6 +188,43 @@ class TestCoverage(unittest.TestCase):
                                            os.path.join('test', 'xxx'),
                                            os.path.join('test', 'yyy')]})])
 
+    def test_creation_parallel(self):
+        self.__coverage = _MockCoverage()
+        __builtin__.__import__ = self.__mock_coverage_import
+
+        coverage = Coverage(False, 'test', _MockDistribution(['xxx']), True)
+        self.assertEqual(self.__coverage.creations,
+                         [((), {'source': [os.path.join('test', 'xxx.py')],
+                                'data_suffix': True})])
+        self.assertEqual(self.__coverage.erases, 1)
+
+    def test_creation_include(self):
+        self.__coverage = _MockCoverage()
+        __builtin__.__import__ = self.__mock_coverage_import
+
+        coverage = Coverage(False, 'test', _MockDistribution(['xxx']), True,
+                            [os.path.join('test', 'xxx.py')])
+        self.assertEqual(self.__coverage.creations,
+                         [((), {'include': [os.path.join('test', 'xxx.py')],
+                                'data_suffix': True})])
+
+    def test_start_worker(self):
+        self.__coverage = _MockCoverage()
+        __builtin__.__import__ = self.__mock_coverage_import
+
+        coverage = Coverage(False, 'test', _MockDistribution(['xxx']), True)
+        finalizer = coverage.start_worker()
+        try:
+            self.assertEqual(len(self.__coverage.creations), 2)
+            self.assertEqual(self.__coverage.stops, 1)
+            self.assertEqual(self.__coverage.starts, 1)
+        finally:
+            finalizer.cancel()
+
+        coverage.stop_worker()
+        self.assertEqual(self.__coverage.stops, 2)
+        self.assertEqual(self.__coverage.saves, 1)
+
     def test_context(self):
         self.__coverage = _MockCoverage()
         __builtin__.__import__ = self.__mock_coverage_import
@@ -145,6 +245,98 @@ class TestCoverage(unittest.TestCase):
         self.assertEqual(self.__coverage.starts, 1)
         self.assertEqual(self.__coverage.stops, 1)
 
+    def test_pause(self):
+        self.__coverage = _MockCoverage()
+        __builtin__.__import__ = self.__mock_coverage_import
+
+        coverage = Coverage(False, 'test', _MockDistribution(['xxx']))
+        with coverage:
+            coverage.pause()
+            self.assertEqual(self.__coverage.stops, 1)
+
+            coverage.resume()
+            self.assertEqual(self.__coverage.starts, 2)
+
+        self.assertEqual(self.__coverage.stops, 2)
+
+    def test_session(self):
+        self.__coverage = _MockContextCoverage()
+        __builtin__.__import__ = self.__mock_coverage_import
+
+        coverage = Coverage(False, 'test', _MockDistribution(['xxx']),
+                            session=True)
+        self.assertTrue(coverage.session)
+
+        coverage.switch_context('first')
+        self.assertEqual(self.__coverage.contexts, ['first'])
+        self.assertEqual(coverage.context_files(),
+                         {'first': set(['/test/xxx.py']),
+                          'second': set(['/test/xxx.py', '/test/yyy.py'])})
+
+    def test_context_lines(self):
+        self.__coverage = _MockContextCoverage()
+        __builtin__.__import__ = self.__mock_coverage_import
+
+        coverage = Coverage(False, 'test', _MockDistribution(['xxx']),
+                            session=True)
+        self.assertTrue(coverage.available)
+        self.assertEqual(coverage.context_lines(),
+                         {'first': {'/test/xxx.py': [1, 2]},
+                          'second': {'/test/xxx.py': [2],
+                                     '/test/yyy.py': [1]}})
+
+        coverage.add_lines({'/test/zzz.py': [3]})
+        coverage.add_lines({})
+        self.assertEqual(self.__coverage.reports,
+                         [('lines', {'/test/zzz.py': [3]})])
+
+    def test_context_lines_coverage_disabled(self):
+        coverage = Coverage(True, '', _MockDistribution(), session=True)
+        self.assertFalse(coverage.available)
+        self.assertIsNone(coverage.context_lines())
+        coverage.add_lines({'/test/zzz.py': [3]})
+
+    def test_session_no_contexts(self):
+        self.__coverage = _MockCoverage()
+        __builtin__.__import__ = self.__mock_coverage_import
+
+        coverage = Coverage(False, 'test', _MockDistribution(['xxx']),
+                            session=True)
+        self.assertFalse(coverage.session)
+        self.assertEqual(self.stderr.getvalue(), _NO_CONTEXTS_WARNING + '\n')
+
+        coverage.switch_context('first')
+        self.assertIsNone(coverage.context_files())
+
+    def test_optional_session(self):
+        self.__coverage = _MockContextCoverage()
+        __builtin__.__import__ = self.__mock_coverage_import
+
+        coverage = Coverage(False, 'test', _MockDistribution(['xxx']),
+                            optional_session=True)
+        self.assertTrue(coverage.session)
+
+        self.__coverage = _MockCoverage()
+        coverage = Coverage(False, 'test', _MockDistribution(['xxx']),
+                            optional_session=True)
+        self.assertFalse(coverage.session)
+        self.assertEqual(self.stderr.getvalue(), '')
+
+    def test_split(self):
+        self.__coverage = _MockCoverage()
+        __builtin__.__import__ = self.__mock_coverage_import
+
+        coverage = Coverage(False, 'test', _MockDistribution(['xxx']), True)
+        self.assertEqual(coverage.split(), ['/test/xxx.py'])
+        self.assertEqual(self.__coverage.stops, 1)
+        self.assertEqual(self.__coverage.saves, 1)
+        self.assertEqual(self.__coverage.starts, 1)
+        self.assertEqual(len(self.__coverage.creations), 2)
+
+    def test_split_coverage_disabled(self):
+        coverage = Coverage(True, '', _MockDistribution())
+        self.assertEqual(coverage.split(), None)
+
     def test_report(self):
         self.__coverage = _MockCoverage()
         __builtin__.__import__ = self.__mock_coverage_import
@@ -154,9 +346,55 @@ class TestCoverage(unittest.TestCase):
         self.assertEqual(self.stdout.getvalue(),
                          '\nCoverage report:\n\tThe report\n')
 
+    def test_report_formats(self):
+        self.__coverage = _MockCoverage()
+        __builtin__.__import__ = self.__mock_coverage_import
+
+        coverage = Coverage(False, 'test', _MockDistribution(['xxx']))
+        self.assertEqual(coverage.report('coverage.xml', 'coverage.json',
+                                         'html'), 75.0)
+        self.assertEqual(self.__coverage.reports,
+                         [('xml', 'coverage.xml'), ('json', 'coverage.json'),
+                          ('html', 'html')])
+
+    def test_report_no_json(self):
+        self.__coverage = _MockCoverage()
+        self.__coverage.json_report = None
+        __builtin__.__import__ = self.__mock_coverage_import
+
+        coverage = Coverage(False, 'test', _MockDistribution(['xxx']))
+        coverage.report(json_file='coverage.json')
+        self.assertEqual(self.__coverage.reports, [])
+        self.assertEqual(self.stderr.getvalue(),
+                         _NO_JSON_REPORT_WARNING + '\n')
+
+    def test_report_parallel(self):
+        self.__coverage = _MockCoverage()
+        __builtin__.__import__ = self.__mock_coverage_import
+
+        coverage = Coverage(False, 'test', _MockDistribution(['xxx']), True)
+        coverage.report()
+        self.assertEqual(self.__coverage.saves, 2)
+        self.assertEqual(self.__coverage.combines, 1)
+        self.assertEqual(self.stdout.getvalue(),
+                         '\nCoverage report:\n\tThe report\n')
+
+    def test_combine(self):
+        self.__coverage = _MockCoverage()
+        __builtin__.__import__ = self.__mock_coverage_import
+
+        coverage = Coverage(False, 'test', _MockDistribution(['xxx']), True)
+        coverage.combine()
+        coverage.report()
+        self.assertEqual(self.__coverage.saves, 2)
+        self.assertEqual(self.__coverage.combines, 1)
+        self.assertEqual(self.__coverage.erases, 2)
+        self.assertEqual(self.__coverage.creations[-1],
+                         ((), {'source': [os.path.join('test', 'xxx.py')]}))
+
     def test_report_coverage_disabled(self):
         coverage = Coverage(True, '', _MockDistribution())
-        coverage.report()
+        self.assertIsNone(coverage.report('coverage.xml'))
         self.assertEqual(self.stdout.getvalue(), '')
 
 if __name__ == '__main__':
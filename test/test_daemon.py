@@ -0,0 +1,146 @@
+import unittest
+import os
+import sys
+import json
+import socket
+import shutil
+import tempfile
+import threading
+import StringIO
+
+from utils import ImportTrash
+
+# Reload module to run its global section under coverage supervision
+import distcovery.daemon
+reload(distcovery.daemon)
+
+from distcovery.daemon import _STATUS_MARKER, _source_path, _mtime, \
+                              _is_submodule, preload, _read_line, Server, \
+                              send_request
+
+def _handler(request):
+    sys.stdout.write('modules: %s\n' % request['module'])
+    return 3
+
+class TestDaemonGlobal(ImportTrash, unittest.TestCase):
+    def test__source_path(self):
+        self.assertEqual(_source_path('test.pyc'), 'test.py')
+        self.assertEqual(_source_path('test.pyo'), 'test.py')
+        self.assertEqual(_source_path('test.py'), 'test.py')
+
+    def test__mtime(self):
+        self.assertEqual(_mtime(__file__), os.path.getmtime(__file__))
+        self.assertEqual(_mtime(__file__ + '.missing'), None)
+
+    def test__is_submodule(self):
+        self.assertTrue(_is_submodule('xxx', ['yyy', 'xxx']))
+        self.assertTrue(_is_submodule('xxx.yyy', ['xxx']))
+        self.assertFalse(_is_submodule('xxxyyy', ['xxx']))
+
+    def test_preload(self):
+        preloaded = preload(['distcovery'])
+        self.assertIn('distcovery', preloaded)
+        self.assertIn('distcovery.daemon', preloaded)
+
+        path, mtime = preloaded['distcovery.daemon']
+        self.assertTrue(path.endswith('daemon.py'))
+        self.assertEqual(mtime, _mtime(path))
+
+    def test__read_line(self):
+        server, client = socket.socketpair()
+        try:
+            client.sendall('{"module": null}\n')
+            self.assertEqual(_read_line(server), '{"module": null}\n')
+        finally:
+            client.close()
+            server.close()
+
+class TestServer(ImportTrash, unittest.TestCase):
+    def test_creation(self):
+        server = Server('socket', _handler)
+        self.assertEqual(server.path, 'socket')
+        self.assertEqual(server.handler, _handler)
+        self.assertEqual(server.preloaded, {})
+        self.assertFalse(server.reimport)
+
+    def test_purge(self):
+        sys.modules['distcovery_test_preloaded'] = sys
+        self.modules_trash.append('distcovery_test_preloaded')
+
+        server = Server('socket', _handler,
+                        {'distcovery_test_preloaded': (__file__,
+                                                       _mtime(__file__))},
+                        True)
+        server.purge()
+        self.assertNotIn('distcovery_test_preloaded', sys.modules)
+
+    def test_purge_stale(self):
+        sys.modules['distcovery_test_stale'] = sys
+        self.modules_trash.append('distcovery_test_stale')
+
+        server = Server('socket', _handler,
+                        {'distcovery_test_stale': (__file__,
+                                                   _mtime(__file__))})
+        self.assertFalse(server.purge_stale())
+        self.assertIn('distcovery_test_stale', sys.modules)
+
+        server.preloaded['distcovery_test_stale'] = (__file__, 0)
+        self.assertTrue(server.purge_stale())
+        self.assertNotIn('distcovery_test_stale', sys.modules)
+
+    def test_handle(self):
+        server, client = socket.socketpair()
+        try:
+            client.sendall(json.dumps({'module': 'first'}) + '\n')
+            Server('socket', _handler).handle(server)
+            server.close()
+
+            data = ''
+            while True:
+                chunk = client.recv(4096)
+                if not chunk:
+                    break
+
+                data += chunk
+        finally:
+            client.close()
+
+        self.assertEqual(data, 'modules: first\n%s3\n' % _STATUS_MARKER)
+
+class TestSendRequest(unittest.TestCase):
+    def setUp(self):
+        super(TestSendRequest, self).setUp()
+
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'socket')
+
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.listener.bind(self.path)
+        self.listener.listen(1)
+
+    def tearDown(self):
+        self.listener.close()
+        shutil.rmtree(self.directory)
+
+        super(TestSendRequest, self).tearDown()
+
+    def __serve(self):
+        connection, address = self.listener.accept()
+        try:
+            Server(self.path, _handler).handle(connection)
+        finally:
+            connection.close()
+
+    def test_send_request(self):
+        thread = threading.Thread(target=self.__serve)
+        thread.start()
+
+        stream = StringIO.StringIO()
+        status = send_request(self.path, {'module': 'first,second'}, stream)
+        thread.join()
+
+        self.assertEqual(status, 3)
+        self.assertEqual(stream.getvalue(), 'modules: first,second\n')
+
+if __name__ == '__main__':
+    unittest.main()
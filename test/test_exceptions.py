@@ -1,12 +1,21 @@
 import unittest
 
+from distutils.errors import DistutilsError
+
 # Reload module to run its global section under coverage supervision
 import distcovery.exceptions
 reload(distcovery.exceptions)
 
 from distcovery.exceptions import DistcoveryException, NoMoreAttempts, \
                                   InvalidTestRoot, NoTestModulesException, \
-                                  UnknownModulesException
+                                  UnknownModulesException, \
+                                  InvalidOptionValue, TestsFailedException, \
+                                  RemoteTestsFailedException, \
+                                  UnknownTestsException, \
+                                  ChangedFilesException, \
+                                  CoverageThresholdException, \
+                                  NoBenchmarkModulesException, \
+                                  BenchmarksRegressedException
 
 class TestDistcoveryException(unittest.TestCase):
     def test_raise(self):
@@ -22,6 +31,15 @@ class TestDistcoveryException(unittest.TestCase):
 
         self.assertEqual(ctx.exception.message, 'xxx yyy zzz')
 
+    def test_stringify_list_single_item(self):
+        self.assertEqual(DistcoveryException.stringify_list(['xxx']),
+                         ('"xxx"', ''))
+
+    def test_stringify_list_muliple_items(self):
+        self.assertEqual(DistcoveryException. \
+                             stringify_list(['xxx', 'yyy', 'zzz']),
+                         ('"xxx", "yyy" and "zzz"', 's'))
+
 class TestNoMoreAttempts(unittest.TestCase):
     def test_raise_single_limit(self):
         with self.assertRaises(NoMoreAttempts) as ctx:
@@ -77,14 +95,85 @@ class TestUnknownModulesException(unittest.TestCase):
                          UnknownModulesException.template % \
                          {'modules': modules, 'suffix': suffix})
 
-    def test_stringify_list_single_module(self):
-        self.assertEqual(UnknownModulesException.stringify_list(['xxx']),
-                         ('"xxx"', ''))
+class TestInvalidOptionValue(unittest.TestCase):
+    def test_raise(self):
+        with self.assertRaises(InvalidOptionValue) as ctx:
+            raise InvalidOptionValue('jobs', 'x', 'positive integer')
 
-    def test_stringify_list_muliple_modules(self):
-        self.assertEqual(UnknownModulesException. \
-                             stringify_list(['xxx', 'yyy', 'zzz']),
-                         ('"xxx", "yyy" and "zzz"', 's'))
+        self.assertEqual(ctx.exception.message,
+                         InvalidOptionValue.template % \
+                         {'option': 'jobs', 'value': 'x',
+                          'expected': 'positive integer'})
+
+class TestTestsFailedException(unittest.TestCase):
+    def test_raise(self):
+        with self.assertRaises(TestsFailedException) as ctx:
+            raise TestsFailedException(2, 1)
+
+        self.assertEqual(ctx.exception.message,
+                         TestsFailedException.template % \
+                         {'failures': 2, 'errors': 1})
+        self.assertIsInstance(ctx.exception, DistutilsError)
+
+class TestRemoteTestsFailedException(unittest.TestCase):
+    def test_raise(self):
+        with self.assertRaises(RemoteTestsFailedException) as ctx:
+            raise RemoteTestsFailedException('socket', 1)
+
+        self.assertEqual(ctx.exception.message,
+                         RemoteTestsFailedException.template % \
+                         {'path': 'socket', 'status': 1})
+        self.assertIsInstance(ctx.exception, DistutilsError)
+
+class TestUnknownTestsException(unittest.TestCase):
+    def test_raise(self):
+        with self.assertRaises(UnknownTestsException) as ctx:
+            raise UnknownTestsException(['xxx:Test'])
+
+        self.assertEqual(ctx.exception.message,
+                         'Unknown test: "xxx:Test".')
+
+    def test_inheritance(self):
+        self.assertTrue(issubclass(UnknownTestsException,
+                                   UnknownModulesException))
+
+class TestChangedFilesException(unittest.TestCase):
+    def test_raise(self):
+        with self.assertRaises(ChangedFilesException) as ctx:
+            raise ChangedFilesException('HEAD', 'bad revision')
+
+        self.assertEqual(ctx.exception.message,
+                         ChangedFilesException.template % \
+                         {'since': 'HEAD', 'error': 'bad revision'})
+
+class TestCoverageThresholdException(unittest.TestCase):
+    def test_raise(self):
+        with self.assertRaises(CoverageThresholdException) as ctx:
+            raise CoverageThresholdException(79.5, 80)
+
+        self.assertEqual(ctx.exception.message,
+                         'Total coverage 79.50% is below the required ' \
+                         '80.00%.')
+
+class TestNoBenchmarkModulesException(unittest.TestCase):
+    def test_raise(self):
+        with self.assertRaises(NoBenchmarkModulesException) as ctx:
+            raise NoBenchmarkModulesException('benchmarks', 'bench_')
+
+        self.assertEqual(ctx.exception.message,
+                         NoBenchmarkModulesException.template % \
+                         {'path': 'benchmarks', 'prefix': 'bench_'})
+
+class TestBenchmarksRegressedException(unittest.TestCase):
+    def test_raise(self):
+        with self.assertRaises(BenchmarksRegressedException) as ctx:
+            raise BenchmarksRegressedException(['walk:bench_walk',
+                                                'importer:bench_load'])
+
+        self.assertEqual(ctx.exception.message,
+                         'Regressed benchmarks: "walk:bench_walk" and ' \
+                         '"importer:bench_load".')
+        self.assertNotIsInstance(ctx.exception, UnknownModulesException)
 
 if __name__ == '__main__':
     unittest.main()
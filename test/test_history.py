@@ -0,0 +1,69 @@
+import unittest
+import StringIO
+
+# Reload module to run its global section under coverage supervision
+import distcovery.history
+reload(distcovery.history)
+
+from distcovery.history import History, Progress
+
+class TestHistory(unittest.TestCase):
+    def test_creation(self):
+        history = History()
+        self.assertEqual(history.durations, {})
+        self.assertFalse(history.changed)
+
+    def test_estimate(self):
+        self.assertEqual(History().estimate('first'), 0.0)
+
+        history = History({'first': 1.0, 'second': 3.0})
+        self.assertEqual(history.estimate('first'), 1.0)
+        self.assertEqual(history.estimate('third'), 2.0)
+
+    def test_update(self):
+        history = History({'first': 1.0})
+        history.update({'first': 1.0})
+        self.assertFalse(history.changed)
+
+        history.update({'first': 1.5, 'second': 2.0})
+        self.assertTrue(history.changed)
+        self.assertEqual(history.durations, {'first': 1.5, 'second': 2.0})
+
+    def test_order(self):
+        history = History({'first': 1.0, 'second': 3.0, 'third': 3.0})
+        aliases = ['third', 'fourth', 'second', 'first']
+
+        self.assertEqual(history.order(aliases, 'shortest'),
+                         ['first', 'fourth', 'second', 'third'])
+        self.assertEqual(history.order(aliases, 'longest'),
+                         ['second', 'third', 'fourth', 'first'])
+
+    def test_partition(self):
+        aliases = ['first', 'second', 'third', 'fourth', 'fifth']
+
+        self.assertEqual(History().partition(aliases, 2),
+                         [['fifth', 'fourth', 'third'], ['first', 'second']])
+
+        history = History({'first': 5.0, 'second': 3.0, 'third': 1.0,
+                           'fourth': 1.0, 'fifth': 1.0})
+        self.assertEqual(history.partition(aliases, 2),
+                         [['first', 'third'], ['second', 'fifth', 'fourth']])
+        self.assertEqual(history.partition(aliases, 6)[5], [])
+
+class TestProgress(unittest.TestCase):
+    def test_update(self):
+        stream = StringIO.StringIO()
+        progress = Progress({'first': 60.0, 'second': 30.0, 'third': 90.0},
+                            2, stream)
+        self.assertEqual(progress.total, 3)
+        self.assertEqual(progress.eta(), 90.0)
+
+        progress.update('third')
+        self.assertEqual(progress.done, 1)
+        self.assertEqual(progress.eta(), 45.0)
+        self.assertRegexpMatches(stream.getvalue(),
+                                 '^\\[1/3\\] third done, elapsed 0:0\\d, ' \
+                                 'ETA 0:45\\n$')
+
+if __name__ == '__main__':
+    unittest.main()
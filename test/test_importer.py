@@ -1,5 +1,4 @@
 import unittest
-import re
 import sys
 import imp
 
@@ -11,32 +10,13 @@ reload(distcovery.importer)
 
 from distcovery.exceptions import NoMoreAttempts
 from distcovery.path import Package, walk
-from distcovery.importer import _MODULE_NAME_PREFIX, _CASE_NAME_PREFIX, \
-                                _enumerate_testmodules, _enumerate_testcases, \
-                                RandomUniqueNames, Importer
+from distcovery.importer import _CASE_NAME_PREFIX, _enumerate_testcases, \
+                                find_testcases, LazyModuleSuite, \
+                                UniqueNames, Importer, load_tests_from_names
 
 class TestImporterGlobal(ImportTrash, unittest.TestCase):
-    def test__enumerate_testmodules(self):
-        test1 = imp.new_module('test1')
-        test2 = imp.new_module('test2')
-        test3 = imp.new_module('test3')
-
-        global_section = {_MODULE_NAME_PREFIX + '1': test1,
-                          _MODULE_NAME_PREFIX + '2': test2,
-                          _MODULE_NAME_PREFIX + 'X': imp.new_module('testX'),
-                          _MODULE_NAME_PREFIX + '3': test3,
-                          _MODULE_NAME_PREFIX + '4': 'Some Data'}
-
-        self.assertEqual(set(_enumerate_testmodules(global_section)),
-                         set([test1, test2, test3]))
-
     def test__enumerate_testcases(self):
         test_module = imp.new_module('test1')
-        test_module.__file__ = '<test package>'
-        test_module.__path__ = []
-        sys.modules['test1'] = test_module
-        self.modules_trash.append('test1')
-
         exec('import unittest\n' \
              'class A(unittest.TestCase):\n' \
              '    pass\n' \
@@ -48,49 +28,153 @@ class TestImporterGlobal(ImportTrash, unittest.TestCase):
              '    pass\n' \
              'c = C()\n', test_module.__dict__)
 
-        global_section = {_MODULE_NAME_PREFIX + '1': test_module}
+        self.assertEqual(set(testcase.__name__ for testcase in \
+                             _enumerate_testcases(test_module)),
+                         set(['A', 'B']))
 
-        testnames = set()
-        testcases = set()
-        for testname, testcase in _enumerate_testcases(global_section):
-            testnames.add(testname)
-            testcases.add(testcase.__name__)
+    def test_find_testcases(self):
+        test_module = imp.new_module('test1')
+        exec('import unittest\n' \
+             'class A(unittest.TestCase):\n' \
+             '    pass\n' \
+             'class B(object):\n' \
+             '    pass\n' \
+             'TestCase1 = A\n' \
+             'TestCase2 = A\n', test_module.__dict__)
 
-        self.assertEqual(testnames, set([_CASE_NAME_PREFIX + '1',
-                                         _CASE_NAME_PREFIX + '2']))
-        self.assertEqual(testcases, set(['A', 'B']))
+        self.assertEqual(find_testcases(test_module, 'A'), ['A'])
+        self.assertEqual(find_testcases(test_module, 'B'), [])
+        self.assertEqual(find_testcases(test_module, 'C'), [])
 
-class TestRandomUniqueNames(unittest.TestCase):
-    def test_creation(self):
-        random_unique_names = RandomUniqueNames()
-        self.assertTrue(isinstance(random_unique_names, RandomUniqueNames))
+        del test_module.A
+        self.assertEqual(find_testcases(test_module, 'A'),
+                         ['TestCase1', 'TestCase2'])
+
+_LAZY_SOURCE = 'import unittest\n' \
+               'class Test(unittest.TestCase):\n' \
+               '    def test_first(self):\n' \
+               '        pass\n' \
+               '    def test_second(self):\n' \
+               '        pass\n'
 
-    def test_random_name(self):
-        random_unique_names = RandomUniqueNames()
-        self.assertRegexpMatches(random_unique_names.random_name(), '^X_\\d+$')
+class TestLazyModuleSuite(ImportTrash, unittest.TestCase):
+    def setUp(self):
+        super(TestLazyModuleSuite, self).setUp()
+
+        module = imp.new_module('test_lazy')
+        exec(_LAZY_SOURCE, module.__dict__)
+        sys.modules['test_lazy'] = module
+        self.modules_trash.append('test_lazy')
+
+    def test_creation(self):
+        suite = LazyModuleSuite('test_lazy')
+        self.assertEqual(suite.name, 'test_lazy')
+        self.assertIs(suite.loader, unittest.defaultTestLoader)
+        self.assertFalse(suite.loaded)
+        self.assertEqual(suite._tests, [])
+
+    def test_iter(self):
+        suite = LazyModuleSuite('test_lazy')
+        self.assertEqual(len(list(suite)), 1)
+        self.assertTrue(suite.loaded)
+
+        self.assertEqual(len(list(suite)), 1)
+
+    def test_count_test_cases(self):
+        self.assertEqual(LazyModuleSuite('test_lazy').countTestCases(), 2)
+
+    def test_run(self):
+        suite = LazyModuleSuite('test_lazy')
+        result = unittest.TestResult()
+        suite.run(result)
+
+        self.assertEqual(result.testsRun, 2)
+        self.assertTrue(result.wasSuccessful())
+        self.assertEqual(suite._tests, [])
+
+    def test_run_import_failure(self):
+        suite = LazyModuleSuite('test_lazy_missing')
+        result = unittest.TestResult()
+        suite.run(result)
+
+        self.assertEqual(result.testsRun, 1)
+        self.assertEqual(len(result.errors), 1)
+
+        test, trace = result.errors[0]
+        self.assertIsInstance(test, distcovery.importer._ImportFailure)
+        self.assertEqual(str(test), 'runTest (test_lazy_missing)')
+        self.assertEqual(test.id(), 'test_lazy_missing')
+        self.assertIn('test_lazy_missing', trace)
+
+class TestLoadTestsFromNames(ImportTrash, unittest.TestCase):
+    def setUp(self):
+        super(TestLoadTestsFromNames, self).setUp()
+
+        module = imp.new_module('test_lazy')
+        exec(_LAZY_SOURCE, module.__dict__)
+        sys.modules['test_lazy'] = module
+        self.modules_trash.append('test_lazy')
+
+    def test_load_tests_from_names(self):
+        suite = load_tests_from_names(['test_lazy.Test.test_first',
+                                       'test_lazy_missing'])
+
+        first, second = suite
+        self.assertEqual([test.id() for test in first],
+                         ['test_lazy.Test.test_first'])
+        self.assertIsInstance(second,
+                              distcovery.importer._ImportFailure)
+        self.assertEqual(second.id(), 'test_lazy_missing')
+
+class TestUniqueNames(unittest.TestCase):
+    def test_creation(self):
+        unique_names = UniqueNames()
+        self.assertTrue(isinstance(unique_names, UniqueNames))
+
+    def test_hashed_name(self):
+        unique_names = UniqueNames()
+        name = unique_names.hashed_name('test.test_package')
+        self.assertRegexpMatches(name, '^X_\\d{15}$')
+        self.assertEqual(UniqueNames().hashed_name('test.test_package'), name)
+        self.assertNotEqual(unique_names.hashed_name('test.test_package', 1),
+                            name)
+        self.assertNotEqual(unique_names.hashed_name('test.test_other'),
+                            name)
 
     def test_new(self):
-        random_unique_names = RandomUniqueNames()
-        self.assertRegexpMatches(random_unique_names.new(), '^X_\\d+$')
+        unique_names = UniqueNames()
+        name = unique_names.new('test')
+        self.assertRegexpMatches(name, '^X_\\d+$')
+        self.assertEqual(name, UniqueNames().new('test'))
+
+    def test_new_same_key(self):
+        unique_names = UniqueNames()
+        self.assertNotEqual(unique_names.new('test'), unique_names.new('test'))
 
     def test_new_big_set(self):
-        random_unique_names = RandomUniqueNames(limit=10000, length=2)
+        unique_names = UniqueNames(limit=10000, length=2)
 
         names = set()
         for i in range(100):
-            name = random_unique_names.new()
+            name = unique_names.new(str(i))
             self.assertNotIn(name, names)
 
             names.add(name)
 
         self.assertEqual(len(names), 100)
 
+    def test_new_stable(self):
+        first = UniqueNames(length=2)
+        second = UniqueNames(length=2)
+        self.assertEqual([first.new(str(i)) for i in range(50)],
+                         [second.new(str(i)) for i in range(50)])
+
     def test_new_limit(self):
-        random_unique_names = RandomUniqueNames(limit=10, length=2)
+        unique_names = UniqueNames(limit=10, length=2)
 
         with self.assertRaises(NoMoreAttempts) as ctx:
             for i in range(101):
-                random_unique_names.new()
+                unique_names.new(str(i))
 
         self.assertEqual(ctx.exception.message,
                          NoMoreAttempts.template % \
@@ -99,31 +183,40 @@ class TestRandomUniqueNames(unittest.TestCase):
                           'length': 2,
                           'length_suffix': NoMoreAttempts.number_suffix(2)})
 
-class TestImporter(ImportTrash, PreserveOs, unittest.TestCase):
-    def __assert_source(self, source, *expected_modules):
-        regex = 'import\\s(.*)\\sas\\s%s\\d+$' % re.escape(_MODULE_NAME_PREFIX)
-        pattern = re.compile(regex)
+_SAMPLE_SOURCE = 'import unittest\n' \
+                 'class Test(unittest.TestCase):\n' \
+                 '    pass\n'
+
+class _RaisingFinder(object):
+    def __init__(self, name):
+        self.name = name
 
-        imported_modules = set()
-        lines = source.split('\n')
-        for line in lines[:-1]:
-            match = pattern.match(line)
-            self.assertNotEqual(match, None, 'Line %s doesn\'t matches ' \
-                                             'regex "%s"' % (repr(line), regex))
-            imported_modules.add(match.group(1))
+    def find_module(self, fullname, path=None):
+        if fullname == self.name:
+            return self
 
-        self.assertEqual(lines[-1], '')
-        self.assertEqual(imported_modules, set(expected_modules))
+    def load_module(self, fullname):
+        raise UserWarning('Test!')
+
+class TestImporter(ImportTrash, PreserveOs, unittest.TestCase):
+    def sample_module(self, name, source=_SAMPLE_SOURCE):
+        module = imp.new_module(name)
+        exec(source, module.__dict__)
+        sys.modules[name] = module
+        self.modules_trash.append(name)
+        return module
 
     def test_creation(self):
         importer = Importer(Package(('test', 'base'), 'test'))
 
         self.assertIsInstance(importer, Importer)
+        self.assertFalse(importer.lazy)
         self.assertEqual(importer.aliases.keys(), [None])
 
         name = importer.aliases[None]
         self.assertRegexpMatches(name, '^X_\\d+$')
-        self.assertEquals(importer.sources, {name: ''})
+        self.assertEqual(importer.children, {name: []})
+        self.assertEqual(importer.testcases, {})
 
     def test_build_module(self):
         self.full_test_tree()
@@ -132,27 +225,44 @@ class TestImporter(ImportTrash, PreserveOs, unittest.TestCase):
         self.assertEqual(set(importer.aliases.keys()),
                          set((None, 'sub_first', 'sub_third',
                               'sub_third.sub_second')))
+        self.assertEqual(len(importer.children), 4)
 
         name = importer.aliases[None]
-        self.__assert_source(importer.sources[name],
-                             'test_first',
-                             'test_second',
-                             'test_sub_first.test_sub_first',
-                             'test_sub_third.test_sub_first',
-                             'test_sub_third.test_sub_second.test_sub_first')
+        self.assertEqual(importer.children[name],
+                         ['test_first',
+                          'test_second',
+                          'test_sub_first.test_sub_first',
+                          'test_sub_third.test_sub_first',
+                          'test_sub_third.test_sub_second.test_sub_first'])
 
         name = importer.aliases['sub_first']
-        self.__assert_source(importer.sources[name],
-                             'test_sub_first.test_sub_first')
+        self.assertEqual(importer.children[name],
+                         ['test_sub_first.test_sub_first'])
 
         name = importer.aliases['sub_third']
-        self.__assert_source(importer.sources[name],
-                             'test_sub_third.test_sub_first',
-                             'test_sub_third.test_sub_second.test_sub_first')
+        self.assertEqual(importer.children[name],
+                         ['test_sub_third.test_sub_first',
+                          'test_sub_third.test_sub_second.test_sub_first'])
 
         name = importer.aliases['sub_third.sub_second']
-        self.__assert_source(importer.sources[name],
-                             'test_sub_third.test_sub_second.test_sub_first')
+        self.assertEqual(importer.children[name],
+                         ['test_sub_third.test_sub_second.test_sub_first'])
+
+    def test_get_testcases(self):
+        module = self.sample_module('test02')
+
+        importer = Importer(Package(('test', 'base'), 'test'))
+        self.assertEqual(importer.get_testcases('test02'), [module.Test])
+        self.assertEqual(importer.testcases, {'test02': [module.Test]})
+
+        del module.Test
+        self.assertEqual(len(importer.get_testcases('test02')), 1)
+
+    def test_build_module_stable_names(self):
+        self.full_test_tree()
+
+        self.assertEqual(Importer(walk('.')).aliases,
+                         Importer(walk('.')).aliases)
 
     def test_find_module(self):
         self.full_test_tree()
@@ -168,7 +278,7 @@ class TestImporter(ImportTrash, PreserveOs, unittest.TestCase):
 
     def test_load_module(self):
         importer = Importer(Package(('test', 'base'), 'test'))
-        importer.sources['test01'] = 'test = 1\n'
+        importer.children['test01'] = []
         self.modules_trash.append('test01')
 
         test01 = importer.load_module('test01')
@@ -179,11 +289,14 @@ class TestImporter(ImportTrash, PreserveOs, unittest.TestCase):
         self.assertEqual(test01.__path__, [])
         self.assertIs(test01.__loader__, importer)
         self.assertEqual(test01.__package__, 'test01')
-        self.assertEqual(test01.test, 1)
 
     def test_load_module_failed(self):
         importer = Importer(Package(('test', 'base'), 'test'))
-        importer.sources['test01'] = 'raise UserWarning(\'Test!\')\n'
+        importer.children['test01'] = ['test02']
+
+        finder = _RaisingFinder('test02')
+        sys.meta_path.insert(0, finder)
+        self.meta_path_trash.append(finder)
 
         with self.assertRaises(UserWarning) as ctx:
             importer.load_module('test01')
@@ -200,22 +313,58 @@ class TestImporter(ImportTrash, PreserveOs, unittest.TestCase):
 
     def test_load_module_global_testcase(self):
         importer = Importer(Package(('test', 'base'), 'test'))
-        importer.sources['test01'] = 'import test02 as %s1\n' % _MODULE_NAME_PREFIX
-        importer.sources['test02'] = 'import unittest\n' \
-                                     'class Test(unittest.TestCase):\n' \
-                                     '    pass\n'
+        importer.children['test01'] = ['test02', 'test03']
+        self.modules_trash.append('test01')
+        self.sample_module('test02')
+        self.sample_module('test03')
+
+        test01 = importer.load_module('test01')
 
-        sys.meta_path.append(importer)
-        self.meta_path_trash.append(importer)
+        for index in (1, 2):
+            testname = _CASE_NAME_PREFIX + str(index)
+            self.assertIn(testname, test01.__dict__)
+
+            testcase = test01.__dict__[testname]
+            self.assertTrue(issubclass(testcase, unittest.TestCase))
+            self.assertEqual(testcase.__name__, 'Test')
+
+        self.assertIsNot(test01.TestCase1, test01.TestCase2)
+        self.assertEqual(set(importer.testcases), set(['test02', 'test03']))
+
+    def test_build_module_lazy(self):
+        self.full_test_tree()
+
+        importer = Importer(walk('.'), lazy=True)
+        self.assertTrue(importer.lazy)
+
+        name = importer.aliases[None]
+        self.assertEqual(importer.children[name],
+                         ['test_first', 'test_second',
+                          'test_sub_first.test_sub_first',
+                          'test_sub_third.test_sub_first',
+                          'test_sub_third.test_sub_second.test_sub_first'])
+
+        name = importer.aliases['sub_third']
+        self.assertEqual(importer.children[name],
+                         ['test_sub_third.test_sub_first',
+                          'test_sub_third.test_sub_second.test_sub_first'])
+
+    def test_load_module_lazy(self):
+        importer = Importer(Package(('test', 'base'), 'test'), lazy=True)
+        importer.children['test01'] = ['test02']
+        self.modules_trash.append('test01')
 
         test01 = importer.load_module('test01')
+        self.assertNotIn(_CASE_NAME_PREFIX + '1', test01.__dict__)
+        self.assertEqual(importer.testcases, {})
 
-        testname = _CASE_NAME_PREFIX + '1'
-        self.assertIn(testname, test01.__dict__)
+        suite = unittest.defaultTestLoader.loadTestsFromModule(test01)
+        self.assertNotIn('test02', sys.modules)
 
-        testcase = test01.__dict__[testname]
-        self.assertTrue(issubclass(testcase, unittest.TestCase))
-        self.assertEqual(testcase.__name__, 'Test')
+        self.sample_module('test02', _LAZY_SOURCE)
+        result = unittest.TestResult()
+        suite.run(result)
+        self.assertEqual(result.testsRun, 2)
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,200 @@
+import unittest
+import os
+import sys
+import imp
+import shutil
+import pstats
+import signal
+import tempfile
+import StringIO
+
+from utils import ImportTrash
+
+# Reload module to run its global section under coverage supervision
+import distcovery.parallel
+reload(distcovery.parallel)
+
+import distcovery.parallel
+from distcovery.parallel import run_module, run_modules, _initialize_worker
+
+_SAMPLE_MODULE = 'distcovery_test_parallel_sample'
+_SAMPLE_SOURCE = 'import unittest\n' \
+                 'class Sample(unittest.TestCase):\n' \
+                 '    def test_pass(self):\n' \
+                 '        pass\n' \
+                 '    def test_fail(self):\n' \
+                 '        self.fail(\'Expected failure\')\n'
+
+_STATEFUL_MODULE = 'distcovery_test_parallel_stateful'
+_STATEFUL_SOURCE = 'import unittest\n' \
+                   'runs = []\n' \
+                   'class Sample(unittest.TestCase):\n' \
+                   '    def test_first_run(self):\n' \
+                   '        runs.append(True)\n' \
+                   '        self.assertEqual(len(runs), 1)\n'
+
+class _MockTracer(object):
+    def __init__(self, calls):
+        self.calls = calls
+
+    def pause(self):
+        self.calls.append('pause')
+
+    def resume(self):
+        self.calls.append('resume')
+
+    def switch_context(self, name):
+        self.calls.append(name)
+
+class TestParallel(ImportTrash, unittest.TestCase):
+    def setUp(self):
+        super(TestParallel, self).setUp()
+
+        module = imp.new_module(_SAMPLE_MODULE)
+        exec(_SAMPLE_SOURCE, module.__dict__)
+        sys.modules[_SAMPLE_MODULE] = module
+        self.modules_trash.append(_SAMPLE_MODULE)
+
+    def test_run_module(self):
+        module_result = run_module(_SAMPLE_MODULE, 0)
+        self.assertEqual(module_result.name, _SAMPLE_MODULE)
+        self.assertEqual(module_result.tests_run, 2)
+        self.assertEqual(len(module_result.failures), 1)
+        self.assertEqual(module_result.errors, [])
+
+    def test_run_module_verbose(self):
+        module_result = run_module(_SAMPLE_MODULE, 2)
+        self.assertIn('test_pass', module_result.output)
+        self.assertIn('ok', module_result.output)
+
+    def test_run_module_timed(self):
+        module_result = run_module(_SAMPLE_MODULE, 0, True)
+        self.assertEqual(module_result.timings.modules.keys(),
+                         [_SAMPLE_MODULE])
+        self.assertEqual(sorted(module_result.timings.tests),
+                         [_SAMPLE_MODULE + '.Sample.test_fail',
+                          _SAMPLE_MODULE + '.Sample.test_pass'])
+
+    def test_run_module_import_error(self):
+        module_result = run_module(_SAMPLE_MODULE + '_missing', 0)
+        self.assertEqual(module_result.tests_run, 0)
+        self.assertEqual(len(module_result.errors), 1)
+        self.assertEqual(module_result.errors[0][0],
+                         _SAMPLE_MODULE + '_missing')
+        self.assertIn('ImportError', module_result.errors[0][1])
+        self.assertEqual(module_result.failed_names,
+                         [_SAMPLE_MODULE + '_missing'])
+
+    def test_run_module_exclude(self):
+        module_result = run_module(_SAMPLE_MODULE, 0,
+                                   exclude=[_SAMPLE_MODULE + \
+                                            '.Sample.test_fail'])
+        self.assertEqual(module_result.tests_run, 1)
+        self.assertEqual(module_result.failures, [])
+
+    def test_run_module_recorded(self):
+        module_result = run_module(_SAMPLE_MODULE, 0, recorded=True)
+        self.assertEqual([(record['id'], record['outcome']) \
+                          for record in module_result.records],
+                         [(_SAMPLE_MODULE + '.Sample.test_fail', 'failure'),
+                          (_SAMPLE_MODULE + '.Sample.test_pass', 'success')])
+
+        module_result = run_module(_SAMPLE_MODULE + '_missing', 0,
+                                   recorded=True)
+        self.assertEqual([(record['id'], record['outcome']) \
+                          for record in module_result.records],
+                         [(_SAMPLE_MODULE + '_missing', 'error')])
+
+    def test_run_modules_write(self):
+        records = []
+        summary = run_modules([_SAMPLE_MODULE], 2, 0, StringIO.StringIO(),
+                              write=records.append)
+
+        self.assertEqual(sorted(record['id'] for record in records),
+                         [_SAMPLE_MODULE + '.Sample.test_fail',
+                          _SAMPLE_MODULE + '.Sample.test_pass'])
+
+    def test_run_modules(self):
+        stream = StringIO.StringIO()
+        summary = run_modules([_SAMPLE_MODULE, _SAMPLE_MODULE], 2, 0, stream)
+
+        self.assertEqual(summary.tests_run, 4)
+        self.assertEqual(len(summary.failures), 2)
+        self.assertFalse(summary.was_successful())
+        self.assertIn('Ran 4 tests in ', stream.getvalue())
+        self.assertIn('FAILED (failures=2)', stream.getvalue())
+
+    def test_run_modules_isolate(self):
+        module = imp.new_module(_STATEFUL_MODULE)
+        exec(_STATEFUL_SOURCE, module.__dict__)
+        sys.modules[_STATEFUL_MODULE] = module
+        self.modules_trash.append(_STATEFUL_MODULE)
+
+        summary = run_modules([_STATEFUL_MODULE]*2, 1, 0, StringIO.StringIO())
+        self.assertEqual(len(summary.failures), 1)
+
+        summary = run_modules([_STATEFUL_MODULE]*2, 1, 0, StringIO.StringIO(),
+                              isolate=True)
+        self.assertEqual(summary.tests_run, 2)
+        self.assertTrue(summary.was_successful())
+
+    def test_run_module_failfast(self):
+        module_result = run_module(_SAMPLE_MODULE, 0, failfast=True)
+        self.assertEqual(module_result.tests_run, 1)
+        self.assertEqual(len(module_result.failures), 1)
+
+    def test_run_modules_max_failures(self):
+        stream = StringIO.StringIO()
+        summary = run_modules([_SAMPLE_MODULE]*3, 1, 0, stream,
+                              max_failures=1)
+
+        self.assertTrue(summary.stopped)
+        self.assertEqual(summary.tests_run, 1)
+        self.assertEqual(len(summary.failures), 1)
+        self.assertNotIn('Stopped', stream.getvalue())
+
+    def test_run_module_not_measured(self):
+        calls = []
+        tracer = _MockTracer(calls)
+
+        distcovery.parallel._tracer = tracer
+        try:
+            module_result = distcovery.parallel._run_module((_SAMPLE_MODULE, 0,
+                                                             False, None))
+            self.assertEqual(module_result.tests_run, 2)
+            self.assertEqual(calls, ['pause', 'resume'])
+
+            distcovery.parallel._run_module((_SAMPLE_MODULE, 0, True, None))
+            self.assertEqual(calls, ['pause', 'resume', _SAMPLE_MODULE])
+        finally:
+            distcovery.parallel._tracer = None
+
+    def test_run_modules_profiles(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'sample.prof')
+            run_modules([_SAMPLE_MODULE], 2, 0, StringIO.StringIO(),
+                        profiles={_SAMPLE_MODULE: path})
+
+            stats = pstats.Stats(path, stream=StringIO.StringIO())
+        finally:
+            shutil.rmtree(directory)
+
+        self.assertIn('test_pass', [name for path, line, name \
+                                    in stats.stats])
+
+    def test_initialize_worker(self):
+        handler = signal.getsignal(signal.SIGTERM)
+        try:
+            _initialize_worker(lambda: 'finalizer', 'tracer')
+            self.assertEqual(distcovery.parallel._finalizer, 'finalizer')
+            self.assertEqual(distcovery.parallel._tracer, 'tracer')
+            self.assertIs(signal.getsignal(signal.SIGTERM),
+                          distcovery.parallel._terminate_worker)
+        finally:
+            signal.signal(signal.SIGTERM, handler)
+            distcovery.parallel._finalizer = None
+            distcovery.parallel._tracer = None
+
+if __name__ == '__main__':
+    unittest.main()
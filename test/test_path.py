@@ -3,7 +3,7 @@ import os
 import re
 import collections
 
-from utils import mock_directory_tree, PreserveOs
+from utils import mock_directory_tree, mock_scandir, PreserveOs
 
 # Reload module to run its global section under coverage supervision
 import distcovery.path
@@ -11,8 +11,9 @@ reload(distcovery.path)
 
 from distcovery.exceptions import InvalidTestRoot
 from distcovery.path import _TEST_PACKAGE_PATTERN, _TEST_MODULE_PATTERN, \
-                            _is_package, _is_module, Importable, Package, \
-                            _split_path, walk
+                            _TEST_PATTERNS, _Entry, _listdir, _scan, \
+                            Scanner, Index, Importable, Package, \
+                            _split_path, walk, patterns
 
 class TestPath(PreserveOs, unittest.TestCase):
     def small_test_tree(self):
@@ -25,23 +26,84 @@ class TestPath(PreserveOs, unittest.TestCase):
                 ('test_forth', 'module.py'): None}
         os.listdir, os.path.isfile, os.path.isdir = mock_directory_tree(tree)
 
-    def test__is_package(self):
+    def test__Entry(self):
         self.small_test_tree()
 
-        self.assertFalse(_is_package('test_first.py'))
-        self.assertFalse(_is_package('test_second'))
-        self.assertTrue(_is_package('test_third'))
-        self.assertFalse(_is_package('test_forth'))
-        self.assertFalse(_is_package('test_fifth'))
+        path = os.path.join('test_third', 'test_item.py')
+        entry = _Entry(path, 'test_item.py')
+        self.assertEqual(entry.name, 'test_item.py')
+        self.assertEqual(entry.path, path)
+        self.assertTrue(entry.is_file())
+        self.assertFalse(entry.is_dir())
 
-    def test__is_module(self):
+        entry = _Entry('test_third', 'test_third')
+        self.assertFalse(entry.is_file())
+        self.assertTrue(entry.is_dir())
+
+    def test__listdir(self):
         self.small_test_tree()
 
-        self.assertTrue(_is_module('test_first.py'))
-        self.assertFalse(_is_module('test_second'))
-        self.assertFalse(_is_module('test_third'))
-        self.assertFalse(_is_module('test_forth'))
-        self.assertFalse(_is_module('test_fifth'))
+        entries = _listdir('test_third')
+        self.assertTrue(all(isinstance(entry, _Entry) for entry in entries))
+        self.assertEqual([entry.name for entry in entries],
+                         ['__init__.py', 'test_item.py'])
+        self.assertEqual(entries[1].path,
+                         os.path.join('test_third', 'test_item.py'))
+
+    def test__listdir_scandir(self):
+        self.small_test_tree()
+
+        scanned = []
+        def scandir(path):
+            scanned.append(path)
+            return []
+
+        distcovery.path._scandir = scandir
+        self.assertEqual(_listdir('test_third'), [])
+        self.assertEqual(scanned, ['test_third'])
+
+    def test__scan(self):
+        self.full_test_tree()
+
+        self.assertEqual(_scan('.'),
+                         (True, ['test_first.py', 'test_second.py'],
+                          ['test_sub_first', 'test_sub_third']))
+        self.assertEqual(_scan(os.path.join('.', 'test_sub_second')),
+                         (False, ['test_sub_first.py'], []))
+
+    def test__scan_stats(self):
+        self.full_test_tree()
+
+        stats = []
+        def counting(check):
+            def stat(path):
+                stats.append(path)
+                return check(path)
+
+            return stat
+
+        os.path.isfile = counting(os.path.isfile)
+        os.path.isdir = counting(os.path.isdir)
+
+        _scan('.')
+        self.assertEqual(sorted(stats),
+                         [os.path.join('.', name) \
+                          for name in ('test_sub_first', 'test_sub_third')])
+
+    def test__scan_scandir(self):
+        self.full_test_tree()
+        distcovery.path._scandir = mock_scandir(self.tree)
+
+        stats = []
+        def stat(path):
+            stats.append(path)
+
+        os.path.isfile = os.path.isdir = stat
+
+        self.assertEqual(_scan('.'),
+                         (True, ['test_first.py', 'test_second.py'],
+                          ['test_sub_first', 'test_sub_third']))
+        self.assertEqual(stats, [])
 
     def test__split_path(self):
         self.assertEqual(_split_path(os.path.join('1', '2', '3', '4', '5'),
@@ -67,6 +129,216 @@ class TestPath(PreserveOs, unittest.TestCase):
 
         self.assertEqual(content, self.expected_content)
 
+    def test_walk_prefix(self):
+        tree = {('.',): ('bench_first.py', 'test_second.py', 'bench_third'),
+                ('.', 'bench_first.py'): None,
+                ('.', 'test_second.py'): None,
+                ('.', 'bench_third'): ('__init__.py', 'bench_item.py'),
+                ('.', 'bench_third', '__init__.py'): None,
+                ('.', 'bench_third', 'bench_item.py'): None}
+        os.listdir, os.path.isfile, os.path.isdir = mock_directory_tree(tree)
+
+        content = {}
+        for alias, importable in walk('.', prefix='bench_'). \
+                                     content.iteritems():
+            content[alias] = importable.str_name()
+
+        self.assertEqual(content, {'first': 'bench_first',
+                                   'third': 'bench_third',
+                                   'third.item': 'bench_third.bench_item'})
+
+    def test_patterns(self):
+        self.assertIs(patterns('test_'), _TEST_PATTERNS)
+
+        package_pattern, module_pattern = patterns('bench.')
+        self.assertEqual(package_pattern.match('bench.x').group(2), 'x')
+        self.assertIsNone(package_pattern.match('benchxx'))
+        self.assertEqual(module_pattern.match('bench.x.py').group(1),
+                         'bench.x')
+        self.assertIsNone(module_pattern.match('bench.x.pyc'))
+
+    def test_walk_prefix_index(self):
+        with self.assertRaises(ValueError):
+            walk('.', Index(), 'bench_')
+
+    def test_walk_scandir(self):
+        self.full_test_tree()
+        distcovery.path._scandir = mock_scandir(self.tree)
+        os.listdir = os.path.isfile = os.path.isdir = None
+
+        content = {}
+        for alias, importable in walk('.').content.iteritems():
+            content[alias] = importable.str_name()
+
+        self.assertEqual(content, self.expected_content)
+
+    def test_walk_index(self):
+        self.full_test_tree()
+        os.path.getmtime = lambda path: 1.0
+
+        index = Index()
+        content = {}
+        for alias, importable in walk('.', index).content.iteritems():
+            content[alias] = importable.str_name()
+
+        self.assertEqual(content, self.expected_content)
+        self.assertTrue(index.changed)
+        self.assertEqual(index.visited, {})
+        self.assertEqual(set(index.directories),
+                         set(['.',
+                              os.path.join('.', 'test_sub_first'),
+                              os.path.join('.', 'test_sub_third'),
+                              os.path.join('.', 'test_sub_third',
+                                           'test_sub_second')]))
+
+class TestScanner(PreserveOs, unittest.TestCase):
+    def setUp(self):
+        super(TestScanner, self).setUp()
+
+        self.full_test_tree()
+
+        self.listed = []
+        listdir = os.listdir
+        def counting_listdir(path):
+            self.listed.append(path)
+            return listdir(path)
+
+        os.listdir = counting_listdir
+
+    def test_creation(self):
+        scanner = Scanner()
+        self.assertEqual(scanner.visited, {})
+
+    def test_read(self):
+        scanner = Scanner()
+        self.assertEqual(scanner.read('.'),
+                         [None, True, ['test_first.py', 'test_second.py'],
+                          ['test_sub_first', 'test_sub_third']])
+        self.assertEqual(scanner.visited, {})
+
+    def test_scan(self):
+        scanner = Scanner()
+        record = scanner.scan('.')
+        self.assertIs(scanner.scan('.'), record)
+        self.assertEqual(self.listed, ['.'])
+
+    def test_entries(self):
+        scanner = Scanner()
+        self.assertEqual([(path, match.group(0), is_package) \
+                          for path, match, is_package in scanner.entries('.')],
+                         [(os.path.join('.', 'test_sub_first'),
+                           'test_sub_first', True),
+                          (os.path.join('.', 'test_sub_third'),
+                           'test_sub_third', True),
+                          (os.path.join('.', 'test_first.py'),
+                           'test_first.py', False),
+                          (os.path.join('.', 'test_second.py'),
+                           'test_second.py', False)])
+
+    def test_entries_not_package(self):
+        tree = {('.',): ('test_sub_first',),
+                ('.', 'test_sub_first'): ('test_sub_first.py',),
+                ('.', 'test_sub_first', 'test_sub_first.py'): None}
+        os.listdir, os.path.isfile, os.path.isdir = mock_directory_tree(tree)
+
+        self.assertEqual(list(Scanner().entries('.')), [])
+
+    def test_walk_lists_each_directory_once(self):
+        walk('.')
+        self.assertEqual(sorted(self.listed),
+                         sorted(['.',
+                                 os.path.join('.', 'test_sub_first'),
+                                 os.path.join('.', 'test_sub_third'),
+                                 os.path.join('.', 'test_sub_third',
+                                              'test_sub_second')]))
+
+class TestIndex(PreserveOs, unittest.TestCase):
+    def setUp(self):
+        super(TestIndex, self).setUp()
+
+        self.full_test_tree()
+
+        self.mtimes = {}
+        os.path.getmtime = lambda path: self.mtimes.get(path, 1.0)
+
+        self.listed = []
+        listdir = os.listdir
+        def counting_listdir(path):
+            self.listed.append(path)
+            return listdir(path)
+
+        os.listdir = counting_listdir
+
+    def test_creation(self):
+        index = Index()
+        self.assertEqual(index.directories, {})
+        self.assertEqual(index.visited, {})
+        self.assertFalse(index.changed)
+
+    def test_scan(self):
+        index = Index()
+        self.assertEqual(index.scan('.'),
+                         [1.0, True, ['test_first.py', 'test_second.py'],
+                          ['test_sub_first', 'test_sub_third']])
+        self.assertTrue(index.changed)
+
+        index.scan('.')
+        self.assertEqual(self.listed, ['.'])
+
+    def test_scan_unchanged(self):
+        index = Index({'.': [1.0, True, ['test_first.py'], []]})
+        self.assertEqual(index.scan('.'), [1.0, True, ['test_first.py'], []])
+        self.assertFalse(index.changed)
+        self.assertEqual(self.listed, [])
+
+    def test_scan_modified(self):
+        index = Index({'.': [1.0, True, ['test_first.py'], []]})
+        self.mtimes['.'] = 2.0
+
+        self.assertEqual(index.scan('.')[:3],
+                         [2.0, True, ['test_first.py', 'test_second.py']])
+        self.assertTrue(index.changed)
+        self.assertEqual(self.listed, ['.'])
+
+    def test_entries(self):
+        index = Index()
+        self.assertEqual([(path, match.group(0), is_package) \
+                          for path, match, is_package in index.entries('.')],
+                         [(os.path.join('.', 'test_sub_first'),
+                           'test_sub_first', True),
+                          (os.path.join('.', 'test_sub_third'),
+                           'test_sub_third', True),
+                          (os.path.join('.', 'test_first.py'),
+                           'test_first.py', False),
+                          (os.path.join('.', 'test_second.py'),
+                           'test_second.py', False)])
+
+    def test_commit(self):
+        index = Index({'.': [1.0, True, ['test_first.py'], []],
+                       'removed': [1.0, True, [], []]})
+        index.scan('.')
+        self.assertFalse(index.changed)
+
+        index.commit()
+        self.assertTrue(index.changed)
+        self.assertEqual(set(index.directories), set(['.']))
+        self.assertEqual(index.visited, {})
+
+    def test_rewalk(self):
+        index = Index()
+        walk('.', index)
+        directories = index.directories
+        del self.listed[:]
+
+        index = Index(directories)
+        content = {}
+        for alias, importable in walk('.', index).content.iteritems():
+            content[alias] = importable.str_name()
+
+        self.assertEqual(content, self.expected_content)
+        self.assertFalse(index.changed)
+        self.assertEqual(self.listed, [])
+
 class TestImportable(unittest.TestCase):
     def test_join_sequence(self):
         self.assertEqual(Importable.join_sequence(('1', '2', '3')), '1.2.3')
@@ -122,18 +394,6 @@ class TestPackage(PreserveOs, unittest.TestCase):
         self.assertEqual(package.packages, [])
         self.assertEqual(package.content, {})
 
-    def test_listdir(self):
-        self.full_test_tree()
-
-        package = Package(('test', 'base'), '.')
-        self.assertEqual(tuple(package.listdir()),
-                         (('./__init__.py', '__init__.py'),
-                          ('./test_first.py', 'test_first.py'),
-                          ('./test_second.py', 'test_second.py'),
-                          ('./test_sub_first', 'test_sub_first'),
-                          ('./t_sub_first', 't_sub_first'),
-                          ('./test_sub_third', 'test_sub_third')))
-
     def test_walk(self):
         self.full_test_tree()
 
@@ -0,0 +1,70 @@
+import unittest
+import os
+import shutil
+import tempfile
+
+# Reload module to run its global section under coverage supervision
+import distcovery.profiling
+reload(distcovery.profiling)
+
+from distcovery.profiling import profile_path, make_directory, Profiler, \
+                                 aggregate, format_report
+
+def _first():
+    return sum(range(100))
+
+def _second():
+    return sorted(range(100), reverse=True)
+
+class TestProfiling(unittest.TestCase):
+    def setUp(self):
+        super(TestProfiling, self).setUp()
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        super(TestProfiling, self).tearDown()
+
+    def profile(self, label, function):
+        path = profile_path(self.directory, label)
+        profiler = Profiler().start()
+        function()
+        profiler.stop(path)
+        return path
+
+    def test_profile_path(self):
+        self.assertEqual(profile_path('xxx', 'sub.first:Case.test_x'),
+                         os.path.join('xxx', 'sub.first_Case.test_x.prof'))
+
+    def test_make_directory(self):
+        directory = os.path.join(self.directory, 'xxx', 'yyy')
+        make_directory(directory)
+        make_directory(directory)
+        self.assertTrue(os.path.isdir(directory))
+
+    def test_profiler(self):
+        path = self.profile('first', _first)
+        self.assertTrue(os.path.isfile(path))
+
+    def test_aggregate(self):
+        paths = [self.profile('first', _first),
+                 self.profile('second', _second),
+                 profile_path(self.directory, 'missing')]
+
+        stats = aggregate(paths, self.directory)
+        names = [name for path, line, name in stats.stats]
+        self.assertIn('_first', names)
+        self.assertIn('_second', names)
+        self.assertTrue(os.path.isfile(profile_path(self.directory,
+                                                    '__aggregate__')))
+
+        report = format_report(stats, 1)
+        self.assertIn('cumulative', report)
+        self.assertIn('due to restriction <1>', report)
+
+    def test_aggregate_empty(self):
+        self.assertIsNone(aggregate([profile_path(self.directory, 'missing')],
+                                    self.directory))
+
+if __name__ == '__main__':
+    unittest.main()
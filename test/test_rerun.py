@@ -0,0 +1,48 @@
+import unittest
+
+# Reload module to run its global section under coverage supervision
+import distcovery.rerun
+reload(distcovery.rerun)
+
+from distcovery.rerun import FailedTests, ExcludingLoader
+
+class _Sample(unittest.TestCase):
+    def test_first(self):
+        pass
+
+    def test_second(self):
+        pass
+
+class TestFailedTests(unittest.TestCase):
+    def test_creation(self):
+        self.assertEqual(FailedTests().names, [])
+        self.assertEqual(FailedTests(['b', 'a', 'b']).names, ['a', 'b'])
+
+    def test_update(self):
+        failed = FailedTests(['first', 'second'])
+        failed.update(['third'], [])
+        self.assertFalse(failed.changed)
+
+        failed.update(['first', 'third'], ['third'])
+        self.assertTrue(failed.changed)
+        self.assertEqual(failed.names, ['second', 'third'])
+
+class TestExcludingLoader(unittest.TestCase):
+    def test_get_test_case_names(self):
+        loader = ExcludingLoader(['%s._Sample.test_first' % __name__])
+        self.assertEqual(loader.getTestCaseNames(_Sample), ['test_second'])
+
+        suite = loader.loadTestsFromTestCase(_Sample)
+        self.assertEqual([test.id() for test in suite],
+                         ['%s._Sample.test_second' % __name__])
+
+    def test_get_test_case_names_module(self):
+        loader = ExcludingLoader([__name__])
+        self.assertEqual(loader.getTestCaseNames(_Sample), [])
+
+    def test_get_test_case_names_case(self):
+        loader = ExcludingLoader(['%s._Sample' % __name__])
+        self.assertEqual(loader.getTestCaseNames(_Sample), [])
+
+if __name__ == '__main__':
+    unittest.main()
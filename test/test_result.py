@@ -0,0 +1,132 @@
+import unittest
+import StringIO
+
+from utils import sample_case
+
+# Reload module to run its global section under coverage supervision
+import distcovery.result
+reload(distcovery.result)
+
+from distcovery.result import failed_name, ModuleResult, Summary
+
+def _run_sample():
+    stream = unittest.runner._WritelnDecorator(StringIO.StringIO())
+    result = unittest.TextTestResult(stream, True, 0)
+    case = sample_case(__name__, 'pass', 'fail', 'error', 'skip')
+    unittest.defaultTestLoader.loadTestsFromTestCase(case)(result)
+    return result
+
+class TestFailedName(unittest.TestCase):
+    def test_failed_name(self):
+        self.assertEqual(failed_name(self), self.id())
+        self.assertEqual(failed_name(unittest.suite._ErrorHolder(
+                             'tearDownClass (test.test_broken.Case)')),
+                         'test.test_broken.Case')
+        self.assertIsNone(failed_name(unittest.suite._ErrorHolder('broken')))
+
+class TestModuleResult(unittest.TestCase):
+    def test_creation(self):
+        module_result = ModuleResult('test', 'output')
+        self.assertEqual(module_result.name, 'test')
+        self.assertEqual(module_result.output, 'output')
+        self.assertEqual(module_result.tests_run, 0)
+        self.assertEqual(module_result.failures, [])
+        self.assertEqual(module_result.errors, [])
+
+    def test_update(self):
+        module_result = ModuleResult('test')
+        module_result.update(_run_sample())
+
+        self.assertEqual(module_result.tests_run, 4)
+        self.assertEqual(len(module_result.failures), 1)
+        self.assertEqual(len(module_result.errors), 1)
+        self.assertEqual(module_result.skipped, 1)
+        self.assertIn('test_fail', module_result.failures[0][0])
+        self.assertIn('Expected failure', module_result.failures[0][1])
+        self.assertEqual(module_result.failed_names,
+                         ['%s.Sample.test_fail' % __name__,
+                          '%s.Sample.test_error' % __name__])
+
+    def test_update_fixture_errors(self):
+        def set_up_class(cls):
+            raise RuntimeError('Broken fixture')
+
+        case = sample_case(__name__, 'pass')
+        case.setUpClass = classmethod(set_up_class)
+
+        stream = unittest.runner._WritelnDecorator(StringIO.StringIO())
+        result = unittest.TextTestResult(stream, True, 0)
+        unittest.TestSuite([case('test_pass')])(result)
+        result.errors.append((unittest.suite._ErrorHolder(
+                                  'setUpModule (test.test_broken)'),
+                              'Traceback'))
+        result.errors.append((unittest.suite._ErrorHolder('broken'),
+                              'Traceback'))
+
+        module_result = ModuleResult('test')
+        module_result.update(result)
+        self.assertEqual(module_result.failed_names,
+                         ['%s.Sample' % __name__, 'test.test_broken'])
+
+    def test_add_error(self):
+        module_result = ModuleResult('test')
+        module_result.add_error('test', 'Traceback')
+        self.assertEqual(module_result.errors, [('test', 'Traceback')])
+        self.assertEqual(module_result.failed_names, [])
+
+        module_result.add_error('test', 'Traceback', 'test')
+        self.assertEqual(module_result.failed_names, ['test'])
+
+class TestSummary(unittest.TestCase):
+    def test_add(self):
+        module_result = ModuleResult('test')
+        module_result.update(_run_sample())
+
+        summary = Summary()
+        summary.add(module_result)
+        summary.add(module_result)
+
+        self.assertEqual(summary.tests_run, 8)
+        self.assertEqual(len(summary.failures), 2)
+        self.assertEqual(len(summary.errors), 2)
+        self.assertEqual(summary.skipped, 2)
+        self.assertEqual(len(summary.failed_names), 4)
+        self.assertEqual(summary.failed_modules, ['test', 'test'])
+        self.assertFalse(summary.was_successful())
+
+    def test_reached(self):
+        summary = Summary()
+        summary.failures.append(('test_fail (test.Test)', 'Traceback'))
+        self.assertFalse(summary.reached(None))
+        self.assertFalse(summary.reached(2))
+
+        summary.errors.append(('test_error (test.Test)', 'Traceback'))
+        self.assertTrue(summary.reached(2))
+
+    def test_print_report_ok(self):
+        stream = StringIO.StringIO()
+
+        summary = Summary()
+        summary.tests_run = 1
+        summary.print_report(stream, 0.5)
+
+        self.assertEqual(stream.getvalue(),
+                         '\n%s\nRan 1 test in 0.500s\n\nOK\n' % ('-'*70))
+
+    def test_print_report_failed(self):
+        stream = StringIO.StringIO()
+
+        summary = Summary()
+        summary.tests_run = 2
+        summary.skipped = 1
+        summary.errors.append(('test_error (test.Test)', 'Traceback'))
+        summary.print_report(stream, 1)
+
+        self.assertEqual(stream.getvalue(),
+                         '\n%s\nERROR: test_error (test.Test)\n%s\n' \
+                         'Traceback\n%s\nRan 2 tests in 1.000s\n\n' \
+                         'FAILED (errors=1, skipped=1)\n' % \
+                         ('='*70, '-'*70, '-'*70))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+# Reload module to run its global section under coverage supervision
+import distcovery.result_cache
+reload(distcovery.result_cache)
+
+from distcovery.result_cache import environment, Sources, ResultCache
+
+_TREE = {('tests', '__init__.py'): '',
+         ('tests', 'test_sample.py'): 'import pkg.mod\n' \
+                                      'import helper\n',
+         ('tests', 'helper.py'): '',
+         ('lib', 'pkg', '__init__.py'): '',
+         ('lib', 'pkg', 'mod.py'): 'from . import other\n',
+         ('lib', 'pkg', 'other.py'): '',
+         ('lib', 'pkg', 'unused.py'): ''}
+
+class TestEnvironment(unittest.TestCase):
+    def test_environment(self):
+        self.assertIn(sys.version, environment())
+
+class TestSources(unittest.TestCase):
+    def setUp(self):
+        super(TestSources, self).setUp()
+
+        self.__cwd = os.getcwd()
+        self.directory = tempfile.mkdtemp()
+        os.chdir(self.directory)
+
+        for parts, source in _TREE.iteritems():
+            self.write(os.path.join(*parts), source)
+
+    def tearDown(self):
+        os.chdir(self.__cwd)
+        shutil.rmtree(self.directory)
+
+        super(TestSources, self).tearDown()
+
+    def write(self, path, source):
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+
+        with open(path, 'w') as stream:
+            stream.write(source)
+
+    def sources(self):
+        return Sources([(os.curdir, None), ('lib', set(['pkg']))])
+
+    def test_closure(self):
+        path = os.path.join('tests', 'test_sample.py')
+        self.assertEqual(self.sources().closure([path]),
+                         [os.path.join('lib', 'pkg', '__init__.py'),
+                          os.path.join('lib', 'pkg', 'mod.py'),
+                          os.path.join('lib', 'pkg', 'other.py'),
+                          os.path.join('tests', '__init__.py'),
+                          os.path.join('tests', 'helper.py'),
+                          os.path.join('tests', 'test_sample.py')])
+
+    def test_closure_index(self):
+        path = os.path.join('tests', 'test_sample.py')
+        self.assertEqual(self.sources().closure([path], 1),
+                         [os.path.join('lib', 'pkg', '__init__.py'),
+                          os.path.join('lib', 'pkg', 'mod.py'),
+                          os.path.join('lib', 'pkg', 'other.py')])
+
+    def test_key(self):
+        paths = [os.path.join('tests', 'test_sample.py')]
+        key = self.sources().key(paths, 'environment')
+        self.assertEqual(self.sources().key(paths, 'environment'), key)
+        self.assertNotEqual(self.sources().key(paths, 'other'), key)
+
+        self.write(os.path.join('lib', 'pkg', 'unused.py'), 'changed = True\n')
+        self.assertEqual(self.sources().key(paths, 'environment'), key)
+
+        self.write(os.path.join('lib', 'pkg', 'other.py'), 'changed = True\n')
+        self.assertNotEqual(self.sources().key(paths, 'environment'), key)
+
+    def test_digest_missing(self):
+        self.assertIsNone(self.sources().digest('missing.py'))
+
+class TestResultCache(unittest.TestCase):
+    def test_get(self):
+        cache = ResultCache({'key': {'lines': {}, 'used': 0.0}})
+        self.assertIsNone(cache.get('missing'))
+        self.assertFalse(cache.changed)
+
+        entry = cache.get('key')
+        self.assertEqual(entry['lines'], {})
+        self.assertGreater(entry['used'], 0.0)
+        self.assertTrue(cache.changed)
+
+    def test_add(self):
+        cache = ResultCache({'first': {'lines': {}, 'used': 2.0},
+                             'second': {'lines': {}, 'used': 1.0}}, 2)
+        cache.add('third', {'xxx.py': [1, 2]})
+
+        self.assertTrue(cache.changed)
+        self.assertEqual(sorted(cache.entries), ['first', 'third'])
+        self.assertEqual(cache.entries['third']['lines'], {'xxx.py': [1, 2]})
+
+if __name__ == '__main__':
+    unittest.main()
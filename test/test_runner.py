@@ -0,0 +1,140 @@
+import unittest
+import sys
+import imp
+import StringIO
+
+from utils import sample_case, ImportTrash
+
+# Reload module to run its global section under coverage supervision
+import distcovery.runner
+reload(distcovery.runner)
+
+from distcovery.timing import Timings, TimingResult
+from distcovery.runner import Step, Runner
+
+_FIXTURES_MODULE = 'distcovery_test_runner_fixtures'
+_FIXTURES_SOURCE = 'import unittest\n' \
+                   'calls = []\n' \
+                   'def tearDownModule():\n' \
+                   '    calls.append("tearDownModule")\n' \
+                   'class Sample(unittest.TestCase):\n' \
+                   '    @classmethod\n' \
+                   '    def tearDownClass(cls):\n' \
+                   '        calls.append("tearDownClass")\n' \
+                   '    def test_pass(self):\n' \
+                   '        pass\n'
+
+def _sample_suite():
+    return unittest.defaultTestLoader.loadTestsFromTestCase(
+               sample_case(__name__, 'error', 'fail', 'pass'))
+
+class TestStep(unittest.TestCase):
+    def test_run(self):
+        calls = []
+        step = Step([_sample_suite()], calls.append)
+
+        result = unittest.TestResult()
+        step.run(result)
+
+        self.assertEqual(result.testsRun, 3)
+        self.assertEqual(calls, [True])
+
+        step = Step([unittest.defaultTestLoader.loadTestsFromTestCase(
+                         sample_case(__name__, 'pass', 'skip'))],
+                    calls.append)
+        step.run(result)
+        self.assertEqual(calls, [True, False])
+
+    def test_run_stopped(self):
+        calls = []
+        step = Step([_sample_suite()], calls.append)
+
+        result = unittest.TestResult()
+        result.stop()
+        step.run(result)
+
+        self.assertEqual(result.testsRun, 0)
+        self.assertEqual(calls, [])
+
+    def test_run_setup(self):
+        calls = []
+        step = Step([_sample_suite()],
+                    lambda failed: calls.append('callback'),
+                    lambda: calls.append('setup'))
+
+        step.run(unittest.TestResult())
+        self.assertEqual(calls, ['setup', 'callback'])
+
+class TestStepFixtures(ImportTrash, unittest.TestCase):
+    def setUp(self):
+        super(TestStepFixtures, self).setUp()
+
+        self.module = imp.new_module(_FIXTURES_MODULE)
+        exec(_FIXTURES_SOURCE, self.module.__dict__)
+        sys.modules[_FIXTURES_MODULE] = self.module
+        self.modules_trash.append(_FIXTURES_MODULE)
+
+    def step(self):
+        calls = self.module.calls
+        tests = unittest.defaultTestLoader.loadTestsFromModule(self.module)
+        return Step([tests], lambda failed: calls.append('callback'))
+
+    def test_run_tear_down(self):
+        result = unittest.TestResult()
+        unittest.TestSuite([self.step(), self.step()]).run(result)
+
+        self.assertEqual(result.testsRun, 2)
+        self.assertEqual(self.module.calls,
+                         ['tearDownClass', 'tearDownModule', 'callback'] * 2)
+
+    def test_run_tear_down_failed(self):
+        def tear_down_module():
+            raise RuntimeError('Broken fixture')
+
+        self.module.tearDownModule = tear_down_module
+
+        outcomes = []
+        tests = unittest.defaultTestLoader.loadTestsFromModule(self.module)
+        result = unittest.TestResult()
+        unittest.TestSuite([Step([tests], outcomes.append)]).run(result)
+
+        self.assertEqual(len(result.errors), 1)
+        self.assertEqual(outcomes, [True])
+
+class TestRunner(unittest.TestCase):
+    def test_run(self):
+        runner = Runner(stream=StringIO.StringIO(), verbosity=0)
+        result = runner.run(_sample_suite())
+
+        self.assertNotIsInstance(result, TimingResult)
+        self.assertEqual(result.testsRun, 3)
+
+    def test_run_timings(self):
+        timings = Timings()
+        runner = Runner(timings, stream=StringIO.StringIO(), verbosity=0)
+        result = runner.run(_sample_suite())
+
+        self.assertIsInstance(result, TimingResult)
+        self.assertEqual(len(timings.tests), 3)
+
+    def test_run_write(self):
+        records = []
+        runner = Runner(write=records.append, stream=StringIO.StringIO(),
+                        verbosity=0)
+        runner.run(_sample_suite())
+
+        self.assertEqual([record['outcome'] for record in records],
+                         ['error', 'failure', 'success'])
+
+    def test_run_max_failures(self):
+        stream = StringIO.StringIO()
+        runner = Runner(max_failures=2, stream=stream, verbosity=0)
+        result = runner.run(unittest.TestSuite([_sample_suite(),
+                                                _sample_suite()]))
+
+        self.assertEqual(result.testsRun, 2)
+        self.assertTrue(result.shouldStop)
+        self.assertIn('FAILED (failures=1, errors=1)', stream.getvalue())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import os
+import shutil
+import tempfile
+
+# Reload module to run its global section under coverage supervision
+import distcovery.scope
+reload(distcovery.scope)
+
+from distcovery.scope import package_roots, imported_names, module_files
+
+class _MockDistribution(object):
+    def __init__(self, py_modules=None, packages=None):
+        self.py_modules = py_modules
+        self.packages = packages
+
+_SAMPLE_SOURCE = 'import os, xxx.yyy\n' \
+                 'from zzz import first as second\n' \
+                 'from . import relative\n' \
+                 'def function():\n' \
+                 '    import www\n'
+
+class TestScope(unittest.TestCase):
+    def setUp(self):
+        super(TestScope, self).setUp()
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        super(TestScope, self).tearDown()
+
+    def create(self, *parts, **kwargs):
+        path = os.path.join(self.directory, *parts)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+
+        with open(path, 'w') as stream:
+            stream.write(kwargs.get('source', ''))
+
+        return path
+
+    def test_package_roots(self):
+        self.assertEqual(package_roots(_MockDistribution()), set())
+        self.assertEqual(package_roots(_MockDistribution(['xxx'],
+                                                         ['yyy', 'yyy.zzz'])),
+                         set(['xxx', 'yyy']))
+
+    def test_imported_names(self):
+        path = self.create('test_sample.py', source=_SAMPLE_SOURCE)
+        self.assertEqual(sorted(imported_names(path)),
+                         ['os', 'www', 'xxx.yyy', 'zzz', 'zzz.first'])
+
+    def test_imported_names_relative(self):
+        path = self.create('test_sample.py', source=_SAMPLE_SOURCE)
+        self.assertEqual(sorted(imported_names(path, 'aaa.bbb')),
+                         ['aaa.bbb', 'aaa.bbb.relative', 'os', 'www',
+                          'xxx.yyy', 'zzz', 'zzz.first'])
+
+    def test_module_files(self):
+        init = self.create('xxx', '__init__.py')
+        module = self.create('xxx', 'yyy.py')
+        self.create('xxx', 'zzz.py')
+        single = self.create('www.py')
+
+        self.assertEqual(module_files(['os', 'xxx.yyy.function', 'www'],
+                                      self.directory, set(['xxx', 'www'])),
+                         sorted([init, module, single]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,10 @@
 import unittest
 import os
 import sys
+import shutil
+import tempfile
+import imp
+import json
 import StringIO
 
 from distutils import log
@@ -10,16 +14,95 @@ from distutils.dist import Distribution
 from utils import mock_directory_tree, PreserveOs, ImportTrash
 
 # Reload module to run its global section under coverage supervision
-import distcovery.test
-reload(distcovery.test)
 import distcovery.importer
 reload(distcovery.importer)
+import distcovery.test
+reload(distcovery.test)
 
 from distcovery.exceptions import NoTestModulesException, \
-                                  UnknownModulesException
+                                  UnknownModulesException, \
+                                  InvalidOptionValue, TestsFailedException, \
+                                  RemoteTestsFailedException, \
+                                  UnknownTestsException, \
+                                  CoverageThresholdException
 from distcovery.path import Package
+from distcovery.cache import Cache
+from distcovery.affected import Dependencies
+from distcovery.result import Summary
+from distcovery.history import History
+from distcovery.runner import Runner
+from distcovery.profiling import make_directory
+from distcovery.result_cache import ResultCache
 from distcovery.test import Test
 
+class _MockRunner(Runner):
+    runs = []
+
+    def __init__(self, **kwargs):
+        self.runs.append((kwargs, []))
+        super(_MockRunner, self).__init__(stream=StringIO.StringIO(), **kwargs)
+
+    def _makeResult(self):
+        result = super(_MockRunner, self)._makeResult()
+        tests = self.runs[-1][1]
+
+        start_test = result.startTest
+        def startTest(test):
+            tests.append(test.id())
+            start_test(test)
+
+        result.startTest = startTest
+        return result
+
+_SAMPLE_SOURCE = 'import unittest\n' \
+                 'class Sample(unittest.TestCase):\n' \
+                 '    def test_pass(self):\n' \
+                 '        pass\n'
+
+_FAILING_SOURCE = 'import unittest\n' \
+                  'class Sample(unittest.TestCase):\n' \
+                  '    def test_fail(self):\n' \
+                  '        self.fail(\'Expected failure\')\n'
+
+_BROKEN_SOURCE = 'import unittest\n' \
+                 'def setUpModule():\n' \
+                 '    raise RuntimeError(\'Broken fixture\')\n' \
+                 'class Sample(unittest.TestCase):\n' \
+                 '    def test_pass(self):\n' \
+                 '        pass\n'
+
+class _MockCoverage(object):
+    def __init__(self, contexts=None):
+        self.calls = []
+        self.session = contexts is not None
+        self.contexts = contexts
+
+    def pause(self):
+        self.calls.append('pause')
+
+    def resume(self):
+        self.calls.append('resume')
+
+    def switch_context(self, name):
+        self.calls.append('context:%s' % name)
+
+    def context_files(self):
+        return self.contexts
+
+class _MockCollector(object):
+    def __init__(self, files):
+        self.files = files
+        self.changed = False
+
+    def tests(self, path):
+        return self.files.get(path, [])
+
+    def contains(self, path, case, method=None):
+        return path in self.files
+
+    def prune(self, paths):
+        pass
+
 class TestTest(ImportTrash, PreserveOs, unittest.TestCase):
     def setUp(self):
         super(TestTest, self).setUp()
@@ -30,10 +113,19 @@ class TestTest(ImportTrash, PreserveOs, unittest.TestCase):
         self.stdout = StringIO.StringIO()
         sys.stdout = self.stdout
 
-        self.__unittest_main = unittest.main
+        _MockRunner.runs = []
+        self.__runner = distcovery.test.Runner
+        distcovery.test.Runner = _MockRunner
+
+        self.__run_modules = distcovery.test.run_modules
+        self.__send_request = distcovery.test.send_request
+        self.__server = distcovery.test.Server
 
     def tearDown(self):
-        unittest.main = self.__unittest_main
+        distcovery.test.Server = self.__server
+        distcovery.test.send_request = self.__send_request
+        distcovery.test.run_modules = self.__run_modules
+        distcovery.test.Runner = self.__runner
 
         sys.stdout = self.__stdout
 
@@ -41,6 +133,17 @@ class TestTest(ImportTrash, PreserveOs, unittest.TestCase):
 
         super(TestTest, self).tearDown()
 
+    def sample_modules(self, source=_SAMPLE_SOURCE):
+        for name in sorted(self.expected_content.itervalues()):
+            module = imp.new_module(name)
+            exec(source, module.__dict__)
+            sys.modules[name] = module
+            self.modules_trash.append(name)
+
+            parent, separator, child = name.rpartition('.')
+            if separator:
+                setattr(sys.modules[parent], child, module)
+
     def test_class_attributes(self):
         self.assertTrue(issubclass(Test, Command))
         self.assertTrue(hasattr(Test, 'description'))
@@ -53,6 +156,18 @@ class TestTest(ImportTrash, PreserveOs, unittest.TestCase):
         self.assertEqual(test.module, None)
         self.assertEqual(test.coverage_base, None)
         self.assertEqual(test.no_coverage, None)
+        self.assertEqual(test.jobs, 1)
+        self.assertEqual(test.cache_dir, None)
+        self.assertEqual(test.serve, None)
+        self.assertEqual(test.connect, None)
+        self.assertEqual(test.lazy, None)
+        self.assertEqual(test.durations, None)
+        self.assertEqual(test.durations_file, None)
+        self.assertEqual(test.order, None)
+        self.assertEqual(test.last_failed, None)
+        self.assertEqual(test.failed_first, None)
+        self.assertEqual(test.fail_fast, None)
+        self.assertEqual(test.max_failures, None)
         self.assertEqual(test.test_root, 'test')
 
     def test_finalize_options(self):
@@ -61,6 +176,116 @@ class TestTest(ImportTrash, PreserveOs, unittest.TestCase):
 
         test.finalize_options()
         self.assertEqual(test.coverage_base, 'test')
+        self.assertEqual(test.jobs, 1)
+        self.assertEqual(test.cache_dir, '.distcovery')
+
+    def test_finalize_options_jobs(self):
+        test = Test(Distribution())
+        test.jobs = '4'
+
+        test.finalize_options()
+        self.assertEqual(test.jobs, 4)
+
+    def test_finalize_options_invalid_jobs(self):
+        for jobs in ('0', '-1', 'many'):
+            test = Test(Distribution())
+            test.jobs = jobs
+
+            with self.assertRaises(InvalidOptionValue) as ctx:
+                test.finalize_options()
+
+            self.assertEqual(ctx.exception.message,
+                             InvalidOptionValue.template % \
+                             {'option': 'jobs', 'value': jobs,
+                              'expected': 'positive integer'})
+
+    def test_finalize_options_durations(self):
+        test = Test(Distribution())
+        test.durations = '5'
+
+        test.finalize_options()
+        self.assertEqual(test.durations, 5)
+
+        test = Test(Distribution())
+        test.durations = '0'
+        with self.assertRaises(InvalidOptionValue):
+            test.finalize_options()
+
+    def test_finalize_options_order(self):
+        test = Test(Distribution())
+        test.order = 'longest'
+        test.finalize_options()
+        self.assertEqual(test.order, 'longest')
+
+        test = Test(Distribution())
+        test.order = 'random'
+        with self.assertRaises(InvalidOptionValue) as ctx:
+            test.finalize_options()
+
+        self.assertEqual(ctx.exception.message,
+                         InvalidOptionValue.template % \
+                         {'option': 'order', 'value': 'random',
+                          'expected': '"shortest" or "longest"'})
+
+    def test_finalize_options_shard(self):
+        test = Test(Distribution())
+        test.shard = '2/3'
+        test.finalize_options()
+        self.assertEqual(test.shard, (2, 3))
+
+        for shard in ('0/3', '4/3', '1', 'a/b'):
+            test = Test(Distribution())
+            test.shard = shard
+
+            with self.assertRaises(InvalidOptionValue) as ctx:
+                test.finalize_options()
+
+            self.assertEqual(ctx.exception.message,
+                             InvalidOptionValue.template % \
+                             {'option': 'shard', 'value': shard,
+                              'expected': 'INDEX/TOTAL with ' \
+                                          '1 <= INDEX <= TOTAL'})
+
+    def test_finalize_options_max_failures(self):
+        test = Test(Distribution())
+        test.fail_fast = True
+        test.finalize_options()
+        self.assertEqual(test.max_failures, 1)
+
+        test = Test(Distribution())
+        test.fail_fast = True
+        test.max_failures = '3'
+        test.finalize_options()
+        self.assertEqual(test.max_failures, 3)
+
+        test = Test(Distribution())
+        test.max_failures = '0'
+        with self.assertRaises(InvalidOptionValue):
+            test.finalize_options()
+
+    def test_finalize_options_fail_under(self):
+        test = Test(Distribution())
+        test.fail_under = '87.5'
+        test.finalize_options()
+        self.assertEqual(test.fail_under, 87.5)
+
+        for fail_under in ('-1', '101', 'xxx'):
+            test = Test(Distribution())
+            test.fail_under = fail_under
+
+            with self.assertRaises(InvalidOptionValue) as ctx:
+                test.finalize_options()
+
+            self.assertEqual(ctx.exception.message,
+                             InvalidOptionValue.template % \
+                             {'option': 'fail_under', 'value': fail_under,
+                              'expected': 'percentage from 0 to 100'})
+
+    def test_finalize_options_cache_size(self):
+        test = Test(Distribution())
+        test.cache_size = '10'
+        test.finalize_options()
+        self.assertEqual(test.cache_size, 10)
 
     def test_collect_tests_empty(self):
         tree = {('.',): tuple()}
@@ -96,6 +321,35 @@ class TestTest(ImportTrash, PreserveOs, unittest.TestCase):
             content[alias] = importable.str_name()
         self.assertEqual(content, self.expected_content)
 
+    def test_collect_tests_index(self):
+        listdir = os.listdir
+        self.full_test_tree()
+        os.path.getmtime = lambda path: 1.0
+
+        cache_dir = tempfile.mkdtemp()
+        try:
+            test = Test(Distribution())
+            test.test_root = '.'
+            test.cache_dir = cache_dir
+            test.collect_tests()
+
+            index = Cache(cache_dir).load('index')
+            self.assertIn('.', index)
+
+            os.listdir = None
+            test = Test(Distribution())
+            test.test_root = '.'
+            test.cache_dir = cache_dir
+            test.collect_tests()
+        finally:
+            os.listdir = listdir
+            shutil.rmtree(cache_dir)
+
+        content = {}
+        for alias, importable in test.test_package.content.iteritems():
+            content[alias] = importable.str_name()
+        self.assertEqual(content, self.expected_content)
+
     def test_register_importer(self):
         self.full_test_tree()
 
@@ -126,6 +380,25 @@ class TestTest(ImportTrash, PreserveOs, unittest.TestCase):
                          '\t\tsub_third.sub_second:\n' \
                          '\t\t\tsub_third.sub_second.sub_first\n')
 
+    def test_print_test_package_tests(self):
+        self.full_test_tree()
+
+        test = Test(Distribution())
+        test.test_root = '.'
+        test.collect_tests()
+        path = test.test_package.content['sub_first.sub_first'].path
+        test.collector = _MockCollector({path: [['First', ['test_a',
+                                                           'test_b']],
+                                                ['Second', ['test_c']]]})
+        test.print_test_package()
+
+        self.assertIn('\tsub_first:\n' \
+                      '\t\tsub_first.sub_first\n' \
+                      '\t\t\tFirst.test_a\n' \
+                      '\t\t\tFirst.test_b\n' \
+                      '\t\t\tSecond.test_c\n' \
+                      '\tsub_third:\n', self.stdout.getvalue())
+
     def test_validate_modules_unknown_modules(self):
         self.full_test_tree()
 
@@ -153,6 +426,357 @@ class TestTest(ImportTrash, PreserveOs, unittest.TestCase):
         self.meta_path_trash.append(test.importer)
         test.validate_modules(['second', 'first', 'sub_first'])
 
+    def test_parse_modules_default(self):
+        self.full_test_tree()
+
+        test = Test(Distribution())
+        test.test_root = '.'
+        test.collect_tests()
+        self.assertEqual(test.parse_modules(), [(None, None)])
+
+    def test_parse_modules(self):
+        self.full_test_tree()
+
+        test = Test(Distribution())
+        test.test_root = '.'
+        test.module = 'first, sub_first:Sample.test_pass,:Sample,second:'
+        test.collect_tests()
+        self.assertEqual(test.parse_modules(),
+                         [('first', None),
+                          ('sub_first', 'Sample.test_pass'),
+                          (None, 'Sample'),
+                          ('second', '')])
+
+    def test_parse_modules_unknown_modules(self):
+        self.full_test_tree()
+
+        test = Test(Distribution())
+        test.test_root = '.'
+        test.module = 'first,unknown:Sample'
+        test.collect_tests()
+        with self.assertRaises(UnknownModulesException) as ctx:
+            test.parse_modules()
+
+        self.assertEqual(ctx.exception.message,
+                         UnknownModulesException.template % \
+                         {'modules': '"unknown"', 'suffix': ''})
+
+    def test_map_tests(self):
+        self.full_test_tree()
+        self.sample_modules()
+
+        test = Test(Distribution())
+        test.test_root = '.'
+        test.collect_tests()
+        test.register_importer()
+        self.meta_path_trash.append(test.importer)
+        self.modules_trash.extend(test.importer.aliases.values())
+
+        self.assertEqual(test.map_tests('second', 'Sample'),
+                         ['test_second.Sample'])
+        self.assertEqual(test.map_tests('second', 'Sample.test_pass'),
+                         ['test_second.Sample.test_pass'])
+
+        self.assertEqual(test.map_tests('sub_third', 'Sample.test_pass'),
+                         ['test_sub_third.test_sub_first.Sample.test_pass',
+                          'test_sub_third.test_sub_second.test_sub_first.' \
+                          'Sample.test_pass'])
+        self.assertEqual(len(test.map_tests(None, 'Sample')), 5)
+
+    def test_map_tests_lazy(self):
+        self.full_test_tree()
+        self.sample_modules()
+
+        test = Test(Distribution())
+        test.test_root = '.'
+        test.lazy = True
+        test.collect_tests()
+        test.register_importer()
+        self.meta_path_trash.append(test.importer)
+        self.modules_trash.extend(test.importer.aliases.values())
+
+        self.assertEqual(test.map_tests('sub_third', 'Sample.test_pass'),
+                         ['test_sub_third.test_sub_first.Sample.test_pass',
+                          'test_sub_third.test_sub_second.test_sub_first.' \
+                          'Sample.test_pass'])
+
+    def test_map_tests_static(self):
+        self.full_test_tree()
+
+        for lazy in (False, True):
+            self.sample_modules()
+            # Import of the module without the test case would fail
+            del sys.modules['test_sub_third.test_sub_second.test_sub_first']
+            del sys.modules['test_sub_third.test_sub_second'].test_sub_first
+
+            test = Test(Distribution())
+            test.test_root = '.'
+            test.lazy = lazy
+            test.collect_tests()
+            test.register_importer()
+            self.meta_path_trash.append(test.importer)
+            self.modules_trash.extend(test.importer.aliases.values())
+
+            path = test.test_package.content['sub_third.sub_first'].path
+            test.collector = _MockCollector({path: []})
+            self.assertEqual(test.map_tests('sub_third', 'Sample.test_pass'),
+                             ['test_sub_third.test_sub_first.Sample.' \
+                              'test_pass'])
+
+    def test_map_tests_unknown(self):
+        self.full_test_tree()
+        self.sample_modules()
+
+        test = Test(Distribution())
+        test.test_root = '.'
+        test.collect_tests()
+        test.register_importer()
+        self.meta_path_trash.append(test.importer)
+        self.modules_trash.extend(test.importer.aliases.values())
+
+        for selector in ('Unknown', 'Sample.test_unknown'):
+            with self.assertRaises(UnknownTestsException) as ctx:
+                test.map_tests('second', selector)
+
+            self.assertEqual(ctx.exception.message,
+                             UnknownTestsException.template % \
+                             {'modules': '"second:%s"' % selector,
+                              'suffix': ''})
+
+    def test_select_affected(self):
+        self.full_test_tree()
+
+        changed_files = distcovery.test.changed_files
+        distcovery.test.changed_files = lambda since: set([since])
+        try:
+            test = Test(Distribution())
+            test.test_root = '.'
+            test.changed_since = 'src/pkg/first.py'
+            test.dependencies = Dependencies({
+                'first': ['pkg/first.py'],
+                'second': ['pkg/second.py'],
+                'sub_first.sub_first': ['pkg/second.py'],
+                'sub_third.sub_first': ['pkg/first.py', 'pkg/second.py']})
+            test.collect_tests()
+
+            selection = test.select_affected([(None, None),
+                                              ('second', 'Sample')])
+        finally:
+            distcovery.test.changed_files = changed_files
+
+        self.assertEqual(selection,
+                         [('second', 'Sample'),
+                          ('first', None),
+                          ('sub_third.sub_first', None),
+                          ('sub_third.sub_second.sub_first', None)])
+
+    def test_scope_coverage(self):
+        self.full_test_tree()
+
+        closures = []
+        class MockSources(object):
+            def __init__(self, bases):
+                self.bases = bases
+
+            def closure(self, paths, index=None):
+                closures.append((self.bases, index))
+                return sorted(paths)
+
+        sources = distcovery.test.Sources
+        distcovery.test.Sources = MockSources
+        try:
+            test = Test(Distribution({'packages': ['pkg']}))
+            test.test_root = '.'
+            test.coverage_base = 'base'
+            test.collect_tests()
+            self.assertIsNone(test.scope_coverage([(None, None)]))
+
+            test.coverage_scope = True
+            test.rerun = ['test_second.Sample.test_pass']
+            files = test.scope_coverage([('sub_third.sub_second', None)])
+        finally:
+            distcovery.test.Sources = sources
+
+        self.assertEqual(files,
+                         [os.path.join('.', 'test_second.py'),
+                          os.path.join('.', 'test_sub_third',
+                                       'test_sub_second',
+                                       'test_sub_first.py')])
+        self.assertEqual(closures,
+                         [([('.', None), ('base', set(['pkg']))], 1)])
+
+    def test_create_progress(self):
+        test = Test(Distribution())
+        test.history = History()
+        estimates = {'first': 1.0, 'second': 2.0}
+        self.assertIsNone(test.create_progress(estimates))
+
+        test.progress = True
+        self.assertEqual(test.create_progress(estimates).total, 2)
+        self.assertIsNone(test.create_progress({'first': 1.0}))
+
+    def test_sample_coverage(self):
+        test = Test(Distribution())
+        self.assertIsNone(test.sample_coverage(['a', 'b', 'c']))
+
+        test.coverage_sample = 2
+        self.assertEqual(test.sample_coverage(['a', 'b', 'c']),
+                         set(['a', 'c']))
+        self.assertEqual(self.stdout.getvalue(),
+                         'Measuring coverage of 2 of 3 test modules\n')
+
+        test.no_coverage = True
+        self.assertIsNone(test.sample_coverage(['a', 'b', 'c']))
+
+    def test_build_suite_measured(self):
+        self.full_test_tree()
+        self.sample_modules()
+
+        test = Test(Distribution())
+        test.test_root = '.'
+        test.collect_tests()
+        test.register_importer()
+        self.meta_path_trash.append(test.importer)
+
+        coverage = _MockCoverage()
+        suite = test.build_suite([('first', None), ('second', None)],
+                                 coverage, None, set(['first']))
+        result = unittest.TestResult()
+        suite.run(result)
+
+        self.assertEqual(result.testsRun, 2)
+        self.assertEqual(coverage.calls,
+                         ['context:first', 'pause', 'resume'])
+        self.assertEqual(test.unmeasured, ['second'])
+
+    def test_collect_dependencies(self):
+        self.full_test_tree()
+        self.sample_modules()
+
+        test = Test(Distribution())
+        test.test_root = '.'
+        test.coverage_base = '/base'
+        test.dependencies = Dependencies()
+        test.collect_tests()
+        test.register_importer()
+        self.meta_path_trash.append(test.importer)
+
+        coverage = _MockCoverage({'first': set(['/base/pkg/first.py']),
+                                  'second:Sample': set(['/base/pkg/x.py'])})
+        suite = test.build_suite([('first', None), ('second', None),
+                                  ('second', 'Sample')], coverage, None)
+        suite.run(unittest.TestResult())
+
+        self.assertEqual(test.pending_dependencies, ['first', 'second'])
+        test.collect_dependencies(coverage)
+
+        self.assertEqual(test.pending_dependencies, [])
+        self.assertEqual(test.dependencies.files,
+                         {'first': ['pkg/first.py', 'test_first.py'],
+                          'second': ['test_second.py']})
+
+    def test_shard_modules(self):
+        self.full_test_tree()
+
+        selections = []
+        for index in (1, 2):
+            test = Test(Distribution())
+            test.test_root = '.'
+            test.shard = (index, 2)
+            test.collect_tests()
+            selections.append(test.shard_modules([(None, None),
+                                                  ('first', 'Sample')]))
+
+        self.assertEqual(selections,
+                         [[('first', None),
+                           ('second', None),
+                           ('sub_third.sub_first', None)],
+                          [('first', 'Sample'),
+                           ('sub_first.sub_first', None),
+                           ('sub_third.sub_second.sub_first', None)]])
+
+    def test_shard_modules_histories(self):
+        self.full_test_tree()
+
+        shards = []
+        for index, durations in ((1, {'first': 5.0}),
+                                 (2, {'second': 5.0, 'sub_first': 1.0}),
+                                 (3, {})):
+            test = Test(Distribution())
+            test.test_root = '.'
+            test.shard = (index, 3)
+            test.history = History(durations)
+            test.collect_tests()
+            shards.append([alias for alias, test \
+                           in test.shard_modules([(None, None)])])
+
+        self.assertEqual(shards, [['first', 'sub_third.sub_first'],
+                                  ['second',
+                                   'sub_third.sub_second.sub_first'],
+                                  ['sub_first.sub_first']])
+
+    def test_shard_modules_durations(self):
+        self.full_test_tree()
+
+        handle, path = tempfile.mkstemp()
+        os.close(handle)
+        try:
+            test = Test(Distribution())
+            test.test_root = '.'
+            test.shard = (1, 2)
+            test.shard_durations = path
+            test.collect_tests()
+
+            with self.assertRaises(InvalidOptionValue):
+                test.shard_modules([(None, None)])
+
+            with open(path, 'w') as stream:
+                json.dump({'first': 4.0, 'second': 1.0,
+                           'sub_first.sub_first': 1.0,
+                           'sub_third.sub_first': 1.0,
+                           'sub_third.sub_second.sub_first': 1.0}, stream)
+
+            self.assertEqual(test.shard_modules([(None, None)]),
+                             [('first', None)])
+        finally:
+            os.remove(path)
+
+    def test_load_shard_durations(self):
+        self.full_test_tree()
+
+        handle, path = tempfile.mkstemp()
+        os.close(handle)
+        try:
+            test = Test(Distribution())
+            test.test_root = '.'
+            test.shard_durations = path
+            test.collect_tests()
+
+            for durations in (['first'], {'first': 'slow'},
+                              {'modules': {'test_first': 1.0}}):
+                with open(path, 'w') as stream:
+                    json.dump(durations, stream)
+
+                with self.assertRaises(InvalidOptionValue):
+                    test.load_shard_durations()
+
+            with open(path, 'w') as stream:
+                json.dump({'tests': {'test_second.Sample.test_pass': \
+                                         {'wall': 2.0, 'cpu': 1.0,
+                                          'module': 'test_second'}},
+                           'modules': {'test_first': {'wall': 4.0,
+                                                      'cpu': 3.0},
+                                       'test_second': {'wall': 1.0,
+                                                       'cpu': 1.0},
+                                       'test_unknown': {'wall': 1.0,
+                                                        'cpu': 1.0}}},
+                          stream)
+
+            self.assertEqual(test.load_shard_durations(),
+                             {'first': 4.0, 'second': 3.0})
+        finally:
+            os.remove(path)
+
     def test_map_module(self):
         self.full_test_tree()
 
@@ -169,6 +793,22 @@ class TestTest(ImportTrash, PreserveOs, unittest.TestCase):
         self.assertEqual(test.map_module('sub_third.sub_second.sub_first'),
                          'test_sub_third.test_sub_second.test_sub_first')
 
+    def test_expand_modules(self):
+        self.full_test_tree()
+
+        test = Test(Distribution())
+        test.test_root = '.'
+        test.collect_tests()
+
+        self.assertEqual(test.expand_modules([None]),
+                         ['first', 'second', 'sub_first.sub_first',
+                          'sub_third.sub_first',
+                          'sub_third.sub_second.sub_first'])
+        modules = ['sub_third.sub_second', 'first',
+                   'sub_third.sub_second.sub_first']
+        self.assertEqual(test.expand_modules(modules),
+                         ['first', 'sub_third.sub_second.sub_first'])
+
     def test_run_print_test_package(self):
         self.full_test_tree()
 
@@ -190,53 +830,706 @@ class TestTest(ImportTrash, PreserveOs, unittest.TestCase):
 
     def test_run(self):
         self.full_test_tree()
+        self.sample_modules()
 
-        arguments = []
-        def main(*args, **kwargs):
-            arguments.append((args, kwargs))
+        test = Test(Distribution())
+        test.test_root = '.'
+        test.module = 'first'
+        test.no_coverage = True
+        test.run()
+
+        self.assertEqual(_MockRunner.runs,
+                         [({'timings': None, 'max_failures': None,
+                            'write': None, 'verbosity': 1},
+                           ['test_first.Sample.test_pass'])])
+
+    def test_run_default(self):
+        self.full_test_tree()
+        self.sample_modules()
+
+        test = Test(Distribution())
+        test.test_root = '.'
+        test.module = None
+        test.no_coverage = True
+        test.run()
+
+        self.assertEqual(len(_MockRunner.runs), 1)
+        kwargs, tests = _MockRunner.runs[0]
+        self.assertEqual(sorted(tests),
+                         ['test_first.Sample.test_pass',
+                          'test_second.Sample.test_pass',
+                          'test_sub_first.test_sub_first.Sample.test_pass',
+                          'test_sub_third.test_sub_first.Sample.test_pass',
+                          'test_sub_third.test_sub_second.test_sub_first.' \
+                          'Sample.test_pass'])
 
-        unittest.main = main
+    def test_run_modules(self):
+        self.full_test_tree()
+        self.sample_modules()
+
+        test = Test(Distribution())
+        test.test_root = '.'
+        test.module = 'second,first'
+        test.no_coverage = True
+        test.run()
+
+        self.assertEqual(_MockRunner.runs,
+                         [({'timings': None, 'max_failures': None,
+                            'write': None, 'verbosity': 1},
+                           ['test_second.Sample.test_pass',
+                            'test_first.Sample.test_pass'])])
+
+    def test_run_tests_selection(self):
+        self.full_test_tree()
+        self.sample_modules()
+
+        test = Test(Distribution())
+        test.test_root = '.'
+        test.module = 'second:Sample.test_pass'
+        test.no_coverage = True
+        test.run()
+
+        self.assertEqual(_MockRunner.runs,
+                         [({'timings': None, 'max_failures': None,
+                            'write': None, 'verbosity': 1},
+                           ['test_second.Sample.test_pass'])])
+
+    def test_run_import_error(self):
+        self.full_test_tree()
 
         test = Test(Distribution())
         test.test_root = '.'
         test.module = 'first'
         test.no_coverage = True
+
+        with self.assertRaises(TestsFailedException) as ctx:
+            test.run()
+
+        self.assertEqual(ctx.exception.message,
+                         TestsFailedException.template % \
+                         {'failures': 0, 'errors': 1})
+        self.assertEqual(_MockRunner.runs[0][1], ['test_first'])
+
+    def test_run_durations(self):
+        self.full_test_tree()
+        self.sample_modules()
+
+        handle, path = tempfile.mkstemp()
+        os.close(handle)
+        try:
+            test = Test(Distribution())
+            test.test_root = '.'
+            test.module = 'first,second'
+            test.no_coverage = True
+            test.durations = 1
+            test.durations_file = path
+            test.run()
+
+            with open(path) as stream:
+                timings = json.load(stream)
+        finally:
+            os.remove(path)
+
+        self.assertEqual(sorted(timings['tests']),
+                         ['test_first.Sample.test_pass',
+                          'test_second.Sample.test_pass'])
+        self.assertEqual(sorted(timings['modules']),
+                         ['test_first', 'test_second'])
+        self.assertIn('Slowest tests', self.stdout.getvalue())
+        self.assertIn('Slowest test module imports', self.stdout.getvalue())
+
+    def test_run_results(self):
+        listdir = os.listdir
+        self.full_test_tree()
+        self.sample_modules(_FAILING_SOURCE)
+
+        directory = tempfile.mkdtemp()
+        try:
+            test = Test(Distribution())
+            test.test_root = '.'
+            test.module = 'first,second'
+            test.no_coverage = True
+            test.json_results = os.path.join(directory, 'results.json')
+            test.junit_xml = os.path.join(directory, 'results.xml')
+
+            with self.assertRaises(TestsFailedException):
+                test.run()
+
+            with open(test.json_results) as stream:
+                records = [json.loads(line) for line in stream]
+
+            with open(test.junit_xml) as stream:
+                xml = stream.read()
+        finally:
+            os.listdir = listdir
+            shutil.rmtree(directory)
+
+        self.assertEqual([(record['id'], record['outcome']) \
+                          for record in records],
+                         [('test_first.Sample.test_fail', 'failure'),
+                          ('test_second.Sample.test_fail', 'failure')])
+        self.assertIn('Expected failure', records[0]['message'])
+        self.assertEqual(xml.count('<testcase '), 2)
+        self.assertTrue(xml.endswith('</testsuite>\n'))
+        self.assertEqual(test.writers, [])
+
+    def test_run_cached(self):
+        listdir = os.listdir
+        self.full_test_tree()
+        self.sample_modules()
+        os.path.getmtime = lambda path: 1.0
+
+        cache_dir = tempfile.mkdtemp()
+        try:
+            for index in range(2):
+                test = Test(Distribution())
+                test.test_root = '.'
+                test.module = 'first,second'
+                test.cache_dir = cache_dir
+                test.no_coverage = True
+                test.run()
+
+            results = Cache(cache_dir).load('results')
+        finally:
+            os.listdir = listdir
+            shutil.rmtree(cache_dir)
+
+        self.assertEqual(len(results), 2)
+        self.assertEqual(len(test.cached), 2)
+        self.assertEqual([tests for kwargs, tests in _MockRunner.runs],
+                         [['test_first.Sample.test_pass',
+                           'test_second.Sample.test_pass'], []])
+        self.assertIn('Skipping 2 of 2 test modules', self.stdout.getvalue())
+
+    def test_run_cached_failed(self):
+        listdir = os.listdir
+        self.full_test_tree()
+        self.sample_modules(_FAILING_SOURCE)
+        os.path.getmtime = lambda path: 1.0
+
+        cache_dir = tempfile.mkdtemp()
+        try:
+            test = Test(Distribution())
+            test.test_root = '.'
+            test.module = 'first'
+            test.cache_dir = cache_dir
+            test.no_coverage = True
+            with self.assertRaises(TestsFailedException):
+                test.run()
+
+            results = Cache(cache_dir).load('results')
+        finally:
+            os.listdir = listdir
+            shutil.rmtree(cache_dir)
+
+        self.assertFalse(results)
+
+    def test_run_cached_fixture_error(self):
+        listdir = os.listdir
+        self.full_test_tree()
+        self.sample_modules(_BROKEN_SOURCE)
+        os.path.getmtime = lambda path: 1.0
+
+        cache_dir = tempfile.mkdtemp()
+        try:
+            test = Test(Distribution())
+            test.test_root = '.'
+            test.module = 'first'
+            test.cache_dir = cache_dir
+            test.no_coverage = True
+            with self.assertRaises(TestsFailedException):
+                test.run()
+
+            results = Cache(cache_dir).load('results')
+        finally:
+            os.listdir = listdir
+            shutil.rmtree(cache_dir)
+
+        self.assertEqual(test.failed_modules, ['test_first'])
+        self.assertFalse(results)
+
+    def test_update_results_unmeasured(self):
+        self.full_test_tree()
+
+        test = Test(Distribution())
+        test.test_root = '.'
+        test.collect_tests()
+        test.register_importer()
+        self.meta_path_trash.append(test.importer)
+
+        test.results = ResultCache()
+        test.result_keys = {'first': 'first-key', 'second': 'second-key'}
+        test.unmeasured = ['second']
+
+        coverage = _MockCoverage()
+        coverage.context_lines = lambda: {'first': {'/base/a.py': [1]},
+                                          'second': {'/base/b.py': [2]}}
+        test.update_results(Summary(), coverage)
+
+        self.assertEqual(test.results.entries.keys(), ['first-key'])
+        self.assertEqual(test.results.entries['first-key']['lines'],
+                         {'/base/a.py': [1]})
+
+    def test_run_no_cache(self):
+        listdir = os.listdir
+        self.full_test_tree()
+        self.sample_modules()
+        os.path.getmtime = lambda path: 1.0
+
+        cache_dir = tempfile.mkdtemp()
+        try:
+            test = Test(Distribution())
+            test.test_root = '.'
+            test.module = 'first'
+            test.cache_dir = cache_dir
+            test.no_cache = True
+            test.no_coverage = True
+            test.run()
+
+            results = Cache(cache_dir).load('results')
+        finally:
+            os.listdir = listdir
+            shutil.rmtree(cache_dir)
+
+        self.assertIsNone(test.results)
+        self.assertFalse(results)
+
+    def test_run_order(self):
+        listdir = os.listdir
+        self.full_test_tree()
+        self.sample_modules()
+        os.path.getmtime = lambda path: 1.0
+
+        stderr = sys.stderr
+        sys.stderr = StringIO.StringIO()
+
+        cache_dir = tempfile.mkdtemp()
+        try:
+            Cache(cache_dir).save('durations', {'first': 1.0,
+                                                'second': 3.0,
+                                                'sub_first.sub_first': 2.0})
+
+            test = Test(Distribution())
+            test.test_root = '.'
+            test.cache_dir = cache_dir
+            test.no_coverage = True
+            test.order = 'longest'
+            test.progress = True
+            test.run()
+
+            durations = Cache(cache_dir).load('durations')
+        finally:
+            os.listdir = listdir
+            shutil.rmtree(cache_dir)
+
+            progress = sys.stderr.getvalue()
+            sys.stderr = stderr
+
+        self.assertEqual(_MockRunner.runs[0][1],
+                         ['test_second.Sample.test_pass',
+                          'test_sub_first.test_sub_first.Sample.test_pass',
+                          'test_sub_third.test_sub_first.Sample.test_pass',
+                          'test_sub_third.test_sub_second.test_sub_first.' \
+                          'Sample.test_pass',
+                          'test_first.Sample.test_pass'])
+        self.assertEqual(sorted(durations),
+                         ['first', 'second', 'sub_first.sub_first',
+                          'sub_third.sub_first',
+                          'sub_third.sub_second.sub_first'])
+        self.assertIn('[1/5] second done, elapsed ', progress)
+        self.assertIn('[5/5] first done, elapsed ', progress)
+
+    def test_run_shard(self):
+        listdir = os.listdir
+        self.full_test_tree()
+        self.sample_modules()
+        os.path.getmtime = lambda path: 1.0
+
+        cache_dir = tempfile.mkdtemp()
+        try:
+            Cache(cache_dir).save('durations', {'first': 1.0})
+
+            test = Test(Distribution())
+            test.test_root = '.'
+            test.cache_dir = cache_dir
+            test.no_coverage = True
+            test.shard = (1, 2)
+            test.run()
+
+            durations = Cache(cache_dir).load('durations')
+        finally:
+            os.listdir = listdir
+            shutil.rmtree(cache_dir)
+
+        self.assertEqual(len(_MockRunner.runs[0][1]), 3)
+        self.assertEqual(durations, {'first': 1.0})
+
+    def run_failed(self, last_failed):
+        listdir = os.listdir
+        self.full_test_tree()
+        self.sample_modules()
+        os.path.getmtime = lambda path: 1.0
+
+        cache_dir = tempfile.mkdtemp()
+        try:
+            Cache(cache_dir).save('failed', ['test_first',
+                                             'test_second.Sample.test_pass'])
+
+            test = Test(Distribution())
+            test.test_root = '.'
+            test.cache_dir = cache_dir
+            test.no_coverage = True
+            test.module = 'first,sub_first'
+            test.last_failed = last_failed
+            test.failed_first = not last_failed
+            test.run()
+
+            failed = Cache(cache_dir).load('failed')
+        finally:
+            os.listdir = listdir
+            shutil.rmtree(cache_dir)
+
+        return _MockRunner.runs[0][1], failed
+
+    def test_run_last_failed(self):
+        tests, failed = self.run_failed(True)
+
+        self.assertEqual(tests, ['test_first.Sample.test_pass',
+                                 'test_second.Sample.test_pass'])
+        self.assertEqual(failed, [])
+
+    def test_run_failed_first(self):
+        tests, failed = self.run_failed(False)
+
+        self.assertEqual(tests,
+                         ['test_first.Sample.test_pass',
+                          'test_second.Sample.test_pass',
+                          'test_sub_first.test_sub_first.Sample.test_pass'])
+        self.assertEqual(failed, [])
+
+    def test_run_failed_fixture_error(self):
+        listdir = os.listdir
+        self.full_test_tree()
+        self.sample_modules(_BROKEN_SOURCE)
+        os.path.getmtime = lambda path: 1.0
+
+        cache_dir = tempfile.mkdtemp()
+        try:
+            test = Test(Distribution())
+            test.test_root = '.'
+            test.cache_dir = cache_dir
+            test.no_coverage = True
+            test.module = 'first'
+            with self.assertRaises(TestsFailedException):
+                test.run()
+
+            failed = Cache(cache_dir).load('failed')
+        finally:
+            os.listdir = listdir
+            shutil.rmtree(cache_dir)
+
+        self.assertEqual(failed, ['test_first'])
+
+    def test_run_failed(self):
+        self.full_test_tree()
+        self.sample_modules(_FAILING_SOURCE)
+
+        test = Test(Distribution())
+        test.test_root = '.'
+        test.module = 'first,second'
+        test.no_coverage = True
+
+        with self.assertRaises(TestsFailedException) as ctx:
+            test.run()
+
+        self.assertEqual(ctx.exception.message,
+                         TestsFailedException.template % \
+                         {'failures': 2, 'errors': 0})
+
+    def test_run_max_failures(self):
+        self.full_test_tree()
+        self.sample_modules(_FAILING_SOURCE)
+
+        test = Test(Distribution())
+        test.test_root = '.'
+        test.module = 'first,second,sub_first'
+        test.no_coverage = True
+        test.max_failures = 2
+
+        stderr = sys.stderr
+        sys.stderr = StringIO.StringIO()
+        try:
+            with self.assertRaises(TestsFailedException) as ctx:
+                test.run()
+
+            warning = sys.stderr.getvalue()
+        finally:
+            sys.stderr = stderr
+
+        self.assertEqual(ctx.exception.message,
+                         TestsFailedException.template % \
+                         {'failures': 2, 'errors': 0})
+        self.assertEqual(_MockRunner.runs[0][1],
+                         ['test_first.Sample.test_fail',
+                          'test_second.Sample.test_fail'])
+        self.assertEqual(warning, 'Stopped after 2 failed tests. ' \
+                                  'Ran 2 tests.\n')
+
+    def test_get_packages(self):
+        test = Test(Distribution({'packages': ['xxx', 'xxx.yyy'],
+                                  'py_modules': ['zzz']}))
+        self.assertEqual(test.get_packages(), ['xxx', 'xxx.yyy', 'zzz'])
+
+    def test_handle_request(self):
+        self.full_test_tree()
+        self.sample_modules()
+
+        test = Test(Distribution())
+        test.test_root = '.'
+        test.no_coverage = True
+        self.assertEqual(test.handle_request({'module': 'second',
+                                              'verbose': 2}), 0)
+
+        self.assertEqual(test.module, 'second')
+        self.assertEqual(_MockRunner.runs,
+                         [({'timings': None, 'max_failures': None,
+                            'write': None, 'verbosity': 2},
+                           ['test_second.Sample.test_pass'])])
+
+    def test_handle_request_failed(self):
+        self.full_test_tree()
+        self.sample_modules(_FAILING_SOURCE)
+
+        test = Test(Distribution())
+        test.test_root = '.'
+        test.no_coverage = True
+        self.assertEqual(test.handle_request({'module': 'second'}), 1)
+
+    def test_run_fail_under(self):
+        self.full_test_tree()
+        self.sample_modules()
+
+        reports = []
+        class MockCoverage(object):
+            def __init__(self, *args):
+                pass
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *args):
+                pass
+
+            def switch_context(self, name):
+                pass
+
+            def combine(self):
+                pass
+
+            def context_files(self):
+                return None
+
+            def report(self, *args):
+                reports.append(args)
+                return 50.0
+
+        coverage = distcovery.test.Coverage
+        distcovery.test.Coverage = MockCoverage
+        try:
+            test = Test(Distribution())
+            test.test_root = '.'
+            test.module = 'first'
+            test.coverage_xml = 'coverage.xml'
+            test.fail_under = 40.0
+            test.run()
+
+            test.fail_under = 60.0
+            with self.assertRaises(CoverageThresholdException) as ctx:
+                test.run()
+        finally:
+            distcovery.test.Coverage = coverage
+
+        self.assertEqual(ctx.exception.message,
+                         CoverageThresholdException.template % \
+                         {'total': 50.0, 'threshold': 60.0})
+        self.assertEqual(reports, [('coverage.xml', None, None)]*2)
+
+    def test_run_server(self):
+        servers = []
+        class MockServer(object):
+            def __init__(self, *args):
+                servers.append(args)
+
+            def serve_forever(self):
+                servers.append('serving')
+
+        distcovery.test.Server = MockServer
+
+        test = Test(Distribution({'py_modules': ['StringIO']}))
+        test.coverage_base = 'xxx'
+        test.serve = 'socket'
+        first_path = sys.path[0]
+        test.run()
+
+        self.assertEqual(sys.path[0], first_path)
+        self.assertEqual(len(servers), 2)
+        path, handler, preloaded, reimport = servers[0]
+        self.assertEqual(path, 'socket')
+        self.assertEqual(handler, test.handle_request)
+        self.assertIn('StringIO', preloaded)
+        self.assertTrue(reimport)
+        self.assertEqual(servers[1], 'serving')
+
+    def test_run_client(self):
+        requests = []
+        def send_request(*args):
+            requests.append(args)
+            return 0
+
+        distcovery.test.send_request = send_request
+
+        test = Test(Distribution())
+        test.connect = 'socket'
+        test.module = 'first'
+        test.run()
+
+        self.assertEqual(requests, [('socket', {'module': 'first',
+                                                'verbose': 1})])
+
+    def test_run_client_failed(self):
+        distcovery.test.send_request = lambda *args: 1
+
+        test = Test(Distribution())
+        test.connect = 'socket'
+
+        with self.assertRaises(RemoteTestsFailedException) as ctx:
+            test.run()
+
+        self.assertEqual(ctx.exception.message,
+                         RemoteTestsFailedException.template % \
+                         {'path': 'socket', 'status': 1})
+
+    def test_run_parallel(self):
+        self.full_test_tree()
+
+        arguments = []
+        def run_modules(*args, **kwargs):
+            arguments.append(args)
+            self.assertIn('initializer', kwargs)
+            summary = Summary()
+            summary.tests_run = 3
+            return summary
+
+        distcovery.test.run_modules = run_modules
+
+        test = Test(Distribution())
+        test.test_root = '.'
+        test.module = 'first,sub_third'
+        test.no_coverage = True
+        test.jobs = 2
         test.run()
 
         self.assertEqual(arguments,
-                         [(('test_first',),
-                           {'argv': sys.argv[:1],
-                            'exit': False,
-                            'verbosity': 1})])
+                         [(['test_first',
+                            'test_sub_third.test_sub_first',
+                            'test_sub_third.test_sub_second.test_sub_first'],
+                           2, 1)])
 
-    def test_run_default(self):
+    def test_run_isolate(self):
         self.full_test_tree()
 
         arguments = []
-        def main(*args, **kwargs):
-            arguments.append((args, kwargs))
+        def run_modules(*args, **kwargs):
+            arguments.append((args, kwargs['isolate']))
+            return Summary()
 
-        unittest.main = main
+        distcovery.test.run_modules = run_modules
 
         test = Test(Distribution())
         test.test_root = '.'
-        test.module = None
+        test.module = 'first'
         test.no_coverage = True
+        test.isolate = True
         test.run()
 
-        self.assertEqual(len(arguments), 1, 'Expected 1 set of arguments, ' \
-                                            'got %s' % repr(arguments))
-        arguments = arguments[0]
-        self.assertEqual(len(arguments), 2, 'Expected tuple with 2 items, ' \
-                                            'got %s' % repr(arguments))
-        args, kwargs = arguments
-        self.assertEqual(len(args), 1, 'Expected tuple with 1 item, got %s' % \
-                                       repr(args))
-        self.assertRegexpMatches(args[0], '^X_\\d+$')
-
-        self.assertEqual(kwargs, {'argv': sys.argv[:1],
-                                  'exit': False,
-                                  'verbosity': 1})
+        self.assertEqual(arguments, [((['test_first'], 1, 1), True)])
+
+    def test_run_profile(self):
+        listdir = os.listdir
+        self.full_test_tree()
+        self.sample_modules()
+
+        directory = tempfile.mkdtemp()
+        try:
+            test = Test(Distribution())
+            test.test_root = '.'
+            test.module = 'first,sub_first'
+            test.no_coverage = True
+            test.profile = os.path.join(directory, 'profile')
+            test.profile_top = 5
+            test.run()
+
+            os.listdir = listdir
+            files = sorted(os.listdir(test.profile))
+        finally:
+            os.listdir = listdir
+            shutil.rmtree(directory)
+
+        self.assertEqual(files, ['__aggregate__.prof', 'first.prof',
+                                 'sub_first.sub_first.prof'])
+        self.assertIsNone(test.profiler)
+        self.assertIn('Profile of 2 test modules', self.stdout.getvalue())
+        self.assertIn('cumulative', self.stdout.getvalue())
+
+    def test_run_parallel_profile(self):
+        self.full_test_tree()
+
+        arguments = []
+        def run_modules(*args, **kwargs):
+            arguments.append(kwargs['profiles'])
+            return Summary()
+
+        distcovery.test.run_modules = run_modules
+
+        test = Test(Distribution())
+        test.test_root = '.'
+        test.module = 'first'
+        test.no_coverage = True
+        test.jobs = 2
+        test.profile = 'profile'
+        distcovery.test.make_directory = lambda directory: None
+        try:
+            test.run()
+        finally:
+            distcovery.test.make_directory = make_directory
+
+        path = os.path.join('profile', 'first.prof')
+        self.assertEqual(arguments, [{'test_first': path}])
+        self.assertEqual(test.profiles, [path])
+
+    def test_run_parallel_failed(self):
+        self.full_test_tree()
+
+        def run_modules(*args, **kwargs):
+            summary = Summary()
+            summary.tests_run = 3
+            summary.failures.append(('test', 'Traceback'))
+            return summary
+
+        distcovery.test.run_modules = run_modules
+
+        test = Test(Distribution())
+        test.test_root = '.'
+        test.no_coverage = True
+        test.jobs = 2
+
+        with self.assertRaises(TestsFailedException) as ctx:
+            test.run()
+
+        self.assertEqual(ctx.exception.message,
+                         TestsFailedException.template % \
+                         {'failures': 1, 'errors': 0})
+
 if __name__ == '__main__':
     unittest.main()
 
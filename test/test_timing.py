@@ -0,0 +1,166 @@
+import unittest
+import os
+import sys
+import imp
+import json
+import tempfile
+import StringIO
+
+from utils import ImportTrash, sample_case
+
+# Reload module to run its global section under coverage supervision
+import distcovery.timing
+reload(distcovery.timing)
+
+from distcovery.timing import Timer, Timings, TimingResult, import_module
+
+_SAMPLE_MODULE = 'distcovery_test_timing_sample'
+
+def _timer(wall, cpu):
+    timer = Timer()
+    timer.wall = wall
+    timer.cpu = cpu
+    return timer
+
+class TestTimer(unittest.TestCase):
+    def test_timer(self):
+        timer = Timer()
+        self.assertEqual((timer.wall, timer.cpu), (0.0, 0.0))
+
+        with timer:
+            pass
+
+        self.assertGreaterEqual(timer.wall, 0.0)
+        self.assertGreaterEqual(timer.cpu, 0.0)
+
+class TestTimings(unittest.TestCase):
+    def sample_timings(self):
+        timings = Timings()
+        timings.add_test('test.Test.test_fast', _timer(0.1, 0.1),
+                         module='test')
+        timings.add_test('test.Test.test_slow', _timer(2.0, 1.5),
+                         {'setUp': _timer(0.5, 0.4)}, 'test')
+        timings.add_module('test', _timer(0.3, 0.2))
+        return timings
+
+    def test_add(self):
+        timings = self.sample_timings()
+        self.assertEqual(timings.tests,
+                         {'test.Test.test_fast': {'wall': 0.1, 'cpu': 0.1,
+                                                  'module': 'test'},
+                          'test.Test.test_slow': {'wall': 2.0, 'cpu': 1.5,
+                                                  'setUp': {'wall': 0.5,
+                                                            'cpu': 0.4},
+                                                  'module': 'test'}})
+        self.assertEqual(timings.modules, {'test': {'wall': 0.3, 'cpu': 0.2}})
+
+    def test_update(self):
+        timings = Timings()
+        timings.update(self.sample_timings())
+        self.assertEqual(timings.tests, self.sample_timings().tests)
+        self.assertEqual(timings.modules, self.sample_timings().modules)
+
+    def test_module_durations(self):
+        timings = self.sample_timings()
+        timings.add_module('other', _timer(0.5, 0.5))
+
+        durations = timings.module_durations()
+        self.assertEqual(sorted(durations), ['other', 'test'])
+        self.assertAlmostEqual(durations['test'], 2.4)
+        self.assertAlmostEqual(durations['other'], 0.5)
+
+    def test_format_report(self):
+        lines = list(self.sample_timings().format_report(1))
+        self.assertEqual(lines,
+                         ['\nSlowest tests (wall, cpu, setUp wall, ' \
+                          'setUp cpu, tearDown wall, tearDown cpu):',
+                          '    2.000s     1.500s     0.500s     0.400s ' \
+                          '    0.000s     0.000s  test.Test.test_slow',
+                          '\nSlowest test module imports (wall, cpu):',
+                          '    0.300s     0.200s  test'])
+
+    def test_dump(self):
+        handle, path = tempfile.mkstemp()
+        os.close(handle)
+        try:
+            self.sample_timings().dump(path)
+            with open(path) as stream:
+                data = json.load(stream)
+        finally:
+            os.remove(path)
+
+        self.assertEqual(sorted(data['tests']),
+                         ['test.Test.test_fast', 'test.Test.test_slow'])
+        self.assertEqual(data['modules'], {'test': {'wall': 0.3, 'cpu': 0.2}})
+
+class _SampleFinder(object):
+    def find_module(self, fullname, path=None):
+        if fullname == _SAMPLE_MODULE:
+            return self
+
+    def load_module(self, fullname):
+        module = imp.new_module(fullname)
+        sys.modules[fullname] = module
+        return module
+
+class TestImportModule(ImportTrash, unittest.TestCase):
+    def setUp(self):
+        super(TestImportModule, self).setUp()
+
+        finder = _SampleFinder()
+        sys.meta_path.append(finder)
+        self.meta_path_trash.append(finder)
+        self.modules_trash.append(_SAMPLE_MODULE)
+
+    def test_import_module(self):
+        module = import_module(_SAMPLE_MODULE)
+        self.assertIs(module, sys.modules[_SAMPLE_MODULE])
+
+    def test_import_module_timed(self):
+        timings = Timings()
+        import_module(_SAMPLE_MODULE, timings)
+        self.assertEqual(timings.modules.keys(), [_SAMPLE_MODULE])
+
+    def test_import_module_timed_twice(self):
+        timings = Timings()
+        import_module(_SAMPLE_MODULE, timings)
+        timings.modules[_SAMPLE_MODULE]['wall'] = 1.5
+
+        module = import_module(_SAMPLE_MODULE, timings)
+        self.assertIs(module, sys.modules[_SAMPLE_MODULE])
+        self.assertEqual(timings.modules[_SAMPLE_MODULE]['wall'], 1.5)
+
+    def test_import_module_timed_failure(self):
+        timings = Timings()
+        with self.assertRaises(ImportError):
+            import_module(_SAMPLE_MODULE + '_missing', timings)
+
+        self.assertEqual(timings.modules.keys(), [_SAMPLE_MODULE + '_missing'])
+
+class TestTimingResult(unittest.TestCase):
+    def test_timing_result(self):
+        timings = Timings()
+        stream = unittest.runner._WritelnDecorator(StringIO.StringIO())
+        result = TimingResult(timings, stream, True, 0)
+
+        suite = unittest.defaultTestLoader.loadTestsFromTestCase(
+                    sample_case(__name__, 'pass', 'fail'))
+        tests = list(suite)
+        suite(result)
+
+        self.assertEqual(result.testsRun, 2)
+        self.assertEqual(len(result.failures), 1)
+        self.assertEqual(sorted(timings.tests),
+                         [test.id() for test in tests])
+        for record in timings.tests.itervalues():
+            self.assertEqual(sorted(record),
+                             ['cpu', 'module', 'setUp', 'tearDown', 'wall'])
+            self.assertEqual(record['module'], __name__)
+            self.assertEqual(sorted(record['setUp']), ['cpu', 'wall'])
+
+        for test in tests:
+            self.assertNotIn('setUp', test.__dict__)
+            self.assertNotIn('tearDown', test.__dict__)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+import json
+import StringIO
+
+from utils import sample_case
+
+# Reload module to run its global section under coverage supervision
+import distcovery.writers
+reload(distcovery.writers)
+
+from distcovery.writers import make_record, ResultRecorder, \
+                               JsonLinesWriter, JUnitXmlWriter
+
+class _Stream(StringIO.StringIO):
+    def close(self):
+        self.closed_value = self.getvalue()
+        StringIO.StringIO.close(self)
+
+class TestMakeRecord(unittest.TestCase):
+    def test_make_record(self):
+        self.assertEqual(make_record('a.b', 'success', 0.12345678),
+                         {'id': u'a.b', 'outcome': 'success',
+                          'time': 0.123457})
+
+        record = make_record('a.b', 'error', 0.0, 'Trace \xff')
+        self.assertEqual(record['message'], u'Trace \ufffd')
+
+class TestResultRecorder(unittest.TestCase):
+    def test_attach(self):
+        records = []
+        result = unittest.TestResult()
+        ResultRecorder(records.append).attach(result)
+
+        suite = unittest.defaultTestLoader.loadTestsFromTestCase(
+                    sample_case(__name__, 'pass', 'fail', 'error', 'skip',
+                                'expected_failure', 'unexpected_success'))
+        suite(result)
+
+        outcomes = dict((record['id'].rpartition('.')[2], record['outcome']) \
+                        for record in records)
+        self.assertEqual(outcomes,
+                         {'test_pass': 'success',
+                          'test_fail': 'failure',
+                          'test_error': 'error',
+                          'test_skip': 'skipped',
+                          'test_expected_failure': 'expected_failure',
+                          'test_unexpected_success': 'unexpected_success'})
+
+        messages = dict((record['id'].rpartition('.')[2],
+                         record.get('message')) for record in records)
+        self.assertIn('Expected failure', messages['test_fail'])
+        self.assertIn('UserWarning', messages['test_error'])
+        self.assertEqual(messages['test_skip'], 'Expected skip')
+        self.assertIsNone(messages['test_pass'])
+
+        self.assertEqual(result.testsRun, 6)
+        self.assertEqual(len(result.failures), 1)
+
+class TestJsonLinesWriter(unittest.TestCase):
+    def test_write(self):
+        stream = _Stream()
+        writer = JsonLinesWriter(stream)
+        writer.write(make_record('a.b', 'success', 0.5))
+        writer.write(make_record('a.c', 'failure', 0.25, 'Trace'))
+        self.assertEqual(stream.getvalue().count('\n'), 2)
+        writer.close()
+
+        self.assertEqual([json.loads(line) \
+                          for line in stream.closed_value.splitlines()],
+                         [{'id': 'a.b', 'outcome': 'success', 'time': 0.5},
+                          {'id': 'a.c', 'outcome': 'failure', 'time': 0.25,
+                           'message': 'Trace'}])
+
+class TestJUnitXmlWriter(unittest.TestCase):
+    def test_write(self):
+        stream = _Stream()
+        writer = JUnitXmlWriter(stream)
+        writer.write(make_record('a.B.test_b', 'success', 0.5))
+        writer.write(make_record('a.B.test_c', 'failure', 0.25,
+                                 'Trace <"&>\x01'))
+        writer.write(make_record('a.B.test_d', 'skipped', 0.0, 'Reason'))
+        writer.close()
+
+        self.assertEqual(stream.closed_value,
+                         u'<?xml version="1.0" encoding="utf-8"?>\n' \
+                         '<testsuite name="distcovery">\n' \
+                         '<testcase classname="a.B" name="test_b" ' \
+                         'time="0.500000"/>\n' \
+                         '<testcase classname="a.B" name="test_c" ' \
+                         'time="0.250000">\n' \
+                         u'<failure>Trace &lt;"&amp;&gt;\ufffd' \
+                         '</failure>\n' \
+                         '</testcase>\n' \
+                         '<testcase classname="a.B" name="test_d" ' \
+                         'time="0.000000">\n' \
+                         '<skipped>Reason</skipped>\n' \
+                         '</testcase>\n' \
+                         '</testsuite>\n')
+
+if __name__ == '__main__':
+    unittest.main()
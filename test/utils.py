@@ -1,6 +1,9 @@
 import os
 import errno
 import sys
+import unittest
+
+import distcovery.path
 
 def mock_directory_tree(tree):
     tree = dict([(os.path.join(*key), value) \
@@ -35,6 +38,31 @@ def mock_directory_tree(tree):
 
     return listdir, isfile, isdir
 
+class _MockEntry(object):
+    def __init__(self, name, item):
+        self.name = name
+        self.__item = item
+
+    def is_dir(self):
+        return self.__item is not None
+
+    def is_file(self):
+        return self.__item is None
+
+def mock_scandir(tree):
+    listdir = mock_directory_tree(tree)[0]
+    tree = dict([(os.path.join(*key), value) \
+                      for key, value in tree.iteritems()])
+
+    def scandir(path):
+        entries = []
+        for name in listdir(path):
+            entries.append(_MockEntry(name, tree[os.path.join(path, name)]))
+
+        return entries
+
+    return scandir
+
 class PreserveOs(object):
     def setUp(self):
         super(PreserveOs, self).setUp()
@@ -42,8 +70,14 @@ class PreserveOs(object):
         self.__listdir = os.listdir
         self.__isfile = os.path.isfile
         self.__isdir = os.path.isdir
+        self.__getmtime = os.path.getmtime
+        self.__scandir = distcovery.path._scandir
+
+        distcovery.path._scandir = None
 
     def tearDown(self):
+        distcovery.path._scandir = self.__scandir
+        os.path.getmtime = self.__getmtime
         os.path.isdir = self.__isdir
         os.path.isfile = self.__isfile
         os.listdir = self.__listdir
@@ -76,6 +110,7 @@ class PreserveOs(object):
                 ('.', 'test_sub_third', 'test_sub_second',
                  't_sub_second.py'): None}
 
+        self.tree = tree
         os.listdir, os.path.isfile, os.path.isdir = mock_directory_tree(tree)
 
         self.expected_content = {'first': 'test_first',
@@ -94,6 +129,8 @@ class PreserveOs(object):
 
 class ImportTrash(object):
     def setUp(self):
+        super(ImportTrash, self).setUp()
+
         self.modules_trash = []
         self.meta_path_trash = []
 
@@ -106,3 +143,38 @@ class ImportTrash(object):
             if name in sys.modules:
                 del sys.modules[name]
 
+        super(ImportTrash, self).tearDown()
+
+def _pass(self):
+    pass
+
+def _fail(self):
+    self.fail('Expected failure')
+
+def _error(self):
+    raise UserWarning('Expected error')
+
+def _skip(self):
+    self.skipTest('Expected skip')
+
+@unittest.expectedFailure
+def _expected_failure(self):
+    self.fail('Expected failure')
+
+@unittest.expectedFailure
+def _unexpected_success(self):
+    pass
+
+_SAMPLE_OUTCOMES = {'pass': _pass,
+                    'fail': _fail,
+                    'error': _error,
+                    'skip': _skip,
+                    'expected_failure': _expected_failure,
+                    'unexpected_success': _unexpected_success}
+
+def sample_case(module, *outcomes):
+    # Built on demand so that the loader doesn't collect it from test modules
+    attributes = dict(('test_%s' % outcome, _SAMPLE_OUTCOMES[outcome]) \
+                      for outcome in outcomes)
+    attributes['__module__'] = module
+    return type('Sample', (unittest.TestCase,), attributes)